@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+benchmark_aep.py
+
+Times AEP evaluation and gradient throughput over a sweep of wind farm layouts, farm sizes, wind rose resolutions
+and wake models. Each case records the time for prob.setup(), prob.run() and prob.calc_gradient() (AEP w.r.t.
+turbineX and turbineY) and the peak resident memory, and the results are written to a JSON file. A previous JSON
+file can be given as a baseline, in which case cases that got slower (or whose AEP changed) are reported and the
+script exits with a non-zero status. Cases that raise (or whose process dies) are recorded as failed and also
+make the script exit with a non-zero status.
+
+usage examples:
+    python benchmark_aep.py --layouts grid round --nturbines 16 36 64 --ndirections 12 36 --output results.json
+    python benchmark_aep.py --nturbines 16 36 --baseline results.json --tolerance 0.15
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import traceback
+
+import numpy as np
+
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+from openmdao.api import Problem
+from wakeexchange.GeneralWindFarmGroups import AEPGroup, BatchedAEPGroup
+from wakeexchange.floris import floris_wrapper, add_floris_params_IndepVarComps
+from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+from wakeexchange.jensen import jensen_wrapper, add_jensen_params_IndepVarComps
+from wakeexchange.utilities import round_farm
+
+rotor_diameter = 126.4  # (m)
+
+amalia_layout_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'doc', 'examples',
+                                  'input_files', 'layout_amalia.txt')
+
+wake_models = {
+    'floris': (floris_wrapper, add_floris_params_IndepVarComps, {'use_rotor_components': False}),
+    'gauss': (gauss_wrapper, add_gauss_params_IndepVarComps, {}),
+    'jensen': (jensen_wrapper, add_jensen_params_IndepVarComps, {}),
+}
+
+aep_groups = {
+    'standard': AEPGroup,
+    'batched': BatchedAEPGroup,
+}
+
+# metrics compared against the baseline
+timing_metrics = ['setup_time', 'run_time', 'gradient_time', 'peak_rss_mb']
+
+
+def layout(name, nTurbines, spacing):
+    """ turbine locations for the named layout with (about) nTurbines turbines, spacing in rotor diameters """
+
+    if name == 'grid':
+        nRows = max(int(np.round(np.sqrt(nTurbines))), 1)
+        points = np.linspace(start=spacing*rotor_diameter, stop=nRows*spacing*rotor_diameter, num=nRows)
+        xpoints, ypoints = np.meshgrid(points, points)
+        turbineX = np.ndarray.flatten(xpoints)
+        turbineY = np.ndarray.flatten(ypoints)
+
+    elif name == 'round':
+        # grow the farm radius until it holds at least the requested number of turbines
+        radius = spacing*rotor_diameter
+        turbineX, turbineY = round_farm(rotor_diameter, np.array([0., 0.]), radius, min_spacing=spacing)
+        while turbineX.size < nTurbines:
+            radius += 0.5*spacing*rotor_diameter
+            turbineX, turbineY = round_farm(rotor_diameter, np.array([0., 0.]), radius, min_spacing=spacing)
+
+    elif name == 'amalia':
+        # fixed 60 turbine layout, nTurbines is ignored
+        locations = np.loadtxt(amalia_layout_file)
+        turbineX = locations[:, 0]
+        turbineY = locations[:, 1]
+
+    else:
+        raise ValueError('unknown layout "%s", must be one of [grid, round, amalia]' % name)
+
+    return turbineX, turbineY
+
+
+def peak_rss_mb():
+    """ peak resident set size of this process in MB """
+
+    try:
+        import resource
+    except ImportError:  # pragma: no cover (not available on Windows)
+        return float('nan')
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is given in bytes on macOS and in kB elsewhere
+    if sys.platform == 'darwin':
+        return rss/1024.**2
+    return rss/1024.
+
+
+def run_case(case, repeat=1):
+    """ set up, run and differentiate one AEP problem, returning the case dict with its measurements added """
+
+    wake_model, params_IdepVar_func, params_IndepVar_args = wake_models[case['wake_model']]
+
+    turbineX, turbineY = layout(case['layout'], case['nTurbines'], case['spacing'])
+    nTurbines = turbineX.size
+    nDirections = case['nDirections']
+
+    windDirections = np.linspace(0., 360., nDirections, endpoint=False)
+    windSpeeds = np.ones(nDirections)*8.
+    windFrequencies = np.ones(nDirections)/nDirections
+
+    axialInduction = np.ones(nTurbines)/3.
+
+    tic = time.time()
+    prob = Problem(root=aep_groups[case['group']](nTurbines=nTurbines, nDirections=nDirections,
+                                                  use_rotor_components=False, differentiable=True,
+                                                  wake_model=wake_model, params_IdepVar_func=params_IdepVar_func,
+                                                  params_IndepVar_args=params_IndepVar_args))
+    prob.setup(check=False)
+    setup_time = time.time() - tic
+
+    prob['turbineX'] = turbineX
+    prob['turbineY'] = turbineY
+    prob['hubHeight'] = np.ones(nTurbines)*90.
+    prob['rotorDiameter'] = np.ones(nTurbines)*rotor_diameter
+    prob['axialInduction'] = axialInduction
+    prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+    prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+    prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+    prob['windSpeeds'] = windSpeeds
+    prob['windDirections'] = windDirections
+    prob['windFrequencies'] = windFrequencies
+
+    # keep the fastest of the repeated runs, the others are disturbed by whatever else the machine is doing
+    run_time = np.inf
+    for _ in range(repeat):
+        tic = time.time()
+        prob.run()
+        run_time = min(run_time, time.time() - tic)
+
+    gradient_time = np.inf
+    for _ in range(repeat):
+        tic = time.time()
+        prob.calc_gradient(['turbineX', 'turbineY'], ['AEP'], return_format='array')
+        gradient_time = min(gradient_time, time.time() - tic)
+
+    result = dict(case)
+    result.update({'nTurbines': int(nTurbines), 'setup_time': setup_time, 'run_time': run_time,
+                   'gradient_time': gradient_time, 'peak_rss_mb': peak_rss_mb(), 'AEP': float(prob['AEP'])})
+
+    return result
+
+
+def failed_case(case, error):
+    """ result of a case that could not be run, error is the reason (e.g. a traceback) """
+
+    result = dict(case)
+    result['failed'] = error
+
+    return result
+
+
+def _run_case_in_child(case, repeat, queue):
+    # the parent waits for something on the queue, so exceptions are put there as well
+    try:
+        result = run_case(case, repeat)
+    except Exception:
+        result = failed_case(case, traceback.format_exc())
+    queue.put(result)
+
+
+def run_case_isolated(case, repeat=1, poll_interval=1.):
+    """
+    run a case in a fresh process so that its peak memory is not hidden by earlier (larger) cases. If the case raises,
+    or the process ends without a result (e.g. killed for running out of memory), the case is returned as failed
+    """
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case_in_child, args=(case, repeat, queue))
+    process.start()
+
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=poll_interval)
+        except Empty:
+            if process.exitcode is not None:
+                # the result may have been put just before the process ended
+                try:
+                    result = queue.get(timeout=poll_interval)
+                except Empty:
+                    result = failed_case(case, 'process exited with code %i without a result' % process.exitcode)
+    process.join()
+
+    return result
+
+
+def case_key(case):
+    """ identifies the same case in different result files (nTurbines is the requested number of turbines) """
+
+    return (case['layout'], case['requested_nTurbines'], case['nDirections'], case['wake_model'], case['group'])
+
+
+def compare(results, baseline, tolerance=0.1, min_time=0.01, aep_rtol=1e-6):
+    """
+    Compares results with the cases of the same key in the baseline. A metric regresses if it grew by more than the
+    relative tolerance (and, for times, by more than min_time seconds). A changed AEP is also reported as a regression,
+    as is a failed case that did not fail in the baseline. Returns the list of regressions as (key, metric, baseline
+    value, new value) tuples.
+    """
+
+    baseline_cases = dict((case_key(case), case) for case in baseline['cases'] if 'failed' not in case)
+
+    regressions = []
+    for case in results['cases']:
+        key = case_key(case)
+        if key not in baseline_cases:
+            print('%s: no baseline' % (key,))
+            continue
+
+        old = baseline_cases[key]
+        if 'failed' in case:
+            print('%s: FAILED' % (key,))
+            regressions.append((key, 'failed', None, case['failed']))
+            continue
+
+        for metric in timing_metrics:
+            ratio = case[metric]/old[metric] if old[metric] > 0. else np.inf
+            grew = ratio > 1. + tolerance
+            if metric.endswith('_time'):
+                grew = grew and case[metric] - old[metric] > min_time
+            print('%s %s: %.4g -> %.4g (x%.2f)%s' % (key, metric, old[metric], case[metric], ratio,
+                                                     '  REGRESSION' if grew else ''))
+            if grew:
+                regressions.append((key, metric, old[metric], case[metric]))
+
+        if not np.isclose(case['AEP'], old['AEP'], rtol=aep_rtol, atol=0.):
+            print('%s AEP: %.10g -> %.10g  CHANGED' % (key, old['AEP'], case['AEP']))
+            regressions.append((key, 'AEP', old['AEP'], case['AEP']))
+
+    return regressions
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='benchmark AEP evaluation and gradient calculation')
+    parser.add_argument('--layouts', nargs='+', default=['grid', 'round', 'amalia'],
+                        choices=['grid', 'round', 'amalia'])
+    parser.add_argument('--nturbines', nargs='+', type=int, default=[16, 36, 64],
+                        help='(approximate) number of turbines, not used for the amalia layout')
+    parser.add_argument('--ndirections', nargs='+', type=int, default=[12, 36])
+    parser.add_argument('--wake-models', nargs='+', default=['floris', 'gauss', 'jensen'],
+                        choices=sorted(wake_models.keys()))
+    parser.add_argument('--groups', nargs='+', default=['standard'], choices=sorted(aep_groups.keys()),
+                        help='AEP group implementation(s) to benchmark')
+    parser.add_argument('--spacing', type=float, default=5., help='turbine spacing in rotor diameters')
+    parser.add_argument('--repeat', type=int, default=3, help='number of times run and gradient are timed')
+    parser.add_argument('--output', default='benchmark_aep.json', help='JSON file the results are written to')
+    parser.add_argument('--baseline', default=None, help='JSON file of earlier results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative increase over the baseline that is reported as a regression')
+    parser.add_argument('--in-process', action='store_true',
+                        help='run all cases in this process (faster, but peak memory is then cumulative)')
+    args = parser.parse_args(argv)
+
+    # the amalia layout has a fixed size, so it is only run once per wind rose and wake model
+    cases = []
+    for layout_name in args.layouts:
+        for nTurbines in (args.nturbines if layout_name != 'amalia' else [60]):
+            for nDirections in args.ndirections:
+                for wake_model in args.wake_models:
+                    for group in args.groups:
+                        cases.append({'layout': layout_name, 'requested_nTurbines': nTurbines,
+                                      'nTurbines': nTurbines, 'nDirections': nDirections,
+                                      'wake_model': wake_model, 'group': group, 'spacing': args.spacing})
+
+    results = {'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'platform': platform.platform(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'repeat': args.repeat},
+               'cases': []}
+
+    failures = 0
+    for case in cases:
+        if args.in_process:
+            try:
+                result = run_case(case, args.repeat)
+            except Exception:
+                result = failed_case(case, traceback.format_exc())
+        else:
+            result = run_case_isolated(case, args.repeat)
+        results['cases'].append(result)
+
+        if 'failed' in result:
+            failures += 1
+            print('%-6s nTurbines=%-4i nDirections=%-4i %-6s %-8s FAILED\n%s' % (
+                result['layout'], result['nTurbines'], result['nDirections'], result['wake_model'], result['group'],
+                result['failed']))
+            continue
+
+        print('%-6s nTurbines=%-4i nDirections=%-4i %-6s %-8s setup %8.3f s  run %8.3f s  gradient %8.3f s  '
+              'peak %8.1f MB' % (result['layout'], result['nTurbines'], result['nDirections'], result['wake_model'],
+                                 result['group'], result['setup_time'], result['run_time'], result['gradient_time'],
+                                 result['peak_rss_mb']))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        if len(regressions) > 0:
+            print('%i regression(s) compared to %s' % (len(regressions), args.baseline))
+            return 1
+        print('no regressions compared to %s' % args.baseline)
+
+    if failures > 0:
+        print('%i case(s) failed' % failures)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ from openmdao.api import Problem, pyOptSparseDriver
 from wakeexchange.OptimizationGroups import OptAEP
 from wakeexchange import config
 from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+from wakeexchange.utilities import round_farm
 
 import time
 import numpy as np
@@ -13,42 +14,6 @@ import cProfile
 
 import sys
 
-def round_farm(rotor_diameter, center, radius, min_spacing=2.):
-
-    # normalize inputs
-    radius /= rotor_diameter
-    center /= rotor_diameter
-
-    # calculate how many circles can be fit in the wind farm area
-    nCircles = np.floor(radius/min_spacing)
-    radii = np.linspace(radius/nCircles, radius, nCircles)
-    alpha_mins = 2.*np.arcsin(min_spacing/(2.*radii))
-    nTurbines_circles = np.floor(2. * np.pi / alpha_mins)
-
-    nTurbines = int(np.sum(nTurbines_circles))+1
-
-    alphas = 2.*np.pi/nTurbines_circles
-
-    turbineX = np.zeros(nTurbines)
-    turbineY = np.zeros(nTurbines)
-
-    index = 0
-    turbineX[index] = center[0]
-    turbineY[index] = center[1]
-    index += 1
-    for circle in np.arange(0, int(nCircles)):
-        for turb in np.arange(0, int(nTurbines_circles[circle])):
-            angle = alphas[circle]*turb
-            w = radii[circle]*np.cos(angle)
-            h = radii[circle]*np.sin(angle)
-            x = center[0] + w
-            y = center[1] + h
-            turbineX[index] = x
-            turbineY[index] = y
-            index += 1
-
-    return turbineX*rotor_diameter, turbineY*rotor_diameter
-
 if __name__ == "__main__":
 
     ######################### for MPI functionality #########################
@@ -7,8 +7,9 @@ setup(
     name='WakeExchange',
     version='0.0.1',
     description='Wind farm optimization interface allowing wake models to be switched out',
-    install_requires=['openmdao>=1.6.3', 'florisse'],
+    install_requires=['openmdao>=1.6.3', 'florisse', 'pyyaml'],
     package_dir={'': 'src'},
+    package_data={'wakeexchange': ['data/turbine_data/*.yml', 'data/turbine_data/*.p']},
     dependency_links=['http://github.com/OpenMDAO/OpenMDAO.git@master', 'https://github.com/WISDEM/FLORISSE.git@develop'],
     packages=['wakeexchange'],
     license='Apache License, Version 2.0',
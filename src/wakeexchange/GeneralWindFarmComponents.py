@@ -1,12 +1,17 @@
 from openmdao.api import Component, Group, Problem, IndepVarComp
 from akima import Akima, akima_interp
-from utilities import smooth_min, hermite_spline
+from utilities import smooth_min, hermite_spline, interp_with_slope
+from windrose import weibull_bin_frequencies
+from wakeexchange.turbines import get_turbine_type
 import config
 
 import numpy as np
-from scipy import interp
+from collections import OrderedDict
+from scipy import interp, sparse
+from scipy.sparse.csgraph import connected_components
 from scipy.io import loadmat
-from scipy.spatial import ConvexHull
+from scipy.linalg import solve_triangular
+from scipy.spatial import ConvexHull, cKDTree
 from scipy.interpolate import UnivariateSpline
 
 import matplotlib.pylab as plt
@@ -27,6 +32,62 @@ def add_gen_params_IdepVarComps(openmdao_group, datasize):
                                            pass_by_obj=True), promotes=['*'])
 
 
+def diagonal_jacobian(values):
+    """ sparse square Jacobian with values on the diagonal, for outputs that only depend on the same element of
+    the input """
+
+    return sparse.diags(np.ravel(values), 0, format='csr')
+
+
+def zero_jacobian(nRows, nCols):
+    """ empty sparse Jacobian for outputs that do not depend on an input """
+
+    return sparse.csr_matrix((nRows, nCols))
+
+
+# rotation matrices from the original to the wind direction reference frame, shared by every component that needs
+# them. Keys are the raw bytes of the wind direction arrays.
+_rotation_cache = OrderedDict()
+_rotation_cache_size = 256
+
+
+def wind_frame_rotations(windDirections):
+    """
+    (nDirections, 2, 2) rotation matrices from the original to the downwind(x)-crosswind(y) reference frame, for wind
+    directions given as direction from, in deg. cw from north as in meteorological data. The transposed matrices rotate
+    back to the original frame. The returned array is cached, so it is read-only.
+    """
+
+    windDirections = np.ascontiguousarray(np.atleast_1d(windDirections), dtype=float)
+    key = windDirections.tobytes()
+
+    try:
+        rotations = _rotation_cache.pop(key)
+    except KeyError:
+        # convert from meteorological polar system (CW, 0 deg.=N) to standard polar system (CCW, 0 deg.=E)
+        windDirectionDeg = 270. - windDirections
+        windDirectionDeg[windDirectionDeg < 0.] += 360.
+        windDirectionRad = np.pi*windDirectionDeg/180.0    # inflow wind direction in radians
+
+        cos = np.cos(-windDirectionRad)
+        sin = np.sin(-windDirectionRad)
+
+        rotations = np.empty((windDirections.size, 2, 2))
+        rotations[:, 0, 0] = cos
+        rotations[:, 0, 1] = -sin
+        rotations[:, 1, 0] = sin
+        rotations[:, 1, 1] = cos
+        rotations.flags.writeable = False
+
+        if len(_rotation_cache) >= _rotation_cache_size:
+            _rotation_cache.popitem(last=False)
+
+    # (re)insert as most recently used
+    _rotation_cache[key] = rotations
+
+    return rotations
+
+
 class WindFrame(Component):
     """ Calculates the locations of each turbine in the wind direction reference frame """
 
@@ -79,50 +140,34 @@ class WindFrame(Component):
 
     def solve_nonlinear(self, params, unknowns, resids):
 
-        windDirectionDeg = params['wind_direction']
+        # get the (cached) rotation to the wind direction reference frame
+        rotation = wind_frame_rotations(params['wind_direction'])[0]
 
         # get turbine positions and velocity sampling positions
         turbineX = params['turbineX']
         turbineY = params['turbineY']
 
-        if self.nSamples > 0:
-            velX = params['wsPositionX']
-            velY = params['wsPositionY']
-
-        # adjust directions
-        windDirectionDeg = 270. - windDirectionDeg
-        # windDirectionDeg = 90. - windDirectionDeg # how this was done in SusTech conference paper (oops!)
-        if windDirectionDeg < 0.:
-            windDirectionDeg += 360.
-        windDirectionRad = np.pi*windDirectionDeg/180.0    # inflow wind direction in radians
-
         # convert to downwind(x)-crosswind(y) coordinates
-        unknowns['turbineXw'] = turbineX*np.cos(-windDirectionRad)-turbineY*np.sin(-windDirectionRad)
-        unknowns['turbineYw'] = turbineX*np.sin(-windDirectionRad)+turbineY*np.cos(-windDirectionRad)
+        unknowns['turbineXw'] = rotation[0, 0]*turbineX + rotation[0, 1]*turbineY
+        unknowns['turbineYw'] = rotation[1, 0]*turbineX + rotation[1, 1]*turbineY
 
         if self.nSamples > 0:
-            unknowns['wsPositionXw'] = velX*np.cos(-windDirectionRad)-velY*np.sin(-windDirectionRad)
-            unknowns['wsPositionYw'] = velX*np.sin(-windDirectionRad)+velY*np.cos(-windDirectionRad)
+            velX = params['wsPositionX']
+            velY = params['wsPositionY']
+            unknowns['wsPositionXw'] = rotation[0, 0]*velX + rotation[0, 1]*velY
+            unknowns['wsPositionYw'] = rotation[1, 0]*velX + rotation[1, 1]*velY
 
     def linearize(self, params, unknowns, resids):
 
         # obtain necessary inputs
         nTurbines = self.nTurbines
-        windDirectionDeg = params['wind_direction']
-
-        # convert from meteorological polar system (CW, 0 deg.=N) to standard polar system (CCW, 0 deg.=E)
-        windDirectionDeg = 270. - windDirectionDeg
-        if windDirectionDeg < 0.:
-            windDirectionDeg += 360.
-
-        # convert inflow wind direction to radians
-        windDirectionRad = np.pi*windDirectionDeg/180.0
+        rotation = wind_frame_rotations(params['wind_direction'])[0]
 
         # calculate gradients of conversion to wind direction reference frame
-        dturbineXw_dturbineX = np.eye(nTurbines, nTurbines)*np.cos(-windDirectionRad)
-        dturbineXw_dturbineY = np.eye(nTurbines, nTurbines)*(-np.sin(-windDirectionRad))
-        dturbineYw_dturbineX = np.eye(nTurbines, nTurbines)*np.sin(-windDirectionRad)
-        dturbineYw_dturbineY = np.eye(nTurbines, nTurbines)*np.cos(-windDirectionRad)
+        dturbineXw_dturbineX = diagonal_jacobian(np.ones(nTurbines)*rotation[0, 0])
+        dturbineXw_dturbineY = diagonal_jacobian(np.ones(nTurbines)*rotation[0, 1])
+        dturbineYw_dturbineX = diagonal_jacobian(np.ones(nTurbines)*rotation[1, 0])
+        dturbineYw_dturbineY = diagonal_jacobian(np.ones(nTurbines)*rotation[1, 1])
 
         # initialize Jacobian dict
         J = {}
@@ -225,24 +270,24 @@ class AdjustCtCpYaw(Component):
 
         # calculate gradients and populate Jacobian dict
         if not CTcorrected:
-            J[('Ct_out', 'Ct_in')] = np.eye(nTurbines) * np.cos(yaw) * np.cos(yaw)
-            J[('Ct_out', 'Cp_in')] = np.zeros((nTurbines, nTurbines))
-            J[('Ct_out', 'yaw%i' % direction_id)] = np.eye(nTurbines) * Ct * (
-                -2. * np.sin(yaw) * np.cos(yaw)) * np.pi / 180.
+            J[('Ct_out', 'Ct_in')] = diagonal_jacobian(np.cos(yaw) * np.cos(yaw))
+            J[('Ct_out', 'Cp_in')] = zero_jacobian(nTurbines, nTurbines)
+            J[('Ct_out', 'yaw%i' % direction_id)] = diagonal_jacobian(Ct * (
+                -2. * np.sin(yaw) * np.cos(yaw)) * np.pi / 180.)
         else:
-            J[('Ct_out', 'Ct_in')] = np.eye(nTurbines, nTurbines)
-            J[('Ct_out', 'Cp_in')] = np.zeros((nTurbines, nTurbines))
-            J[('Ct_out', 'yaw%i' % direction_id)] = np.zeros((nTurbines, nTurbines))
+            J[('Ct_out', 'Ct_in')] = diagonal_jacobian(np.ones(nTurbines))
+            J[('Ct_out', 'Cp_in')] = zero_jacobian(nTurbines, nTurbines)
+            J[('Ct_out', 'yaw%i' % direction_id)] = zero_jacobian(nTurbines, nTurbines)
 
         if not CPcorrected:
-            J[('Cp_out', 'Cp_in')] = np.eye(nTurbines, nTurbines) * np.cos(yaw) ** pP
-            J[('Cp_out', 'Ct_in')] = np.zeros((nTurbines, nTurbines))
-            J[('Cp_out', 'yaw%i' % direction_id)] = np.eye(nTurbines, nTurbines) * (
-                -Cp * pP * np.sin(yaw) * np.cos(yaw) ** (pP - 1.0)) * np.pi / 180.
+            J[('Cp_out', 'Cp_in')] = diagonal_jacobian(np.cos(yaw) ** pP)
+            J[('Cp_out', 'Ct_in')] = zero_jacobian(nTurbines, nTurbines)
+            J[('Cp_out', 'yaw%i' % direction_id)] = diagonal_jacobian(
+                -Cp * pP * np.sin(yaw) * np.cos(yaw) ** (pP - 1.0) * np.pi / 180.)
         else:
-            J[('Cp_out', 'Cp_in')] = np.eye(nTurbines, nTurbines)
-            J[('Cp_out', 'Ct_in')] = np.zeros((nTurbines, nTurbines))
-            J[('Cp_out', 'yaw%i' % direction_id)] = np.zeros((nTurbines, nTurbines))
+            J[('Cp_out', 'Cp_in')] = diagonal_jacobian(np.ones(nTurbines))
+            J[('Cp_out', 'Ct_in')] = zero_jacobian(nTurbines, nTurbines)
+            J[('Cp_out', 'yaw%i' % direction_id)] = zero_jacobian(nTurbines, nTurbines)
 
         return J
 
@@ -551,6 +596,15 @@ class SpacingComp(Component):
         self.deriv_options['check_step_size'] = 1.0e-5
         self.deriv_options['check_step_calc'] = 'relative'
 
+        # turbine pairs (i, j) with j > i in the order of the original double loop over i and j
+        self.nTurbines = nTurbines
+        self.pair_i, self.pair_j = np.triu_indices(nTurbines, k=1)
+        nPairs = self.pair_i.size
+
+        # rows and columns of the nonzero Jacobian entries, (pair, j) followed by (pair, i)
+        self.jac_rows = np.tile(np.arange(0, nPairs), 2)
+        self.jac_cols = np.concatenate([self.pair_j, self.pair_i])
+
         # Explicitly size input arrays
         self.add_param('turbineX', val=np.zeros(nTurbines),
                        desc='x coordinates of turbines in wind dir. ref. frame')
@@ -558,23 +612,16 @@ class SpacingComp(Component):
                        desc='y coordinates of turbines in wind dir. ref. frame')
 
         # Explicitly size output array
-        self.add_output('wtSeparationSquared', val=np.zeros(((nTurbines-1)*nTurbines/2)),
+        self.add_output('wtSeparationSquared', val=np.zeros(nPairs),
                         desc='spacing of all turbines in the wind farm')
 
     def solve_nonlinear(self, params, unknowns, resids):
-        # print('in dist const')
 
         turbineX = params['turbineX']
         turbineY = params['turbineY']
-        nTurbines = turbineX.size
-        separation_squared = np.zeros(((nTurbines-1)*nTurbines/2))
 
-        k = 0
-        for i in range(0, nTurbines):
-            for j in range(i+1, nTurbines):
-                separation_squared[k] = (turbineX[j]-turbineX[i])**2+(turbineY[j]-turbineY[i])**2
-                k += 1
-        unknowns['wtSeparationSquared'] = separation_squared
+        unknowns['wtSeparationSquared'] = (turbineX[self.pair_j]-turbineX[self.pair_i])**2 + \
+                                          (turbineY[self.pair_j]-turbineY[self.pair_i])**2
 
     def linearize(self, params, unknowns, resids):
 
@@ -582,35 +629,128 @@ class SpacingComp(Component):
         turbineX = params['turbineX']
         turbineY = params['turbineY']
 
-        # get number of turbines
-        nTurbines = turbineX.size
+        nTurbines = self.nTurbines
+        nPairs = self.pair_i.size
+
+        # calculate the gradient of the distance between each pair of turbines w.r.t. turbineX and turbineY
+        dx = 2*(turbineX[self.pair_j]-turbineX[self.pair_i])
+        dy = 2*(turbineY[self.pair_j]-turbineY[self.pair_i])
 
-        # initialize gradient calculation array
-        dS = np.zeros((int((nTurbines-1.)*nTurbines/2.), 2*nTurbines))
+        # initialize Jacobian dict
+        J = {}
 
-        # set turbine pair counter to zero
-        k = 0
+        # populate Jacobian dict, each pair only depends on the two turbines in it
+        J['wtSeparationSquared', 'turbineX'] = sparse.csr_matrix((np.concatenate([dx, -dx]),
+                                                                  (self.jac_rows, self.jac_cols)),
+                                                                 shape=(nPairs, nTurbines))
+        J['wtSeparationSquared', 'turbineY'] = sparse.csr_matrix((np.concatenate([dy, -dy]),
+                                                                  (self.jac_rows, self.jac_cols)),
+                                                                 shape=(nPairs, nTurbines))
 
-        # calculate the gradient of the distance between each pair of turbines w.r.t. turbineX and turbineY
-        for i in range(0, nTurbines):
-            for j in range(i+1, nTurbines):
-                # separation wrt Xj
-                dS[k, j] = 2*(turbineX[j]-turbineX[i])
-                # separation wrt Xi
-                dS[k, i] = -2*(turbineX[j]-turbineX[i])
-                # separation wrt Yj
-                dS[k, j+nTurbines] = 2*(turbineY[j]-turbineY[i])
-                # separation wrt Yi
-                dS[k, i+nTurbines] = -2*(turbineY[j]-turbineY[i])
-                # increment turbine pair counter
-                k += 1
+        return J
+
+
+class NeighborSpacingComp(Component):
+    """
+    Spacing constraint with one value per turbine instead of one per turbine pair. Only pairs closer than
+    radius_factor*minSpacing*rotorDiameter[0] (found with a KD-tree) are considered, and the normalized violations
+    g_ij = 1 - |x_i-x_j|^2/(minSpacing*rotorDiameter[0])^2 of each turbine's neighbors are aggregated with a
+    Kreisselmeier-Steinhauser (KS) function. The constraint is spacingKS <= 0. Turbines without neighbors get the
+    value of g at the neighbor radius, 1-radius_factor^2.
+    """
+
+    def __init__(self, nTurbines, minSpacing=2., radius_factor=3., rho=50.):
+
+        super(NeighborSpacingComp, self).__init__()
+
+        # set finite difference options (fd used for testing only)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-5
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        self.nTurbines = nTurbines
+        self.minSpacing = minSpacing
+        self.radius_factor = radius_factor
+        self.rho = rho
+
+        # Explicitly size input arrays
+        self.add_param('turbineX', val=np.zeros(nTurbines), units='m',
+                       desc='x coordinates of turbines in global ref. frame')
+        self.add_param('turbineY', val=np.zeros(nTurbines), units='m',
+                       desc='y coordinates of turbines in global ref. frame')
+        self.add_param('rotorDiameter', val=np.zeros(nTurbines), units='m',
+                       desc='rotor diameters of all turbines, the first one sets the minimum spacing')
+
+        # Explicitly size output array
+        self.add_output('spacingKS', val=np.zeros(nTurbines),
+                        desc='KS aggregate of the normalized spacing violations of each turbine (<= 0 is feasible)')
+
+    def _neighbors(self, params):
+        """ directed neighbor pairs (i, j), their normalized violations, and the KS weights """
+
+        turbineX = params['turbineX']
+        turbineY = params['turbineY']
+        spacing = self.minSpacing*params['rotorDiameter'][0]
+        rho = self.rho
+
+        # find all pairs within the neighbor radius
+        tree = cKDTree(np.column_stack([turbineX, turbineY]))
+        pairs = np.array(sorted(tree.query_pairs(self.radius_factor*spacing)), dtype=int).reshape(-1, 2)
+
+        # each pair constrains both of its turbines
+        i = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        j = np.concatenate([pairs[:, 1], pairs[:, 0]])
+
+        separation_squared = (turbineX[i]-turbineX[j])**2 + (turbineY[i]-turbineY[j])**2
+        g = 1. - separation_squared/spacing**2
+
+        # shift by the largest violation of each turbine to keep the exponentials bounded
+        gmax = np.zeros(self.nTurbines) + 1. - self.radius_factor**2
+        np.maximum.at(gmax, i, g)
+        weights = np.exp(rho*(g - gmax[i]))
+        weights_sum = np.bincount(i, weights=weights, minlength=self.nTurbines)
+
+        return i, j, g, gmax, weights, weights_sum, separation_squared, spacing
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        i, j, g, gmax, weights, weights_sum, _, _ = self._neighbors(params)
+
+        ks = np.copy(gmax)
+        has_neighbors = weights_sum > 0.
+        ks[has_neighbors] += np.log(weights_sum[has_neighbors])/self.rho
+
+        unknowns['spacingKS'] = ks
+
+    def linearize(self, params, unknowns, resids):
+
+        turbineX = params['turbineX']
+        turbineY = params['turbineY']
+        nTurbines = self.nTurbines
+
+        i, j, g, gmax, weights, weights_sum, separation_squared, spacing = self._neighbors(params)
+
+        # derivative of each KS value w.r.t. the violations it aggregates
+        dks_dg = weights/weights_sum[i]
+
+        # derivatives of the violations w.r.t. the positions of both turbines and the spacing diameter
+        dg_dxj = 2.*(turbineX[i]-turbineX[j])/spacing**2
+        dg_dyj = 2.*(turbineY[i]-turbineY[j])/spacing**2
+        dg_dD = 2.*separation_squared*self.minSpacing/spacing**3
+
+        rows = np.concatenate([i, i])
+        cols = np.concatenate([i, j])
 
         # initialize Jacobian dict
         J = {}
 
-        # populate Jacobian dict
-        J['wtSeparationSquared', 'turbineX'] = dS[:, :nTurbines]
-        J['wtSeparationSquared', 'turbineY'] = dS[:, nTurbines:]
+        # populate Jacobian dict (duplicate entries are summed)
+        J['spacingKS', 'turbineX'] = sparse.csr_matrix((np.concatenate([-dks_dg*dg_dxj, dks_dg*dg_dxj]), (rows, cols)),
+                                                       shape=(nTurbines, nTurbines))
+        J['spacingKS', 'turbineY'] = sparse.csr_matrix((np.concatenate([-dks_dg*dg_dyj, dks_dg*dg_dyj]), (rows, cols)),
+                                                       shape=(nTurbines, nTurbines))
+        J['spacingKS', 'rotorDiameter'] = sparse.csr_matrix((dks_dg*dg_dD, (i, np.zeros_like(i))),
+                                                            shape=(nTurbines, nTurbines))
 
         return J
 
@@ -663,11 +803,7 @@ class BoundaryComp(Component):
 
         if self.type == 'polygon':
             # put locations in correct arrangement for calculations
-            locations = np.zeros([self.nTurbines, 2])
-            for i in range(0, self.nTurbines):
-                locations[i] = np.array([turbineX[i], turbineY[i]])
-
-            # print("in comp, locs are: ".format(locations))
+            locations = np.column_stack([turbineX, turbineY])
 
             # calculate distance from each point to each face
             unknowns['boundaryDistances'] = calculate_distance(locations,
@@ -685,28 +821,22 @@ class BoundaryComp(Component):
 
     def linearize(self, params, unknowns, resids):
 
+        nTurbines = self.nTurbines
+
         if self.type == 'polygon':
             unit_normals = params['boundaryNormals']
+            nVertices = self.nVertices
 
-            # initialize array to hold distances from each point to each face
-            dfaceDistance_dx = np.zeros([self.nTurbines*self.nVertices, self.nTurbines])
-            dfaceDistance_dy = np.zeros([self.nTurbines*self.nVertices, self.nTurbines])
-
-            for i in range(0, self.nTurbines):
-                # determine if point is inside or outside of each face, and distance from each face
-                for j in range(0, self.nVertices):
-
-                    # define the derivative vectors from the point of interest to the first point of the face
-                    dpa_dx = np.array([-1.0, 0.0])
-                    dpa_dy = np.array([0.0, -1.0])
-
-                    # find perpendicular distance derivatives from point to current surface (vector projection)
-                    ddistanceVec_dx = np.vdot(dpa_dx, unit_normals[j])*unit_normals[j]
-                    ddistanceVec_dy = np.vdot(dpa_dy, unit_normals[j])*unit_normals[j]
+            # the distance of each turbine to each face only depends on the location of that turbine, so the
+            # Jacobian is block diagonal with one (nVertices x 1) block per turbine
+            scale = -np.sum(unit_normals**2, 1)
+            rows = np.arange(0, nTurbines*nVertices)
+            cols = np.repeat(np.arange(0, nTurbines), nVertices)
 
-                    # calculate derivatives for the sign of perpendicular distance from point to current face
-                    dfaceDistance_dx[i*self.nVertices+j, i] = np.vdot(ddistanceVec_dx, unit_normals[j])
-                    dfaceDistance_dy[i*self.nVertices+j, i] = np.vdot(ddistanceVec_dy, unit_normals[j])
+            dfaceDistance_dx = sparse.csr_matrix((np.tile(scale*unit_normals[:, 0], nTurbines), (rows, cols)),
+                                                 shape=(nTurbines*nVertices, nTurbines))
+            dfaceDistance_dy = sparse.csr_matrix((np.tile(scale*unit_normals[:, 1], nTurbines), (rows, cols)),
+                                                 shape=(nTurbines*nVertices, nTurbines))
 
         elif self.type == 'circle':
             turbineX = params['turbineX']
@@ -714,12 +844,8 @@ class BoundaryComp(Component):
             xc = params['boundary_center'][0]
             yc = params['boundary_center'][1]
 
-            A = np.eye(self.nTurbines, self.nTurbines)
-            B =  - 2. * (turbineX - xc)
-            C =  - 2. * (turbineY - yc)
-
-            dfaceDistance_dx = A*B
-            dfaceDistance_dy = A*C
+            dfaceDistance_dx = diagonal_jacobian(- 2. * (turbineX - xc))
+            dfaceDistance_dy = diagonal_jacobian(- 2. * (turbineY - yc))
         else:
             ValueError('Invalid value (%s) encountered in BoundaryComp input -type-. Must be one of [polygon, circle]'
                        % (type))
@@ -736,9 +862,13 @@ class BoundaryComp(Component):
 
 
 class MUX(Component):
-    """ Connect input elements into a single array  """
+    """
+    Connect input elements into a single array. Each input may itself be an array of element_size values, in which
+    case the output is an (nElements, element_size) array. With pass_through=True the whole array is passed in as the
+    single input 'Input' instead of one input per element.
+    """
 
-    def __init__(self, nElements, units=None):
+    def __init__(self, nElements, units=None, element_size=1, pass_through=False):
 
         super(MUX, self).__init__()
 
@@ -749,48 +879,61 @@ class MUX(Component):
 
         # define necessary class attributes
         self.nElements = nElements
+        self.element_size = element_size
+        self.pass_through = pass_through
+
+        units_kwargs = {} if units is None else {'units': units}
+        shape = (nElements,) if element_size == 1 else (nElements, element_size)
+        size = nElements*element_size
 
         # define inputs
-        if units is None:
-            for i in range(0, nElements):
-                self.add_param('input%i' % i, val=0.0, desc='scalar input')
+        if pass_through:
+            self.input_names = ['Input']
+            self.add_param('Input', np.zeros(shape), desc='ndArray of all the inputs', **units_kwargs)
         else:
-            for i in range(0, nElements):
-                self.add_param('input%i' % i, val=0.0, units=units, desc='scalar input')
+            self.input_names = ['input%i' % i for i in range(0, nElements)]
+            for name in self.input_names:
+                self.add_param(name, val=0.0 if element_size == 1 else np.zeros(element_size),
+                               desc='scalar input' if element_size == 1 else 'array input', **units_kwargs)
 
         # define output array
-        if units is None:
-            self.add_output('Array', np.zeros(nElements), desc='ndArray of all the scalar inputs')
+        self.add_output('Array', np.zeros(shape), desc='ndArray of all the inputs', **units_kwargs)
+
+        # the Jacobian is constant, so build it once
+        self.J = {}
+        if pass_through:
+            self.J['Array', 'Input'] = sparse.identity(size, format='csr')
         else:
-            self.add_output('Array', np.zeros(nElements), units=units, desc='ndArray of all the scalar inputs')
+            for i, name in enumerate(self.input_names):
+                rows = np.arange(i*element_size, (i+1)*element_size)
+                self.J['Array', name] = sparse.csr_matrix((np.ones(element_size), (rows, np.arange(0, element_size))),
+                                                          shape=(size, element_size))
 
     def solve_nonlinear(self, params, unknowns, resids):
 
+        if self.pass_through:
+            unknowns['Array'] = params['Input']
+            return
+
         # assign input values to elements of the output array
-        for i in range(0, self.nElements):
-            exec("unknowns['Array'][%i] = params['input%i']" % (i, i))
+        array = unknowns['Array']
+        for i, name in enumerate(self.input_names):
+            array[i] = params[name]
+        unknowns['Array'] = array
 
     def linearize(self, params, unknowns, resids):
 
-        # initialize gradient calculation array
-        dArray_dInput = np.zeros(self.nElements)
-
-        # initialize Jacobian dict
-        J = {}
-
-        # calculate gradient and populate Jacobian dict
-        for i in range(0, self.nElements):
-            dArray_dInput[i] = 1.0
-            J['Array', 'input%i' % i] = np.array(dArray_dInput)
-            dArray_dInput[i] = 0.0
-
-        return J
+        return self.J
 
 
 class DeMUX(Component):
-    """ split a given array into separate elements """
+    """
+    split a given array into separate elements. If element_size > 1 the input is an (nElements, element_size) array
+    and each output is one row of it. With pass_through=True the whole array is passed on as the single output 'Output'
+    instead of one output per element.
+    """
 
-    def __init__(self, nElements, units=None):
+    def __init__(self, nElements, units=None, element_size=1, pass_through=False):
 
         super(DeMUX, self).__init__()
 
@@ -801,40 +944,50 @@ class DeMUX(Component):
 
         # initialize necessary class attributes
         self.nElements = nElements
+        self.element_size = element_size
+        self.pass_through = pass_through
+
+        units_kwargs = {} if units is None else {'units': units}
+        shape = (nElements,) if element_size == 1 else (nElements, element_size)
+        size = nElements*element_size
 
         # define input
-        if units is None:
-            self.add_param('Array', np.zeros(nElements), desc='ndArray of scalars')
-        else:
-            self.add_param('Array', np.zeros(nElements), units=units, desc='ndArray of scalars')
+        self.add_param('Array', np.zeros(shape), desc='ndArray of all the outputs', **units_kwargs)
 
         # define outputs
-        if units is None:
-            for i in range(0, nElements):
-                self.add_output('output%i' % i, val=0.0, desc='scalar output')
+        if pass_through:
+            self.output_names = ['Output']
+            self.add_output('Output', np.zeros(shape), desc='ndArray of all the outputs', **units_kwargs)
         else:
-            for i in range(0, nElements):
-                self.add_output('output%i' % i, val=0.0, units=units, desc='scalar output')
+            self.output_names = ['output%i' % i for i in range(0, nElements)]
+            for name in self.output_names:
+                self.add_output(name, val=0.0 if element_size == 1 else np.zeros(element_size),
+                                desc='scalar output' if element_size == 1 else 'array output', **units_kwargs)
+
+        # the Jacobian is constant, so build it once
+        self.J = {}
+        if pass_through:
+            self.J['Output', 'Array'] = sparse.identity(size, format='csr')
+        else:
+            for i, name in enumerate(self.output_names):
+                cols = np.arange(i*element_size, (i+1)*element_size)
+                self.J[name, 'Array'] = sparse.csr_matrix((np.ones(element_size), (np.arange(0, element_size), cols)),
+                                                          shape=(element_size, size))
 
     def solve_nonlinear(self, params, unknowns, resids):
 
+        if self.pass_through:
+            unknowns['Output'] = params['Array']
+            return
+
         # assign elements of the input array to outputs
-        for i in range(0, self.nElements):
-            exec("unknowns['output%i'] = params['Array'][%i]" % (i, i))
+        array = params['Array']
+        for i, name in enumerate(self.output_names):
+            unknowns[name] = array[i]
 
     def linearize(self, params, unknowns, resids):
 
-        # initialize gradient calculation array
-        doutput_dArray = np.eye(self.nElements)
-
-        # intialize Jacobian dict
-        J = {}
-
-        # calculate the gradients and populate the Jacobian dict
-        for i in range(0, self.nElements):
-            J['output%i' % i, 'Array'] = np.reshape(doutput_dArray[i, :], (1, self.nElements))
-
-        return J
+        return self.J
 
 
 # ---- if you know wind speed to power and thrust, you can use these tools ----------------
@@ -888,68 +1041,141 @@ class CPCT_Interpolate_Gradients(Component):
         self.unknowns['Cp_out'] = self.unknowns['Cp_out'] * np.cos(self.params['yaw%i' % direction_id]*np.pi/180.0)**pP
         self.unknowns['Ct_out'] = self.unknowns['Ct_out'] * np.cos(self.params['yaw%i' % direction_id]*np.pi/180.0)**2
 
-    def linearize(self, params, unknowns, resids):  # standard central differencing
-        # set step size for finite differencing
-        h = 1e-6
+    def linearize(self, params, unknowns, resids):
+
+        # obtain necessary inputs
         direction_id = self.direction_id
+        pP = params['gen_params:pP']
+        wind_speed = params['gen_params:windSpeedToCPCT_wind_speed']
+        wtVelocity = params['wtVelocity%i' % direction_id]
+
+        yaw = params['yaw%i' % direction_id]*np.pi/180.0
+        cos_yaw = np.cos(yaw)
+        dcos_yaw_dyaw = -np.sin(yaw)*np.pi/180.0
+
+        # axial wind speed and its derivatives
+        wind_speed_ax = cos_yaw**(pP/3.0)*wtVelocity
+        dwind_speed_ax_dwind = cos_yaw**(pP/3.0)
+        dwind_speed_ax_dyaw = (pP/3.0)*cos_yaw**(pP/3.0-1.0)*dcos_yaw_dyaw*wtVelocity
+
+        # the axial wind speed is limited to the given curve, so it has no influence beyond its ends
+        active = (wind_speed_ax > wind_speed[0]) & (wind_speed_ax < wind_speed[-1])
+        wind_speed_ax = np.minimum(np.maximum(wind_speed_ax, wind_speed[0]), wind_speed[-1])
+
+        # interpolate both curves with a single segment search, taking the slope of each segment
+        (CP, CT), (dCP_dws, dCT_dws) = interp_with_slope(wind_speed_ax, wind_speed,
+                                                         np.vstack([params['gen_params:windSpeedToCPCT_CP'],
+                                                                    params['gen_params:windSpeedToCPCT_CT']]))
+        dCP_dws = np.where(active, dCP_dws, 0.0)
+        dCT_dws = np.where(active, dCT_dws, 0.0)
+
+        # chain rule through the yaw correction of the coefficients
+        dCP_dyaw = dCP_dws*dwind_speed_ax_dyaw*cos_yaw**pP + CP*pP*cos_yaw**(pP-1.0)*dcos_yaw_dyaw
+        dCP_dwind = dCP_dws*dwind_speed_ax_dwind*cos_yaw**pP
+        dCT_dyaw = dCT_dws*dwind_speed_ax_dyaw*cos_yaw**2 + CT*2.0*cos_yaw*dcos_yaw_dyaw
+        dCT_dwind = dCT_dws*dwind_speed_ax_dwind*cos_yaw**2
+
+        # compile Jacobian dict from the diagonal sensitivities
+        J = {}
+        J['Cp_out', 'yaw%i' % direction_id] = diagonal_jacobian(dCP_dyaw)
+        J['Cp_out', 'wtVelocity%i' % direction_id] = diagonal_jacobian(dCP_dwind)
+        J['Ct_out', 'yaw%i' % direction_id] = diagonal_jacobian(dCT_dyaw)
+        J['Ct_out', 'wtVelocity%i' % direction_id] = diagonal_jacobian(dCT_dwind)
 
-        # calculate upper and lower function values
-        wind_speed_ax_high_yaw = np.cos((self.params['yaw%i' % direction_id]+h)*np.pi/180.0)**(self.params['gen_params:pP']/3.0)*self.params['wtVelocity%i' % direction_id]
-        wind_speed_ax_low_yaw = np.cos((self.params['yaw%i' % direction_id]-h)*np.pi/180.0)**(self.params['gen_params:pP']/3.0)*self.params['wtVelocity%i' % direction_id]
-        wind_speed_ax_high_wind = np.cos(self.params['yaw%i' % direction_id]*np.pi/180.0)**(self.params['gen_params:pP']/3.0)*(self.params['wtVelocity%i' % direction_id]+h)
-        wind_speed_ax_low_wind = np.cos(self.params['yaw%i' % direction_id]*np.pi/180.0)**(self.params['gen_params:pP']/3.0)*(self.params['wtVelocity%i' % direction_id]-h)
+        return J
 
-        # use interpolation on precalculated CP-CT curve
-        wind_speed_ax_high_yaw = np.maximum(wind_speed_ax_high_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'][0])
-        wind_speed_ax_low_yaw = np.maximum(wind_speed_ax_low_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'][0])
-        wind_speed_ax_high_wind = np.maximum(wind_speed_ax_high_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'][0])
-        wind_speed_ax_low_wind = np.maximum(wind_speed_ax_low_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'][0])
-
-        wind_speed_ax_high_yaw = np.minimum(wind_speed_ax_high_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'][-1])
-        wind_speed_ax_low_yaw = np.minimum(wind_speed_ax_low_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'][-1])
-        wind_speed_ax_high_wind = np.minimum(wind_speed_ax_high_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'][-1])
-        wind_speed_ax_low_wind = np.minimum(wind_speed_ax_low_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'][-1])
-
-        CP_high_yaw = interp(wind_speed_ax_high_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CP'])
-        CP_low_yaw = interp(wind_speed_ax_low_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CP'])
-        CP_high_wind = interp(wind_speed_ax_high_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CP'])
-        CP_low_wind = interp(wind_speed_ax_low_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CP'])
-
-        CT_high_yaw = interp(wind_speed_ax_high_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CT'])
-        CT_low_yaw = interp(wind_speed_ax_low_yaw, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CT'])
-        CT_high_wind = interp(wind_speed_ax_high_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CT'])
-        CT_low_wind = interp(wind_speed_ax_low_wind, self.params['gen_params:windSpeedToCPCT_wind_speed'], self.params['gen_params:windSpeedToCPCT_CT'])
 
-        # normalize on incoming wind speed to correct coefficients for yaw
-        CP_high_yaw = CP_high_yaw * np.cos((self.params['yaw%i' % direction_id]+h)*np.pi/180.0)**self.params['gen_params:pP']
-        CP_low_yaw = CP_low_yaw * np.cos((self.params['yaw%i' % direction_id]-h)*np.pi/180.0)**self.params['gen_params:pP']
-        CP_high_wind = CP_high_wind * np.cos((self.params['yaw%i' % direction_id])*np.pi/180.0)**self.params['gen_params:pP']
-        CP_low_wind = CP_low_wind * np.cos((self.params['yaw%i' % direction_id])*np.pi/180.0)**self.params['gen_params:pP']
-
-        CT_high_yaw = CT_high_yaw * np.cos((self.params['yaw%i' % direction_id]+h)*np.pi/180.0)**2
-        CT_low_yaw = CT_low_yaw * np.cos((self.params['yaw%i' % direction_id]-h)*np.pi/180.0)**2
-        CT_high_wind = CT_high_wind * np.cos((self.params['yaw%i' % direction_id])*np.pi/180.0)**2
-        CT_low_wind = CT_low_wind * np.cos((self.params['yaw%i' % direction_id])*np.pi/180.0)**2
-
-        # compute derivative via central differencing and arrange in sub-matrices of the Jacobian
-        dCP_dyaw = np.eye(self.nTurbines)*(CP_high_yaw-CP_low_yaw)/(2.0*h)
-        dCP_dwind = np.eye(self.nTurbines)*(CP_high_wind-CP_low_wind)/(2.0*h)
-        dCT_dyaw = np.eye(self.nTurbines)*(CT_high_yaw-CT_low_yaw)/(2.0*h)
-        dCT_dwind = np.eye(self.nTurbines)*(CT_high_wind-CT_low_wind)/(2.0*h)
-
-        # compile Jacobian dict from sub-matrices
-        J = {}
-        J['Cp_out', 'yaw%i' % direction_id] = dCP_dyaw
-        J['Cp_out', 'wtVelocity%i' % direction_id] = dCP_dwind
-        J['Ct_out', 'yaw%i' % direction_id] = dCT_dyaw
-        J['Ct_out', 'wtVelocity%i' % direction_id] = dCT_dwind
+# Akima splines fitted to power and thrust curves, shared by every component (and so every direction and rotor solve
+# group) that uses the same curve. Keys are the raw bytes of the curve arrays, so modified curves get a new spline.
+_akima_spline_cache = OrderedDict()
+_akima_spline_cache_size = 64
 
-        return J
+
+def cached_akima_spline(x, y):
+    """ Akima spline through the points (x, y), fitted once per unique curve """
+
+    x = np.ascontiguousarray(x, dtype=float)
+    y = np.ascontiguousarray(y, dtype=float)
+    key = (x.tobytes(), y.tobytes())
+
+    try:
+        spline = _akima_spline_cache.pop(key)
+    except KeyError:
+        spline = Akima(x, y)
+        if len(_akima_spline_cache) >= _akima_spline_cache_size:
+            _akima_spline_cache.popitem(last=False)
+
+    # (re)insert as most recently used
+    _akima_spline_cache[key] = spline
+
+    return spline
+
+
+def add_cpct_curve_params(component, datasize, turbine_type=None):
+    """
+    Adds the gen_params:windSpeedToCPCT_* curve params to a rotor component, unless the curves are taken from
+    turbine_type (a name in the wakeexchange.turbines registry or a TurbineType). Returns the TurbineType or None.
+    """
+
+    if turbine_type is not None:
+        return get_turbine_type(turbine_type)
+
+    component.add_param('gen_params:windSpeedToCPCT_wind_speed', np.zeros(datasize), units='m/s',
+                        desc='range of wind speeds', pass_by_obj=True)
+    component.add_param('gen_params:windSpeedToCPCT_CP', np.zeros(datasize),
+                        desc='power coefficients', pass_by_obj=True)
+    component.add_param('gen_params:windSpeedToCPCT_CT', np.zeros(datasize),
+                        desc='thrust coefficients', pass_by_obj=True)
+
+    return None
+
+
+def cpct_curves(params, turbine_type=None, kind='smooth'):
+    """
+    wind speeds, power coefficients and thrust coefficients of the rotor curves: the shared read-only curves of the
+    given kind of turbine_type if there is one, the gen_params:windSpeedToCPCT_* params otherwise
+    """
+
+    if turbine_type is not None:
+        return turbine_type.cpct_table(kind)
+
+    return params['gen_params:windSpeedToCPCT_wind_speed'], params['gen_params:windSpeedToCPCT_CP'], \
+        params['gen_params:windSpeedToCPCT_CT']
+
+
+def smooth_rotor_coefficients(wtVelocity, yaw, pP, windspeeds, Cp, Ct):
+    """
+    Power and thrust coefficients from Akima splines of the Cp and Ct curves, corrected for yaw (deg), and their
+    derivatives w.r.t. velocity and yaw
+
+    :return Cp_out, Ct_out, dCp_out_dvel, dCt_out_dvel, dCp_out_dyaw, dCt_out_dyaw
+    """
+
+    CP, dCPdvel, _, _ = cached_akima_spline(windspeeds, Cp).interp(wtVelocity)
+    CT, dCTdvel, _, _ = cached_akima_spline(windspeeds, Ct).interp(wtVelocity)
+
+    cos_yaw = np.cos(yaw*np.pi/180.)
+    sin_yaw = np.sin(yaw*np.pi/180.)
+
+    Cp_out = CP*cos_yaw**pP
+    Ct_out = CT*cos_yaw**2.
+
+    dCp_out_dyaw = (-sin_yaw)*(np.pi/180.)*pP*CP*cos_yaw**(pP-1.)
+    dCp_out_dvel = dCPdvel*cos_yaw**pP
+
+    dCt_out_dyaw = (-sin_yaw)*(np.pi/180.)*2.*CT*cos_yaw
+    dCt_out_dvel = dCTdvel*cos_yaw**2.
+
+    return Cp_out, Ct_out, dCp_out_dvel, dCt_out_dvel, dCp_out_dyaw, dCt_out_dyaw
 
 
 class CPCT_Interpolate_Gradients_Smooth(Component):
+    """
+    Power and thrust coefficients from Akima splines of the Cp and Ct curves. The curves are the
+    gen_params:windSpeedToCPCT_* params, or the shared 'smooth' curves of turbine_type if given.
+    """
 
-    def __init__(self, nTurbines, direction_id=0, datasize=0):
+    def __init__(self, nTurbines, direction_id=0, datasize=0, turbine_type=None):
 
         super(CPCT_Interpolate_Gradients_Smooth, self).__init__()
 
@@ -971,12 +1197,7 @@ class CPCT_Interpolate_Gradients_Smooth(Component):
 
         # add variable trees
         self.add_param('gen_params:pP', 3.0, pass_by_obj=True)
-        self.add_param('gen_params:windSpeedToCPCT_wind_speed', np.zeros(datasize), units='m/s',
-                       desc='range of wind speeds', pass_by_obj=True)
-        self.add_param('gen_params:windSpeedToCPCT_CP', np.zeros(datasize),
-                       desc='power coefficients', pass_by_obj=True)
-        self.add_param('gen_params:windSpeedToCPCT_CT', np.zeros(datasize),
-                       desc='thrust coefficients', pass_by_obj=True)
+        self.turbine_type = add_cpct_curve_params(self, datasize, turbine_type)
 
     def solve_nonlinear(self, params, unknowns, resids):
         direction_id = self.direction_id
@@ -985,11 +1206,9 @@ class CPCT_Interpolate_Gradients_Smooth(Component):
         start = 5
         skip = 8
         # Cp = params['gen_params:windSpeedToCPCT_CP'][start::skip]
-        Cp = params['gen_params:windSpeedToCPCT_CP']
         # Ct = params['gen_params:windSpeedToCPCT_CT'][start::skip]
-        Ct = params['gen_params:windSpeedToCPCT_CT']
         # windspeeds = params['gen_params:windSpeedToCPCT_wind_speed'][start::skip]
-        windspeeds = params['gen_params:windSpeedToCPCT_wind_speed']
+        windspeeds, Cp, Ct = cpct_curves(params, self.turbine_type)
         #
         # Cp = np.insert(Cp, 0, Cp[0]/2.0)
         # Cp = np.insert(Cp, 0, 0.0)
@@ -1002,30 +1221,11 @@ class CPCT_Interpolate_Gradients_Smooth(Component):
         # Ct = np.append(Ct, 0.0)
         # windspeeds = np.append(windspeeds, 30.0)
 
-        CPspline = Akima(windspeeds, Cp)
-        CTspline = Akima(windspeeds, Ct)
-
-        # n = 500
-        # x = np.linspace(0.0, 30., n)
-        CP, dCPdvel, _, _ = CPspline.interp(params['wtVelocity%i' % direction_id])
-        CT, dCTdvel, _, _ = CTspline.interp(params['wtVelocity%i' % direction_id])
-
-        # print('in solve_nonlinear', dCPdvel, dCTdvel)
-        # pP = 3.0
-        # print("in rotor, pP = ", pP)
-        Cp_out = CP*np.cos(yaw*np.pi/180.)**pP
-        Ct_out = CT*np.cos(yaw*np.pi/180.)**2.
+        Cp_out, Ct_out, self.dCp_out_dvel, self.dCt_out_dvel, self.dCp_out_dyaw, self.dCt_out_dyaw = \
+            smooth_rotor_coefficients(params['wtVelocity%i' % direction_id], yaw, pP, windspeeds, Cp, Ct)
 
         # print("in rotor, Cp = [%f. %f], Ct = [%f, %f]".format(Cp_out[0], Cp_out[1], Ct_out[0], Ct_out[1]))
 
-        self.dCp_out_dyaw = (-np.sin(yaw*np.pi/180.))*(np.pi/180.)*pP*CP*np.cos(yaw*np.pi/180.)**(pP-1.)
-        self.dCp_out_dvel = dCPdvel*np.cos(yaw*np.pi/180.)**pP
-
-        # print('in solve_nonlinear', self.dCp_out_dyaw, self.dCp_out_dvel)
-
-        self.dCt_out_dyaw = (-np.sin(yaw*np.pi/180.))*(np.pi/180.)*2.*CT*np.cos(yaw*np.pi/180.)
-        self.dCt_out_dvel = dCTdvel*np.cos(yaw*np.pi/180.)**2.
-
         # normalize on incoming wind speed to correct coefficients for yaw
         self.unknowns['Cp_out'] = Cp_out
         self.unknowns['Ct_out'] = Ct_out
@@ -1037,14 +1237,80 @@ class CPCT_Interpolate_Gradients_Smooth(Component):
 
         # compile Jacobian dict
         J = {}
-        J['Cp_out', 'yaw%i' % direction_id] = np.eye(self.nTurbines)*self.dCp_out_dyaw
-        J['Cp_out', 'wtVelocity%i' % direction_id] = np.eye(self.nTurbines)*self.dCp_out_dvel
-        J['Ct_out', 'yaw%i' % direction_id] = np.eye(self.nTurbines)*self.dCt_out_dyaw
-        J['Ct_out', 'wtVelocity%i' % direction_id] = np.eye(self.nTurbines)*self.dCt_out_dvel
+        J['Cp_out', 'yaw%i' % direction_id] = diagonal_jacobian(self.dCp_out_dyaw)
+        J['Cp_out', 'wtVelocity%i' % direction_id] = diagonal_jacobian(self.dCp_out_dvel)
+        J['Ct_out', 'yaw%i' % direction_id] = diagonal_jacobian(self.dCt_out_dyaw)
+        J['Ct_out', 'wtVelocity%i' % direction_id] = diagonal_jacobian(self.dCt_out_dvel)
 
         return J
 
 
+def power_curve_cp(wtVelocity, Cp, cp_points, cp_curve_cp, cp_curve_vel, cp_curve_spline=None, cp_curve_dspline=None):
+    """
+    Power coefficient and its derivative w.r.t. velocity for any array of turbine velocities. The cp curve is
+    interpolated linearly unless a spline (and its derivative spline) is given; without a cp curve (cp_points=1) Cp is
+    returned unchanged with zero derivative.
+    """
+
+    if cp_points > 1.:
+        if cp_curve_spline is None:
+            dv = 1E-6
+            Cp = np.interp(wtVelocity, cp_curve_vel, cp_curve_cp)
+            dCpdV = (np.interp(wtVelocity+dv, cp_curve_vel, cp_curve_cp) -
+                     np.interp(wtVelocity-dv, cp_curve_vel, cp_curve_cp))/(2.*dv)
+        else:
+            if cp_curve_dspline is None:
+                cp_curve_dspline = cp_curve_spline.derivative()
+            Cp = cp_curve_spline(wtVelocity)
+            dCpdV = cp_curve_dspline(wtVelocity)
+    else:
+        Cp = Cp + np.zeros_like(wtVelocity)
+        dCpdV = np.zeros_like(wtVelocity)
+
+    return Cp, dCpdV
+
+
+def turbine_power(wtVelocity, Cp, rotorDiameter, air_density, generatorEfficiency, rated_power, cut_in_speed,
+                  limit_rated_power=True):
+    """ power (kW) of each turbine, capped at rated power and zero below cut-in speed """
+
+    rotorArea = 0.25*np.pi*np.power(rotorDiameter, 2)
+
+    # calculate initial values for wtPower (kW)
+    wtPower = generatorEfficiency*(0.5*air_density*rotorArea*Cp*np.power(wtVelocity, 3))/1000.
+
+    # adjust wt power based on rated power and cut in speed
+    if limit_rated_power:
+        wtPower = np.where(wtPower >= rated_power, rated_power, wtPower)
+    wtPower = np.where(wtVelocity < cut_in_speed, 0.0, wtPower)
+
+    return wtPower
+
+
+def turbine_power_gradients(wtVelocity, Cp, dCpdV, wtPower, rotorDiameter, air_density, generatorEfficiency,
+                            rated_power, cut_in_speed):
+    """
+    Diagonal derivatives of turbine_power (kW) w.r.t. wtVelocity, Cp and rotorDiameter. Turbines at rated power or
+    below cut-in speed have zero gradients.
+    """
+
+    rotorArea = 0.25*np.pi*np.power(rotorDiameter, 2)
+
+    dwtPower_dwtVelocity = 0.5*generatorEfficiency*air_density*rotorArea*\
+                           (3.*Cp*np.power(wtVelocity, 2) + np.power(wtVelocity, 3)*dCpdV)/1000.
+    dwtPower_dCp = generatorEfficiency*(0.5*air_density*rotorArea*np.power(wtVelocity, 3))/1000.
+    dwtPower_drotorDiameter = generatorEfficiency*(0.5*air_density*(0.5*np.pi*rotorDiameter)*Cp *
+                                                   np.power(wtVelocity, 3))/1000.
+
+    # set gradients for turbines above rated power or below cut in speed to zero
+    inactive = (wtPower >= rated_power) | (wtVelocity < cut_in_speed)
+    dwtPower_dwtVelocity = np.where(inactive, 0.0, dwtPower_dwtVelocity)
+    dwtPower_dCp = np.where(inactive, 0.0, dwtPower_dCp)
+    dwtPower_drotorDiameter = np.where(inactive, 0.0, dwtPower_drotorDiameter)
+
+    return dwtPower_dwtVelocity, dwtPower_dCp, dwtPower_drotorDiameter
+
+
 class WindDirectionPower(Component):
 
     def __init__(self, nTurbines, direction_id=0, differentiable=True, use_rotor_components=False, cp_points=1.,
@@ -1060,6 +1326,12 @@ class WindDirectionPower(Component):
         self.cp_points = cp_points
         self.cp_curve_spline = cp_curve_spline
 
+        # the derivative of the cp spline does not change, so it is only constructed once
+        if cp_curve_spline is not None:
+            self.cp_curve_dspline = cp_curve_spline.derivative()
+        else:
+            self.cp_curve_dspline = None
+
         # set finite difference options (only used for testing)
         self.deriv_options['check_form'] = 'central'
         self.deriv_options['check_step_size'] = 1.0e-6
@@ -1094,218 +1366,1469 @@ class WindDirectionPower(Component):
     def solve_nonlinear(self, params, unknowns, resids):
 
         # obtain necessary inputs
-        use_rotor_components = self.use_rotor_components
         direction_id = self.direction_id
-        nTurbines = self.nTurbines
         wtVelocity = self.params['wtVelocity%i' % direction_id]
-        rated_power = params['rated_power']
-        cut_in_speed = params['cut_in_speed']
-        air_density = params['air_density']
-        rotorArea = 0.25*np.pi*np.power(params['rotorDiameter'], 2)
-        Cp = params['Cp']
-        generatorEfficiency = params['generatorEfficiency']
-
-        cp_curve_cp = params['cp_curve_cp']
-        cp_curve_vel = params['cp_curve_vel']
-        # cp_curve_spline = params['cp_curve_spline']
-        cp_curve_spline = self.cp_curve_spline
-
-        if self.cp_points > 1.:
-            # print('entered Cp')
-            if cp_curve_spline is None:
-                for i in np.arange(0, nTurbines):
-                    Cp[i] = np.interp(wtVelocity[i], cp_curve_vel, cp_curve_cp)
-                    # Cp[i] = spl(wtVelocity[i])
-            else:
-                # print('using spline')
-                Cp = cp_curve_spline(wtVelocity)
 
-        # calculate initial values for wtPower (W)
-        wtPower = generatorEfficiency*(0.5*air_density*rotorArea*Cp*np.power(wtVelocity, 3))
+        # get Cp from the cp curve for all turbines at once (without modifying the Cp param)
+        Cp, _ = power_curve_cp(wtVelocity, params['Cp'], self.cp_points, params['cp_curve_cp'],
+                               params['cp_curve_vel'], self.cp_curve_spline, self.cp_curve_dspline)
 
-        # adjust units from W to kW
-        wtPower /= 1000.0
+        # calculate power (kW), adjusted for rated power and cut in speed
+        wtPower = turbine_power(wtVelocity, Cp, params['rotorDiameter'], params['air_density'],
+                                params['generatorEfficiency'], params['rated_power'], params['cut_in_speed'],
+                                limit_rated_power=not self.use_rotor_components)
 
-        # rated_velocity = np.power(1000.*rated_power/(generator_efficiency*(0.5*air_density*rotorArea*Cp)), 1./3.)
-        #
-        # dwt_power_dvelocitiesTurbines = np.eye(nTurbines)*generator_efficiency*(1.5*air_density*rotorArea*Cp *
-        #                                                                         np.power(wtVelocity, 2))
-        # dwt_power_dvelocitiesTurbines /= 1000.
+        # pass out results
+        unknowns['wtPower%i' % direction_id] = wtPower
+        unknowns['dir_power%i' % direction_id] = np.sum(wtPower)
 
-        # adjust wt power based on rated power
-        if not use_rotor_components:
-            for i in range(0, nTurbines):
-                if wtPower[i] >= rated_power[i]:
-                    wtPower[i] = rated_power[i]
+    def linearize(self, params, unknowns, resids):
 
-        for i in range(0, nTurbines):
-            if wtVelocity[i] < cut_in_speed[i]:
-                wtPower[i] = 0.0
-
-
-        # if np.any(rated_velocity+1.) >= np.any(wtVelocity) >= np.any(rated_velocity-1.) and not \
-        #         use_rotor_components:
-        #     for i in range(0, nTurbines):
-        #         if wtVelocity[i] >= rated_velocity[i]+1.:
-        #             spline_start_power = generator_efficiency[i]*(0.5*air_density*rotorArea[i]*Cp[i]*np.power(rated_velocity[i]-1., 3))
-        #             deriv_spline_start_power = 3.*generator_efficiency[i]*(0.5*air_density*rotorArea[i]*Cp[i]*np.power(rated_velocity[i]-1., 2))
-        #             spline_end_power = generator_efficiency[i]*(0.5*air_density*rotorArea[i]*Cp[i]*np.power(rated_velocity[i]+1., 3))
-        #             wtPower[i], deriv = hermite_spline(wtVelocity[i], rated_velocity[i]-1.,
-        #                                                                      rated_velocity[i]+1., spline_start_power,
-        #                                                                      deriv_spline_start_power, spline_end_power, 0.0)
-        #             dwt_power_dvelocitiesTurbines[i][i] = deriv/1000.
-        #
-        # if np.any(wtVelocity) >= np.any(rated_velocity+1.) and not use_rotor_components:
-        #     for i in range(0, nTurbines):
-        #         if wtVelocity[i] >= rated_velocity[i]+1.:
-        #             wtPower = rated_power
-        #             dwt_power_dvelocitiesTurbines[i][i] = 0.0
+        # obtain necessary inputs
+        direction_id = self.direction_id
+        wtVelocity = self.params['wtVelocity%i' % direction_id]
 
+        Cp, dCpdV = power_curve_cp(wtVelocity, params['Cp'], self.cp_points, params['cp_curve_cp'],
+                                   params['cp_curve_vel'], self.cp_curve_spline, self.cp_curve_dspline)
 
+        # calculate gradients (the Jacobian of wtPower is diagonal, so only the diagonals are returned)
+        dwtPower_dwtVelocity, dwtPower_dCp, dwtPower_drotorDiameter = \
+            turbine_power_gradients(wtVelocity, Cp, dCpdV, unknowns['wtPower%i' % direction_id],
+                                    params['rotorDiameter'], params['air_density'], params['generatorEfficiency'],
+                                    params['rated_power'], params['cut_in_speed'])
 
-        # self.dwt_power_dvelocitiesTurbines = dwt_power_dvelocitiesTurbines
+        # with a cp curve, the power does not depend on the Cp input
+        if self.cp_points > 1:
+            dwtPower_dCp = np.zeros_like(dwtPower_dCp)
 
-        # calculate total power for this direction
-        dir_power = np.sum(wtPower)
+        # initialize Jacobian dict
+        J = {}
 
-        # pass out results
-        unknowns['wtPower%i' % direction_id] = wtPower
-        unknowns['dir_power%i' % direction_id] = dir_power
+        # populate Jacobian dict
+        J['wtPower%i' % direction_id, 'wtVelocity%i' % direction_id] = diagonal_jacobian(dwtPower_dwtVelocity)
+        J['wtPower%i' % direction_id, 'Cp'] = diagonal_jacobian(dwtPower_dCp)
+        J['wtPower%i' % direction_id, 'rotorDiameter'] = diagonal_jacobian(dwtPower_drotorDiameter)
 
-        # print(wtPower)
+        J['dir_power%i' % direction_id, 'wtVelocity%i' % direction_id] = np.array([dwtPower_dwtVelocity])
+        J['dir_power%i' % direction_id, 'Cp'] = np.array([dwtPower_dCp])
+        J['dir_power%i' % direction_id, 'rotorDiameter'] = np.array([dwtPower_drotorDiameter])
 
-    def linearize(self, params, unknowns, resids):
+        return J
 
-        # obtain necessary inputs
-        direction_id = self.direction_id
-        use_rotor_components = self.use_rotor_components
-        nTurbines = self.nTurbines
-        wtVelocity = self.params['wtVelocity%i' % direction_id]
-        air_density = params['air_density']
-        rotorDiameter = params['rotorDiameter']
-        rotorArea = 0.25*np.pi*np.power(rotorDiameter, 2)
-        Cp = params['Cp']
-        generatorEfficiency = params['generatorEfficiency']
-        rated_power = params['rated_power']
-        cut_in_speed = params['cut_in_speed']
-        wtPower = unknowns['wtPower%i' % direction_id]
-
-        cp_curve_cp = params['cp_curve_cp']
-        cp_curve_vel = params['cp_curve_vel']
-
-        # cp_curve_spline = params['cp_curve_spline']
-        cp_curve_spline = self.cp_curve_spline
-
-        dCpdV = np.ones_like(Cp)
-
-        if self.cp_points > 1.:
-            # print('entered Cp')
-            if cp_curve_spline is None:
-                # print('using interp')
-                for i in np.arange(0, nTurbines):
-                    Cp[i] = np.interp(wtVelocity[i], cp_curve_vel, cp_curve_cp)
-                    # Cp[i] = spl(wtVelocity[i])
-                    dv = 1E-6
-                    dCpdV[i] = (np.interp(wtVelocity[i]+dv, cp_curve_vel, cp_curve_cp) -
-                             np.interp(wtVelocity[i]- dv, cp_curve_vel, cp_curve_cp))/(2.*dv)
-            else:
-                # print('using spline')
-                # get Cp from the spline
 
-                dCpdV_spline = cp_curve_spline.derivative()
+# ---- batched (all flow cases at once) components ----------------------------------
+class _WrapperComponent(object):
+    """
+    Adapter running one component of a wake model wrapper on plain dicts of values, outside of an OpenMDAO problem.
+    OpenMDAO has no public interface for this, so this is the only place that relies on its private state: the
+    variables declared with add_param and add_output (_init_params_dict and _init_unknowns_dict), the subsystems of
+    the wrapper groups (_subsystems), and the params, unknowns and resids attributes of the component, which are set
+    to the dicts before each call because some components read these instead of their arguments.
+    """
 
-                Cp = np.zeros_like(wtVelocity)
-                dCpdV = np.zeros_like(wtVelocity)
-                for i in np.arange(0, len(wtVelocity)):
-                 Cp[i] = cp_curve_spline(wtVelocity[i])
-                 dCpdV[i] = dCpdV_spline(wtVelocity[i])
+    def __init__(self, comp):
 
-                # get dCp/dV from the spline
+        self.comp = comp
+        self.param_meta = comp._init_params_dict
+        self.unknown_meta = comp._init_unknowns_dict
 
+    @classmethod
+    def leaves(cls, system):
+        """ adapters of the components of a wake model wrapper in the order they are executed """
 
+        if isinstance(system, Component):
+            return [cls(system)]
 
-        # calcuate initial gradient values
-        dwtPower_dwtVelocity = np.eye(nTurbines)*0.5*generatorEfficiency*air_density*rotorArea*\
-                               (3.*Cp*np.power(wtVelocity, 2) + np.power(wtVelocity,3)*dCpdV)
-        dwtPower_dCp = np.eye(nTurbines)*generatorEfficiency*(0.5*air_density*rotorArea*np.power(wtVelocity, 3))
-        dwtPower_drotorDiameter = np.eye(nTurbines)*generatorEfficiency*(0.5*air_density*(0.5*np.pi*rotorDiameter)*Cp *
-                                                                           np.power(wtVelocity, 3))
-        # dwt_power_dvelocitiesTurbines = self.dwt_power_dvelocitiesTurbines
+        components = []
+        for subsystem in system._subsystems.values():
+            components.extend(cls.leaves(subsystem))
 
-        # adjust gradients for unit conversion from W to kW
-        dwtPower_dwtVelocity /= 1000.
-        dwtPower_dCp /= 1000.
-        dwtPower_drotorDiameter /= 1000.
+        return components
 
-        # rated_velocity = np.power(1000.*rated_power/(generator_efficiency*(0.5*air_density*rotorArea*Cp)), 1./3.)
+    def _bind(self, params, unknowns, resids):
 
-        # if np.any(rated_velocity+1.) >= np.any(wtVelocity) >= np.any(rated_velocity-1.) and not \
-        #         use_rotor_components:
-        #
-        #     spline_start_power = generator_efficiency*(0.5*air_density*rotorArea*Cp*np.power(rated_velocity-1., 3))
-        #     deriv_spline_start_power = 3.*generator_efficiency*(0.5*air_density*rotorArea*Cp*np.power(rated_velocity-1., 2))
-        #     spline_end_power = generator_efficiency*(0.5*air_density*rotorArea*Cp*np.power(rated_velocity+1., 3))
-        #     wtPower, dwt_power_dvelocitiesTurbines = hermite_spline(wtVelocity, rated_velocity-1.,
-        #                                                              rated_velocity+1., spline_start_power,
-        #                                                              deriv_spline_start_power, spline_end_power, 0.0)
-
-        # set gradients for turbines above rated power to zero
-        for i in range(0, nTurbines):
-            if wtPower[i] >= rated_power[i]:
-                dwtPower_dwtVelocity[i][i] = 0.0
-                dwtPower_dCp[i][i] = 0.0
-                dwtPower_drotorDiameter[i][i] = 0.0
+        self.comp.params = params
+        self.comp.unknowns = unknowns
+        self.comp.resids = resids
 
-        # set gradients for turbines above rated power to zero
-        for i in range(0, nTurbines):
-            if wtVelocity[i] < cut_in_speed[i]:
-                dwtPower_dwtVelocity[i][i] = 0.0
-                dwtPower_dCp[i][i] = 0.0
-                dwtPower_drotorDiameter[i][i] = 0.0
+    def solve_nonlinear(self, params, unknowns, resids):
 
-        # compile elements of Jacobian
-        ddir_power_dwtVelocity = np.array([np.sum(dwtPower_dwtVelocity, 0)])
-        ddir_power_dCp = np.array([np.sum(dwtPower_dCp, 0)])
-        ddir_power_drotorDiameter = np.array([np.sum(dwtPower_drotorDiameter, 0)])
+        self._bind(params, unknowns, resids)
+        self.comp.solve_nonlinear(params, unknowns, resids)
 
-        # initialize Jacobian dict
-        J = {}
+    def linearize(self, params, unknowns, resids):
+        """ the component's own Jacobian, or a forward difference one if it does not provide derivatives """
 
-        # populate Jacobian dict
-        J['wtPower%i' % direction_id, 'wtVelocity%i' % direction_id] = dwtPower_dwtVelocity
-        J['wtPower%i' % direction_id, 'Cp'] = dwtPower_dCp
-        J['wtPower%i' % direction_id, 'rotorDiameter'] = dwtPower_drotorDiameter
+        self._bind(params, unknowns, resids)
+        if self.comp.deriv_options['type'] == 'user':
+            return self.comp.linearize(params, unknowns, resids)
 
-        J['dir_power%i' % direction_id, 'wtVelocity%i' % direction_id] = ddir_power_dwtVelocity
-        J['dir_power%i' % direction_id, 'Cp'] = ddir_power_dCp
-        J['dir_power%i' % direction_id, 'rotorDiameter'] = ddir_power_drotorDiameter
+        return self._fd_linearize(params, unknowns, resids)
+
+    def _fd_linearize(self, params, unknowns, resids, step=1e-6):
+
+        comp = self.comp
+        base = dict((name, np.copy(value)) for name, value in unknowns.items()
+                    if not self.unknown_meta[name].get('pass_by_obj', False))
+
+        J = {}
+        for name, meta in self.param_meta.items():
+            if meta.get('pass_by_obj', False):
+                continue
+            value = np.array(params[name], dtype=float)
+            for k in range(0, value.size):
+                perturbed = np.copy(value)
+                h = step*max(1., np.abs(perturbed.flat[k]))
+                perturbed.flat[k] += h
+                params[name] = perturbed if value.shape else perturbed[()]
+                comp.solve_nonlinear(params, unknowns, resids)
+                for out in base:
+                    column = (np.array(unknowns[out], dtype=float) - base[out]).flatten()/h
+                    J.setdefault((out, name), np.zeros((base[out].size, value.size)))[:, k] = column
+            params[name] = value if value.shape else value[()]
+
+        # restore the unperturbed state
+        comp.solve_nonlinear(params, unknowns, resids)
 
         return J
 
-#
-# def calculate_boundary(vertices):
-#
-#     # find the points that actually comprise a convex hull
-#     hull = ConvexHull(list(vertices))
-#
-#     # keep only vertices that actually comprise a convex hull and arrange in CCW order
-#     vertices = vertices[hull.vertices]
-#
-#     # get the real number of vertices
-#     nVertices = vertices.shape[0]
-#
-#     # initialize normals array
-#     unit_normals = np.zeros([nVertices, 2])
-#
-#     # determine if point is inside or outside of each face, and distance from each face
-#     for j in range(0, nVertices):
-#
-#         # calculate the unit normal vector of the current face (taking points CCW)
-#         if j < nVertices - 1:  # all but the set of point that close the shape
-#             normal = np.array([vertices[j+1, 1]-vertices[j, 1],
-#                                -(vertices[j+1, 0]-vertices[j, 0])])
-#             unit_normals[j] = normal/np.linalg.norm(normal)
-#         else:   # the set of points that close the shape
+
+def _as_jacobian_block(J, nRows, nCols):
+    """ reshape a (possibly sparse or scalar) Jacobian entry to a dense (nRows, nCols) array """
+
+    if sparse.issparse(J):
+        J = J.toarray()
+
+    return np.reshape(np.array(J, dtype=float), (nRows, nCols))
+
+
+def wake_interaction_pairs(turbineXw, turbineYw, rotorDiameter, wake_spread=0.2, margin=1.):
+    """
+    Sparse list of the turbine pairs that may interact through their wakes, in the wind direction reference frame.
+    The wake of each turbine is assumed to stay within a cone of half angle tangent wake_spread starting at its rotor,
+    widened by margin (in rotor diameters) on all sides. Pairs outside of this cone are assumed not to interact.
+
+    :return upstream, downstream: index arrays of the pairs, where turbine downstream[k] may be in the wake of turbine
+            upstream[k]
+    """
+
+    turbineXw = np.asarray(turbineXw, dtype=float)
+    turbineYw = np.asarray(turbineYw, dtype=float)
+    rotorDiameter = np.zeros_like(turbineXw) + rotorDiameter
+
+    # separation of every turbine (columns) from every possible upstream turbine (rows)
+    dx = turbineXw[np.newaxis, :] - turbineXw[:, np.newaxis]
+    dy = np.abs(turbineYw[np.newaxis, :] - turbineYw[:, np.newaxis])
+    size = np.maximum(rotorDiameter[:, np.newaxis], rotorDiameter[np.newaxis, :])
+
+    width = 0.5*rotorDiameter[:, np.newaxis] + 0.5*rotorDiameter[np.newaxis, :] + wake_spread*np.maximum(dx, 0.) + \
+        margin*size
+    interacting = (dx > -margin*size) & (dy < width)
+    interacting[np.diag_indices_from(interacting)] = False
+
+    upstream, downstream = np.nonzero(interacting)
+
+    return upstream, downstream
+
+
+def wake_interaction_clusters(nTurbines, upstream, downstream):
+    """
+    Splits a wind farm into groups of turbines that do not interact with turbines of any other group, given the pairs
+    from wake_interaction_pairs. Groups are connected through any chain of pairs, so this only separates turbines
+    that are far apart across the wind, e.g. separate wind farms or rows aligned with the wind direction. In a regular
+    grid that is not aligned with the wind the wake cones overlap and the whole farm ends up in one group.
+
+    :return nClusters, labels: number of groups and the group of each turbine
+    """
+
+    graph = sparse.csr_matrix((np.ones(len(upstream)), (upstream, downstream)), shape=(nTurbines, nTurbines))
+
+    return connected_components(graph, directed=True, connection='weak')
+
+
+class WakeModelKernel(object):
+    """
+    Runs a single-direction wake model wrapper (floris_wrapper, gauss_wrapper, jensen_wrapper, ...) outside of an
+    OpenMDAO problem so that a single component can evaluate the wake model for any number of flow cases. The wrapper
+    is built once with direction_id=0 and its components are executed in order on a flat dictionary of values, which
+    matches the promoted names used inside every wrapper. The components are run through _WrapperComponent.
+    """
+
+    def __init__(self, nTurbines, wake_model, wake_model_options=None, direction_id=0):
+
+        self.nTurbines = nTurbines
+        self.direction_id = direction_id
+        self.model = wake_model(nTurbines, direction_id=direction_id, wake_model_options=wake_model_options)
+        self.components = _WrapperComponent.leaves(self.model)
+
+        # outputs of one component feeding another are internal connections of the wrapper
+        self.unknown_meta = OrderedDict()
+        for comp in self.components:
+            self.unknown_meta.update(comp.unknown_meta)
+
+        # everything else has to be provided from outside
+        self.param_meta = OrderedDict()
+        for comp in self.components:
+            for name, meta in comp.param_meta.items():
+                if name not in self.unknown_meta and name not in self.param_meta:
+                    self.param_meta[name] = meta
+
+        # working values for every variable in the wrapper, initialized to the declared defaults
+        self.values = {}
+        for name, meta in list(self.param_meta.items()) + list(self.unknown_meta.items()):
+            self.values[name] = _copy_value(meta['val'])
+
+        self._states = None
+
+    def differentiable_params(self):
+        """ names of the wrapper inputs that derivatives can be taken with respect to """
+
+        return [name for name, meta in self.param_meta.items() if not meta.get('pass_by_obj', False)]
+
+    def size(self, name):
+
+        return np.size(self.values[name])
+
+    def evaluate(self, inputs):
+        """
+        run every component of the wrapper for the given inputs
+
+        :param inputs: dict of wrapper input values, any input not given keeps its previous value
+        :return: dict holding the values of all wrapper variables (owned by the kernel, copy before storing)
+        """
+
+        values = self.values
+        for name, value in inputs.items():
+            values[name] = _copy_value(value)
+
+        states = []
+        for comp in self.components:
+            params = dict((name, values[name]) for name in comp.param_meta)
+            unknowns = dict((name, values[name]) for name in comp.unknown_meta)
+            resids = dict((name, np.zeros_like(values[name]) if isinstance(values[name], np.ndarray) else 0.0)
+                          for name in comp.unknown_meta)
+
+            comp.solve_nonlinear(params, unknowns, resids)
+            values.update(unknowns)
+            states.append((comp, params, unknowns, resids))
+
+        self._states = states
+
+        return values
+
+    def linearize(self, of, wrt):
+        """
+        total derivatives of the wrapper outputs at the last evaluated point, chained through any intermediate
+        variables passed between the wrapper components
+
+        :param of: list of output names
+        :param wrt: list of input names
+        :return: dict of dense Jacobian blocks keyed by (output, input)
+        """
+
+        if self._states is None:
+            raise RuntimeError('WakeModelKernel.evaluate must be called before WakeModelKernel.linearize')
+
+        wrt = set(wrt)
+        derivs = {}
+        for comp, params, unknowns, resids in self._states:
+
+            J = comp.linearize(params, unknowns, resids)
+
+            for (out, param), Jop in J.items():
+                if param not in wrt and param not in derivs:
+                    continue
+                Jop = _as_jacobian_block(Jop, self.size(out), self.size(param))
+                dout = derivs.setdefault(out, {})
+                if param in wrt:
+                    dout[param] = dout.get(param, 0.) + Jop
+                if param in derivs:
+                    for name, dparam in derivs[param].items():
+                        dout[name] = dout.get(name, 0.) + np.dot(Jop, dparam)
+
+        jacobian = {}
+        for out in of:
+            for name in wrt:
+                jacobian[out, name] = derivs.get(out, {}).get(name, np.zeros((self.size(out), self.size(name))))
+
+        return jacobian
+
+
+def _copy_value(value):
+
+    if isinstance(value, np.ndarray):
+        return np.array(value)
+    return value
+
+
+def _same_values(values, params):
+    """ whether params holds the same value as values for each of its names """
+
+    for name, value in values.items():
+        if isinstance(value, np.ndarray):
+            if not np.array_equal(value, params[name]):
+                return False
+        elif value != params[name]:
+            return False
+
+    return True
+
+
+def upstream_levels(turbineXw, turbineYw, rotorDiameter, wake_spread=0.2, margin=1.):
+    """
+    Level of every turbine in the wake interaction graph of wake_interaction_pairs: turbines without any upstream
+    turbine are on level 0 and every other turbine is one level below the lowest of the upstream turbines it may be
+    in the wake of. All turbines of a level only depend on the turbines of the levels above.
+
+    :return levels: level of each turbine
+    """
+
+    turbineXw = np.asarray(turbineXw, dtype=float)
+    upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, rotorDiameter, wake_spread=wake_spread,
+                                                  margin=margin)
+    strictly = turbineXw[upstream] < turbineXw[downstream]
+    upstream = upstream[strictly]
+    downstream = downstream[strictly]
+
+    # visiting turbines from upstream to downstream, their upstream turbines already have their level
+    levels = np.zeros(turbineXw.size, dtype=int)
+    for turbine in np.argsort(turbineXw, kind='mergesort'):
+        sources = upstream[downstream == turbine]
+        if sources.size > 0:
+            levels[turbine] = np.max(levels[sources]) + 1
+
+    return levels
+
+
+class RotorSweepSolve(Component):
+    """
+    Solves the coupling of the rotor curves (as in CPCT_Interpolate_Gradients_Smooth) and a single-direction wake model
+    with an upstream-to-downstream sweep, replacing the iterations of RotorSolveGroup. The velocity of a turbine only
+    depends on the thrust coefficients of the turbines upstream of it, so the turbines are sorted into levels
+    (upstream_levels). The velocities of each level are found from the final thrust coefficients of the levels above,
+    by evaluating the wake model for just the turbines of the level and the turbines they may be in the wake of
+    (wake_interaction_pairs). One evaluation of the whole farm then checks the coupling, and if turbines interact that
+    wake_spread and margin left out, passes over all turbines are repeated until Ct_out changes by less than tolerance
+    (at most maxiter passes).
+
+    The sweep still takes one wake model evaluation per level, but these only cover parts of the farm. For a row of
+    waked turbines along the wind the levels cover 1, 2, ... turbines, so the sweep evaluates about half as many
+    turbines as a single pass of Gauss-Seidel iterations over the whole farm for every level.
+
+    The coupled derivatives come from a single linear solve with I - dV/dCt*dCt/dV, which is unit lower-triangular
+    with the turbines sorted by turbineXw (a dense solve is used if the wake model couples turbines in any other way).
+
+    The number of wake model evaluations of every solve is appended to iteration_history, and the total number of
+    turbines in these evaluations to turbine_history. Wake model kernels for parts of the farm are kept for the
+    kernel_cache_size most recently used sizes. The rotor curves are the gen_params:windSpeedToCPCT_* params, or the
+    shared 'smooth' curves of turbine_type if given.
+    """
+
+    def __init__(self, nTurbines, direction_id=0, datasize=0, wake_model=None, wake_model_options=None,
+                 tolerance=1e-10, maxiter=50, wake_spread=0.2, margin=1., turbine_type=None):
+
+        super(RotorSweepSolve, self).__init__()
+
+        # set finite difference options (fd used for testing only)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-6
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        self.nTurbines = nTurbines
+        self.direction_id = direction_id
+        self.tolerance = tolerance
+        self.maxiter = maxiter
+        self.wake_spread = wake_spread
+        self.margin = margin
+        self.iteration_history = []
+        self.turbine_history = []
+
+        self.wake_model = wake_model
+        self.wake_model_options = wake_model_options
+        kernel = self.kernel = WakeModelKernel(nTurbines, wake_model, wake_model_options, direction_id=direction_id)
+        self.velocity_name = 'wtVelocity%i' % direction_id
+        self.yaw_name = 'yaw%i' % direction_id
+
+        # kernels for parts of the wind farm, by number of turbines, least recently used first
+        self.kernels = OrderedDict()
+        self.kernel_cache_size = 32
+
+        # inputs with one value per turbine, by their declared shape
+        self.per_turbine = [name for name, meta in kernel.param_meta.items()
+                            if np.ndim(meta['val']) == 1 and np.shape(meta['val'])[0] == nTurbines]
+
+        # Ct is solved for here, all other wake model inputs come from outside
+        for name, meta in kernel.param_meta.items():
+            if name == 'Ct':
+                continue
+            kwargs = dict((key, meta[key]) for key in ('units', 'desc', 'pass_by_obj') if key in meta)
+            self.add_param(name, val=_copy_value(meta['val']), **kwargs)
+        if self.yaw_name not in kernel.param_meta:
+            self.add_param(self.yaw_name, np.zeros(nTurbines), desc='yaw error', units='deg')
+
+        self.add_param('gen_params:pP', 3.0, pass_by_obj=True)
+        self.turbine_type = add_cpct_curve_params(self, datasize, turbine_type)
+
+        # outputs are the wrapper variables that no other wrapper component uses
+        used = set()
+        for comp in kernel.components:
+            used.update(comp.param_meta.keys())
+        self.output_names = [name for name in kernel.unknown_meta if name not in used]
+        for name in self.output_names:
+            meta = kernel.unknown_meta[name]
+            kwargs = dict((key, meta[key]) for key in ('units', 'desc') if key in meta)
+            self.add_output(name, val=_copy_value(kernel.values[name]), **kwargs)
+
+        self.add_output('Cp_out', np.zeros(nTurbines))
+        self.add_output('Ct_out', np.zeros(nTurbines))
+
+    def _coefficients(self, params, wtVelocity):
+
+        windspeeds, Cp, Ct = cpct_curves(params, self.turbine_type)
+
+        return smooth_rotor_coefficients(wtVelocity, params[self.yaw_name], params['gen_params:pP'], windspeeds, Cp,
+                                         Ct)
+
+    def _kernel(self, nTurbines):
+        """ wake model kernel for a part of the wind farm with nTurbines turbines """
+
+        if nTurbines == self.nTurbines:
+            return self.kernel
+
+        try:
+            kernel = self.kernels.pop(nTurbines)
+        except KeyError:
+            kernel = WakeModelKernel(nTurbines, self.wake_model, self.wake_model_options,
+                                     direction_id=self.direction_id)
+            if len(self.kernels) >= self.kernel_cache_size:
+                self.kernels.popitem(last=False)
+
+        # (re)insert as most recently used
+        self.kernels[nTurbines] = kernel
+
+        return kernel
+
+    def _evaluate(self, params, Ct, turbines=None):
+        """ wake model outputs for the whole farm, or for only the given turbines (and their Ct) if given """
+
+        inputs = dict((name, params[name]) for name in self.kernel.param_meta if name != 'Ct')
+
+        if turbines is None:
+            inputs['Ct'] = Ct
+            return self.kernel.evaluate(inputs)
+
+        for name in self.per_turbine:
+            if name != 'Ct':
+                inputs[name] = np.asarray(inputs[name])[turbines]
+        inputs['Ct'] = Ct
+
+        return self._kernel(turbines.size).evaluate(inputs)
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        turbineXw = params['turbineXw']
+        upstream, downstream = wake_interaction_pairs(turbineXw, params['turbineYw'], params['rotorDiameter'],
+                                                      wake_spread=self.wake_spread, margin=self.margin)
+        strictly = turbineXw[upstream] < turbineXw[downstream]
+        upstream = upstream[strictly]
+        downstream = downstream[strictly]
+
+        levels = upstream_levels(turbineXw, params['turbineYw'], params['rotorDiameter'],
+                                 wake_spread=self.wake_spread, margin=self.margin)
+
+        # sweep from the upstream to the downstream turbines, the velocities of a level only depend on the final thrust
+        # coefficients of the turbines upstream of it, so only these and the level itself are evaluated
+        nLevels = np.max(levels) + 1
+        evaluated = 0
+        Ct = np.zeros(self.nTurbines)
+        wtVelocity = np.zeros(self.nTurbines)
+        for level in range(0, nLevels):
+            members = np.nonzero(levels == level)[0]
+            sources = np.unique(upstream[np.in1d(downstream, members)])
+            turbines = np.concatenate([sources, members])
+            wtVelocity[members] = self._evaluate(params, Ct[turbines], turbines)[self.velocity_name][sources.size:]
+            Ct[members] = self._coefficients(params, wtVelocity)[1][members]
+            evaluated += turbines.size
+
+        # check the coupling with all thrust coefficients
+        passes = 0
+        while True:
+            values = self._evaluate(params, Ct)
+            passes += 1
+            Ct_out = self._coefficients(params, values[self.velocity_name])[1]
+            if np.max(np.abs(Ct_out - Ct)) <= self.tolerance or passes >= self.maxiter:
+                break
+            Ct = Ct_out
+
+        self.iteration_history.append(nLevels + passes)
+        self.turbine_history.append(evaluated + passes*self.nTurbines)
+        self.Ct = Ct
+
+        for name in self.output_names:
+            unknowns[name] = _copy_value(values[name])
+
+        Cp_out, Ct_out, self.dCp_out_dvel, self.dCt_out_dvel, self.dCp_out_dyaw, self.dCt_out_dyaw = \
+            self._coefficients(params, values[self.velocity_name])
+        unknowns['Cp_out'] = Cp_out
+        unknowns['Ct_out'] = Ct_out
+
+    def linearize(self, params, unknowns, resids):
+
+        nTurbines = self.nTurbines
+        velocity_name = self.velocity_name
+        yaw_name = self.yaw_name
+
+        wrt = [name for name in self.kernel.differentiable_params() if name != 'Ct']
+        self._evaluate(params, self.Ct)
+        Jk = self.kernel.linearize([velocity_name], wrt + ['Ct'])
+        dvel_dCt = Jk[velocity_name, 'Ct']
+
+        # direct derivatives of the velocities, through Ct for yaw
+        rhs = OrderedDict((name, Jk[velocity_name, name]) for name in wrt)
+        rhs[yaw_name] = rhs.get(yaw_name, 0.) + dvel_dCt*self.dCt_out_dyaw[np.newaxis, :]
+
+        coupling = np.eye(nTurbines) - dvel_dCt*self.dCt_out_dvel[np.newaxis, :]
+        sizes = [np.shape(value)[1] for value in rhs.values()]
+        B = np.hstack(list(rhs.values()))
+
+        order = np.argsort(params['turbineXw'], kind='mergesort')
+        sorted_coupling = coupling[order][:, order]
+        if np.all(np.triu(sorted_coupling, 1) == 0.):
+            X = np.zeros_like(B)
+            X[order] = solve_triangular(sorted_coupling, B[order], lower=True, unit_diagonal=True)
+        else:
+            X = np.linalg.solve(coupling, B)
+
+        J = {}
+        start = 0
+        for name, size in zip(rhs.keys(), sizes):
+            dvel = X[:, start:start + size]
+            start += size
+            J[velocity_name, name] = dvel
+            J['Ct_out', name] = self.dCt_out_dvel[:, np.newaxis]*dvel
+            J['Cp_out', name] = self.dCp_out_dvel[:, np.newaxis]*dvel
+            if name == yaw_name:
+                J['Ct_out', name] = J['Ct_out', name] + np.diag(self.dCt_out_dyaw)
+                J['Cp_out', name] = J['Cp_out', name] + np.diag(self.dCp_out_dyaw)
+
+        return J
+
+
+def _repeat_diagonal(values, nDirections, nTurbines):
+    """ sparse Jacobian of an (nDirections, nTurbines) output w.r.t. an nTurbines input applied in every direction """
+
+    rows = np.arange(0, nDirections*nTurbines)
+    cols = np.tile(np.arange(0, nTurbines), nDirections)
+
+    return sparse.csr_matrix((np.ravel(values), (rows, cols)), shape=(nDirections*nTurbines, nTurbines))
+
+
+class BatchedWindFrame(Component):
+    """ Calculates the locations of each turbine in the wind direction reference frame for every wind direction """
+
+    def __init__(self, nTurbines, nDirections, differentiable=True):
+
+        super(BatchedWindFrame, self).__init__()
+
+        # set finite difference options (fd used for testing only)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-5
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        if not differentiable:
+            self.deriv_options['type'] = 'fd'
+            self.deriv_options['form'] = 'forward'
+
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+
+        # flow property variables
+        self.add_param('windDirections', val=np.zeros(nDirections), units='deg',
+                       desc='wind directions using direction from, in deg. cw from north as in meteorological data')
+
+        # Explicitly size input arrays
+        self.add_param('turbineX', val=np.zeros(nTurbines), units='m', desc='x positions of turbines in original ref. frame')
+        self.add_param('turbineY', val=np.zeros(nTurbines), units='m', desc='y positions of turbines in original ref. frame')
+
+        # add output
+        self.add_output('turbineXw', val=np.zeros((nDirections, nTurbines)), units='m',
+                        desc='downwind coordinates of turbines for each direction')
+        self.add_output('turbineYw', val=np.zeros((nDirections, nTurbines)), units='m',
+                        desc='crosswind coordinates of turbines for each direction')
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        # (cached) rotations to the wind direction reference frame of every direction
+        rotations = wind_frame_rotations(params['windDirections'])
+
+        turbineX = params['turbineX'][np.newaxis, :]
+        turbineY = params['turbineY'][np.newaxis, :]
+
+        # convert to downwind(x)-crosswind(y) coordinates
+        unknowns['turbineXw'] = rotations[:, 0, 0:1]*turbineX + rotations[:, 0, 1:2]*turbineY
+        unknowns['turbineYw'] = rotations[:, 1, 0:1]*turbineX + rotations[:, 1, 1:2]*turbineY
+
+    def linearize(self, params, unknowns, resids):
+
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+
+        rotations = wind_frame_rotations(params['windDirections'])
+
+        # initialize Jacobian dict
+        J = {}
+
+        # populate Jacobian dict
+        J[('turbineXw', 'turbineX')] = _repeat_diagonal(np.repeat(rotations[:, 0, 0], nTurbines), nDirections, nTurbines)
+        J[('turbineXw', 'turbineY')] = _repeat_diagonal(np.repeat(rotations[:, 0, 1], nTurbines), nDirections, nTurbines)
+        J[('turbineYw', 'turbineX')] = _repeat_diagonal(np.repeat(rotations[:, 1, 0], nTurbines), nDirections, nTurbines)
+        J[('turbineYw', 'turbineY')] = _repeat_diagonal(np.repeat(rotations[:, 1, 1], nTurbines), nDirections, nTurbines)
+
+        return J
+
+
+class BatchedAdjustCtCpYaw(Component):
+    """ Adjust Cp and Ct to yaw if they are not already adjusted, for every wind direction """
+
+    def __init__(self, nTurbines, nDirections, differentiable=True):
+
+        super(BatchedAdjustCtCpYaw, self).__init__()
+
+        # set finite difference options (fd used for testing only)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-5
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        if not differentiable:
+            self.deriv_options['type'] = 'fd'
+            self.deriv_options['form'] = 'forward'
+
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+
+        # Explicitly size input arrays
+        self.add_param('Ct_in', val=np.zeros(nTurbines), desc='Thrust coefficient for all turbines')
+        self.add_param('Cp_in', val=np.zeros(nTurbines)+(0.7737/0.944) * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2),
+                       desc='power coefficient for all turbines')
+        self.add_param('yaw', val=np.zeros((nDirections, nTurbines)), units='deg',
+                       desc='yaw of each turbine for each direction')
+
+        # Explicitly size output arrays
+        self.add_output('Ct_out', val=np.zeros((nDirections, nTurbines)),
+                        desc='Thrust coefficient for all turbines for each direction')
+        self.add_output('Cp_out', val=np.zeros((nDirections, nTurbines)),
+                        desc='power coefficient for all turbines for each direction')
+
+        # parameters since var trees are not supports
+        self.add_param('gen_params:pP', 1.88, pass_by_obj=True)
+        self.add_param('gen_params:CTcorrected', False,
+                       desc='CT factor already corrected by CCBlade calculation (approximately factor cos(yaw)^2)', pass_by_obj=True)
+        self.add_param('gen_params:CPcorrected', False,
+                       desc='CP factor already corrected by CCBlade calculation (assumed with approximately factor cos(yaw)^3)', pass_by_obj=True)
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        # collect inputs
+        Ct = params['Ct_in'][np.newaxis, :]
+        Cp = params['Cp_in'][np.newaxis, :]
+        yaw = params['yaw'] * np.pi / 180.
+
+        pP = params['gen_params:pP']
+
+        # calculate new CT values, if desired
+        if not params['gen_params:CTcorrected']:
+            unknowns['Ct_out'] = np.cos(yaw)*np.cos(yaw)*Ct
+        else:
+            unknowns['Ct_out'] = np.zeros_like(yaw) + Ct
+
+        # calculate new CP values, if desired
+        if not params['gen_params:CPcorrected']:
+            unknowns['Cp_out'] = Cp * np.cos(yaw) ** pP
+        else:
+            unknowns['Cp_out'] = np.zeros_like(yaw) + Cp
+
+    def linearize(self, params, unknowns, resids):
+
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        nCases = nDirections*nTurbines
+
+        # collect inputs
+        Ct = np.tile(params['Ct_in'], nDirections)
+        Cp = np.tile(params['Cp_in'], nDirections)
+        yaw = np.ravel(params['yaw']) * np.pi / 180.
+
+        pP = params['gen_params:pP']
+
+        # initialize Jacobian dict
+        J = {}
+
+        # calculate gradients and populate Jacobian dict
+        if not params['gen_params:CTcorrected']:
+            J[('Ct_out', 'Ct_in')] = _repeat_diagonal(np.cos(yaw) * np.cos(yaw), nDirections, nTurbines)
+            J[('Ct_out', 'yaw')] = diagonal_jacobian(Ct * (-2. * np.sin(yaw) * np.cos(yaw)) * np.pi / 180.)
+        else:
+            J[('Ct_out', 'Ct_in')] = _repeat_diagonal(np.ones(nCases), nDirections, nTurbines)
+            J[('Ct_out', 'yaw')] = zero_jacobian(nCases, nCases)
+        J[('Ct_out', 'Cp_in')] = zero_jacobian(nCases, nTurbines)
+
+        if not params['gen_params:CPcorrected']:
+            J[('Cp_out', 'Cp_in')] = _repeat_diagonal(np.cos(yaw) ** pP, nDirections, nTurbines)
+            J[('Cp_out', 'yaw')] = diagonal_jacobian(-Cp * pP * np.sin(yaw) * np.cos(yaw) ** (pP - 1.0) * np.pi / 180.)
+        else:
+            J[('Cp_out', 'Cp_in')] = _repeat_diagonal(np.ones(nCases), nDirections, nTurbines)
+            J[('Cp_out', 'yaw')] = zero_jacobian(nCases, nCases)
+        J[('Cp_out', 'Ct_in')] = zero_jacobian(nCases, nTurbines)
+
+        return J
+
+
+class BatchedWakeModel(Component):
+    """
+    Evaluates a single-direction wake model wrapper for every flow case (direction and speed pair) inside one
+    component. Inputs that differ between flow cases are stacked as (nDirections, nTurbines) arrays, all other wake
+    model inputs are shared by every flow case.
+
+    If interaction_options is given (a dict of keyword arguments for wake_interaction_pairs, may be empty), each flow
+    case is split into groups of turbines that cannot influence each other, and the wake model and its Jacobian are
+    only evaluated within each group. Turbines that do not interact with any other turbine are evaluated together.
+    This only saves wake model evaluations for the flow cases where the farm actually splits up (see
+    wake_interaction_clusters), otherwise the whole farm is evaluated at once as without interaction_options. Wake
+    model kernels for groups of other sizes are kept for the kernel_cache_size most recently used group sizes.
+    """
+
+    # wrapper inputs that change from one flow case to the next, and the name of the stacked input
+    case_params = OrderedDict([('turbineXw', 'turbineXw'), ('turbineYw', 'turbineYw'), ('Ct', 'Ct'),
+                               ('yaw%i', 'yaw'), ('wind_speed', 'windSpeeds'), ('wind_direction', 'windDirections')])
+
+    def __init__(self, nTurbines, nDirections, wake_model, wake_model_options=None, differentiable=True,
+                 interaction_options=None):
+
+        super(BatchedWakeModel, self).__init__()
+
+        # set finite difference options (fd used for testing only)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-6
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        if not differentiable:
+            self.deriv_options['type'] = 'fd'
+            self.deriv_options['form'] = 'forward'
+
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+        self.wake_model = wake_model
+        self.wake_model_options = wake_model_options
+        self.interaction_options = interaction_options
+
+        kernel = self.kernel = WakeModelKernel(nTurbines, wake_model, wake_model_options)
+        self.velocity_name = 'wtVelocity%i' % kernel.direction_id
+
+        # kernels for groups of turbines smaller than the wind farm, by number of turbines, least recently used first
+        self.kernels = OrderedDict()
+        self.kernel_cache_size = 8
+
+        # map the wrapper inputs that change between flow cases to the stacked inputs of this component
+        self.case_map = OrderedDict()
+        for name, stacked_name in self.case_params.items():
+            if '%i' in name:
+                name = name % kernel.direction_id
+            if name in kernel.param_meta:
+                self.case_map[name] = stacked_name
+
+        # inputs with one value per turbine, by their declared shape
+        self.per_turbine = [name for name, meta in kernel.param_meta.items()
+                            if np.ndim(meta['val']) == 1 and np.shape(meta['val'])[0] == nTurbines]
+
+        # flow case inputs are stacked along a leading axis, scalars become one value per flow case
+        for name, stacked_name in self.case_map.items():
+            meta = kernel.param_meta[name]
+            shape = (nDirections,) + np.shape(meta['val'])
+            kwargs = dict((key, meta[key]) for key in ('units',) if key in meta)
+            self.add_param(stacked_name, val=np.zeros(shape), desc='%s for every flow case' % name, **kwargs)
+
+        # wake model inputs shared by every flow case
+        for name, meta in kernel.param_meta.items():
+            if name in self.case_map:
+                continue
+            kwargs = dict((key, meta[key]) for key in ('units', 'desc', 'pass_by_obj') if key in meta)
+            self.add_param(name, val=_copy_value(meta['val']), **kwargs)
+
+        self.add_output('wtVelocity', val=np.zeros((nDirections, nTurbines)), units='m/s',
+                        desc='effective hub velocity for each turbine in each flow case')
+
+        # inputs and Jacobian of the last linearize, which are returned again if the inputs have not changed
+        self._linearized = None
+
+    def _kernel(self, nTurbines):
+        """ wake model kernel for a group of nTurbines turbines, and the names of its inputs with one value per turbine """
+
+        if nTurbines == self.nTurbines:
+            return self.kernel, self.per_turbine
+
+        try:
+            kernel = self.kernels.pop(nTurbines)
+        except KeyError:
+            kernel = WakeModelKernel(nTurbines, self.wake_model, self.wake_model_options)
+            if len(self.kernels) >= self.kernel_cache_size:
+                self.kernels.popitem(last=False)
+
+        # (re)insert as most recently used
+        self.kernels[nTurbines] = kernel
+
+        return kernel, self.per_turbine
+
+    def _groups(self, params, direction):
+        """ index arrays of the groups of turbines that are evaluated separately in the given flow case """
+
+        if self.interaction_options is None:
+            return [np.arange(0, self.nTurbines)]
+
+        turbineXw = params['turbineXw'][direction]
+        turbineYw = params['turbineYw'][direction]
+        rotorDiameter = params['rotorDiameter'] if 'rotorDiameter' in params else 0.
+
+        upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, rotorDiameter, **self.interaction_options)
+        nClusters, labels = wake_interaction_clusters(self.nTurbines, upstream, downstream)
+
+        groups = []
+        isolated = []
+        for cluster in range(0, nClusters):
+            turbines = np.nonzero(labels == cluster)[0]
+            if turbines.size == 1:
+                isolated.append(turbines[0])
+            else:
+                groups.append(turbines)
+        if len(isolated) > 0:
+            groups.append(np.array(isolated))
+
+        return groups
+
+    def _case_inputs(self, params, direction, turbines=None, per_turbine=()):
+
+        inputs = dict((name, params[name]) for name in self.kernel.param_meta if name not in self.case_map)
+        for name, stacked_name in self.case_map.items():
+            inputs[name] = params[stacked_name][direction]
+
+        if turbines is not None:
+            for name in per_turbine:
+                inputs[name] = np.asarray(inputs[name])[turbines]
+
+        return inputs
+
+    def _columns(self, name, direction, turbines, per_turbine):
+        """ columns of a group's wake model input in this component's (stacked) input """
+
+        if name in self.case_map and name in per_turbine:
+            return direction*self.nTurbines + turbines
+        elif name in self.case_map:
+            return np.array([direction])
+        elif name in per_turbine:
+            return turbines
+        return np.arange(0, self.kernel.size(name))
+
+    def _evaluate(self, params, linearize=False):
+        """
+        turbine velocities of every flow case and, if linearize is set, the Jacobian of the velocities, which is
+        assembled in the same pass over the flow cases (each wake model evaluation is followed by its linearization)
+        """
+
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        velocity_name = self.velocity_name
+
+        wrt = [name for name in self.kernel.differentiable_params() if name != 'wind_direction']
+
+        # sparse (row, column, value) entries of the Jacobian w.r.t. each input
+        entries = dict((name, ([], [], [])) for name in wrt)
+
+        wtVelocity = np.zeros((nDirections, nTurbines))
+        for direction in range(0, nDirections):
+            for turbines in self._groups(params, direction):
+                kernel, per_turbine = self._kernel(turbines.size)
+                values = kernel.evaluate(self._case_inputs(params, direction, turbines, per_turbine))
+                wtVelocity[direction, turbines] = values[velocity_name]
+
+                if not linearize:
+                    continue
+
+                Jd = kernel.linearize([velocity_name], wrt)
+
+                rows = direction*nTurbines + turbines
+                for name in wrt:
+                    block = Jd[velocity_name, name]
+
+                    columns = self._columns(name, direction, turbines, per_turbine)
+
+                    block_rows, block_columns = np.nonzero(block)
+                    entries[name][0].append(rows[block_rows])
+                    entries[name][1].append(columns[block_columns])
+                    entries[name][2].append(block[block_rows, block_columns])
+
+        if not linearize:
+            return wtVelocity, None
+
+        # initialize Jacobian dict
+        J = {}
+
+        # flow case inputs only influence their own flow case, shared inputs influence all of them
+        for name in wrt:
+            if name in self.case_map:
+                shape = (nDirections*nTurbines, np.size(params[self.case_map[name]]))
+            else:
+                shape = (nDirections*nTurbines, self.kernel.size(name))
+            row, column, value = [np.concatenate(part) for part in entries[name]]
+            block = sparse.csr_matrix((value, (row, column)), shape=shape)
+            if name in self.case_map:
+                J['wtVelocity', self.case_map[name]] = block
+            else:
+                J['wtVelocity', name] = block
+
+        return wtVelocity, J
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        unknowns['wtVelocity'] = self._evaluate(params)[0]
+
+    def linearize(self, params, unknowns, resids):
+
+        # reuse the Jacobian of the last linearize if it was evaluated at the same inputs
+        if self._linearized is not None and _same_values(self._linearized[0], params):
+            J = self._linearized[1]
+        else:
+            J = self._evaluate(params, linearize=True)[1]
+            inputs = dict((name, _copy_value(params[name])) for name in params.keys())
+            self._linearized = (inputs, J)
+
+        # callers may add their own blocks to the returned dict
+        return dict(J)
+
+
+class BatchedSpeedBinWakeModel(BatchedWakeModel):
+    """
+    BatchedWakeModel that also provides the turbine velocities in nSpeeds speed bins for every direction
+    (wtVelocityBins). The thrust coefficient of each turbine in a bin is its thrust coefficient at the reference speed
+    windSpeeds, scaled by the thrust curve gen_params:windSpeedToCPCT_CT between the two free stream speeds. Where
+    this changes Ct by no more than ct_tolerance (relative), the normalized wake deficits are those at the reference
+    speed and the velocities are rescaled. The wake model is only evaluated again for the other bins.
+    """
+
+    def __init__(self, nTurbines, nDirections, nSpeeds, wake_model, wake_model_options=None, differentiable=True,
+                 interaction_options=None, datasize=0, ct_tolerance=1e-3):
+
+        super(BatchedSpeedBinWakeModel, self).__init__(nTurbines, nDirections, wake_model,
+                                                       wake_model_options=wake_model_options,
+                                                       differentiable=differentiable,
+                                                       interaction_options=interaction_options)
+
+        if 'wind_speed' not in self.case_map or 'Ct' not in self.case_map:
+            raise ValueError('the wake model must take wind_speed and Ct inputs to be evaluated per speed bin')
+        if datasize < 2:
+            raise ValueError('the thrust curve gen_params:windSpeedToCPCT_CT is needed to evaluate the speed bins, '
+                             'datasize must be at least 2 (got %i)' % datasize)
+
+        self.nSpeeds = nSpeeds
+        self.ct_tolerance = ct_tolerance
+
+        self.add_param('windSpeedBins', np.zeros(nSpeeds), units='m/s', desc='wind speed of each speed bin',
+                       pass_by_obj=True)
+        self.add_param('gen_params:windSpeedToCPCT_wind_speed', np.zeros(datasize), units='m/s',
+                       desc='range of wind speeds', pass_by_obj=True)
+        self.add_param('gen_params:windSpeedToCPCT_CT', np.zeros(datasize), desc='thrust coefficients',
+                       pass_by_obj=True)
+
+        self.add_output('wtVelocityBins', val=np.zeros((nDirections, nSpeeds, nTurbines)), units='m/s',
+                        desc='effective hub velocity for each turbine in each speed bin of each direction')
+
+    def _ct_ratios(self, params, direction):
+        """
+        ratio of the thrust coefficients in each speed bin to those at the reference speed, its derivative w.r.t.
+        the reference speed, and which bins need a new wake model evaluation
+        """
+
+        wind_speed = params['gen_params:windSpeedToCPCT_wind_speed']
+        ct = params['gen_params:windSpeedToCPCT_CT']
+
+        ct_bins = np.interp(params['windSpeedBins'], wind_speed, ct)
+        ct_reference, dct_reference = interp_with_slope(params['windSpeeds'][direction], wind_speed, ct)
+
+        ratio = ct_bins/ct_reference
+        dratio_dreference = -ct_bins*dct_reference/ct_reference**2
+
+        return ratio, dratio_dreference, np.abs(ratio - 1.) > self.ct_tolerance
+
+    def _bin_inputs(self, params, direction, speed, ratio):
+
+        inputs = self._case_inputs(params, direction)
+        inputs['wind_speed'] = params['windSpeedBins'][speed]
+        inputs['Ct'] = inputs['Ct']*ratio
+
+        return inputs
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        super(BatchedSpeedBinWakeModel, self).solve_nonlinear(params, unknowns, resids)
+
+        scale = params['windSpeedBins'][np.newaxis, :]/params['windSpeeds'][:, np.newaxis]
+        wtVelocityBins = unknowns['wtVelocity'][:, np.newaxis, :]*scale[:, :, np.newaxis]
+
+        for direction in range(0, self.nDirections):
+            ratio, _, full = self._ct_ratios(params, direction)
+            for speed in np.nonzero(full)[0]:
+                values = self.kernel.evaluate(self._bin_inputs(params, direction, speed, ratio[speed]))
+                wtVelocityBins[direction, speed] = values[self.velocity_name]
+
+        unknowns['wtVelocityBins'] = wtVelocityBins
+
+    def linearize(self, params, unknowns, resids):
+
+        J = super(BatchedSpeedBinWakeModel, self).linearize(params, unknowns, resids)
+
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        nSpeeds = self.nSpeeds
+        nRows = nDirections*nSpeeds*nTurbines
+        kernel = self.kernel
+        velocity_name = self.velocity_name
+        windSpeeds = params['windSpeeds']
+        windSpeedBins = params['windSpeedBins']
+
+        wrt = [name for name in kernel.differentiable_params() if name != 'wind_direction']
+        all_turbines = np.arange(0, nTurbines)
+        per_turbine = self.per_turbine
+
+        # rescaled bins follow the derivatives at the reference speed, new evaluations are collected as sparse entries
+        scale = windSpeedBins[np.newaxis, :]/windSpeeds[:, np.newaxis]
+        rescaled = np.ones((nDirections, nSpeeds))
+        entries = dict((name, ([], [], [])) for name in wrt)
+        speed_entries = ([], [], [])
+
+        for direction in range(0, nDirections):
+            ratio, dratio_dreference, full = self._ct_ratios(params, direction)
+            rescaled[direction, full] = 0.
+
+            for speed in np.nonzero(full)[0]:
+                inputs = self._bin_inputs(params, direction, speed, ratio[speed])
+                kernel.evaluate(inputs)
+                Jd = kernel.linearize([velocity_name], wrt)
+                rows = (direction*nSpeeds + speed)*nTurbines + all_turbines
+
+                for name in wrt:
+                    block = Jd[velocity_name, name]
+                    if name == 'Ct':
+                        # the reference speed changes the bin's Ct through the thrust curve ratio
+                        dreference = np.dot(block, inputs['Ct'])*dratio_dreference[speed]/ratio[speed]
+                        speed_entries[0].append(rows)
+                        speed_entries[1].append(np.zeros(nTurbines, dtype=int) + direction)
+                        speed_entries[2].append(dreference)
+                        block = block*ratio[speed]
+                    elif name == 'wind_speed':
+                        # the bin speed itself does not depend on any input
+                        continue
+
+                    block_rows, block_columns = np.nonzero(block)
+                    columns = self._columns(name, direction, all_turbines, per_turbine)
+                    entries[name][0].append(rows[block_rows])
+                    entries[name][1].append(columns[block_columns])
+                    entries[name][2].append(block[block_rows, block_columns])
+
+        # maps every turbine velocity at the reference speed to its rescaled velocity in each bin
+        factors = scale*rescaled
+        rows = np.arange(0, nRows)
+        columns = np.ravel(np.arange(0, nDirections*nTurbines).reshape(nDirections, 1, nTurbines) +
+                           np.zeros((1, nSpeeds, 1), dtype=int))
+        rescale = sparse.csr_matrix((np.ravel(factors[:, :, np.newaxis] + np.zeros(nTurbines)), (rows, columns)),
+                                    shape=(nRows, nDirections*nTurbines))
+
+        for name in wrt:
+            stacked_name = self.case_map.get(name, name)
+            if ('wtVelocity', stacked_name) in J:
+                block = sparse.csr_matrix(rescale.dot(sparse.csr_matrix(J['wtVelocity', stacked_name])))
+            else:
+                block = sparse.csr_matrix((nRows, np.size(params[stacked_name])))
+
+            if len(entries[name][0]) > 0:
+                row, column, value = [np.concatenate(part) for part in entries[name]]
+                block = block + sparse.csr_matrix((value, (row, column)), shape=block.shape)
+
+            J['wtVelocityBins', stacked_name] = block
+
+        # the rescaling factor itself depends on the reference speed
+        dbins_dreference = -unknowns['wtVelocity'][:, np.newaxis, :]*(factors/windSpeeds[:, np.newaxis])[:, :, np.newaxis]
+        row = np.concatenate([rows] + speed_entries[0])
+        column = np.concatenate([np.repeat(np.arange(0, nDirections), nSpeeds*nTurbines)] + speed_entries[1])
+        value = np.concatenate([np.ravel(dbins_dreference)] + speed_entries[2])
+        block = sparse.csr_matrix((value, (row, column)), shape=(nRows, nDirections))
+        if ('wtVelocityBins', 'windSpeeds') in J:
+            block = block + J['wtVelocityBins', 'windSpeeds']
+        J['wtVelocityBins', 'windSpeeds'] = block
+
+        return J
+
+
+class BatchedWindDirectionPower(Component):
+    """ Calculates the power of every turbine and the total wind farm power for every wind direction """
+
+    def __init__(self, nTurbines, nDirections, differentiable=True, cp_points=1, cp_curve_spline=None):
+
+        super(BatchedWindDirectionPower, self).__init__()
+
+        # define class attributes
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+        self.cp_points = cp_points
+        self.cp_curve_spline = cp_curve_spline
+
+        if cp_curve_spline is not None:
+            self.cp_curve_dspline = cp_curve_spline.derivative()
+        else:
+            self.cp_curve_dspline = None
+
+        # set finite difference options (only used for testing)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-6
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        if not differentiable:
+            self.deriv_options['type'] = 'fd'
+            self.deriv_options['form'] = 'forward'
+
+        self.add_param('air_density', 1.1716, units='kg/(m*m*m)', desc='air density in free stream')
+        self.add_param('rotorDiameter', np.zeros(nTurbines) + 126.4, units='m', desc='rotor diameters of all turbine')
+        self.add_param('Cp', np.zeros((nDirections, nTurbines))+(0.7737/0.944) * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2),
+                       desc='power coefficient for all turbines in each direction')
+        self.add_param('generatorEfficiency', np.zeros(nTurbines)+0.944, desc='generator efficiency of all turbines')
+        self.add_param('wtVelocity', np.zeros((nDirections, nTurbines)), units='m/s',
+                       desc='effective hub velocity for each turbine in each direction')
+
+        self.add_param('rated_power', np.ones(nTurbines)*5000., units='kW',
+                       desc='rated power for each turbine', pass_by_obj=True)
+        self.add_param('cut_in_speed', np.ones(nTurbines) * 3.0, units='m/s',
+                       desc='cut-in speed for each turbine', pass_by_obj=True)
+        self.add_param('cp_curve_cp', np.zeros(cp_points),
+                       desc='cp as a function of wind speed', pass_by_obj=True)
+        self.add_param('cp_curve_vel', np.ones(cp_points), units='m/s',
+                       desc='vel corresponding to cp curve points', pass_by_obj=True)
+
+        # outputs
+        self.add_output('wtPower', np.zeros((nDirections, nTurbines)), units='kW',
+                        desc='power output of each turbine in each direction')
+        self.add_output('dirPowers', np.zeros(nDirections), units='kW',
+                        desc='total power output of the wind farm in each direction')
+
+    def _cp(self, params):
+        """ power coefficient and its derivative w.r.t. velocity for every turbine in every direction """
+
+        return power_curve_cp(params['wtVelocity'], params['Cp'], self.cp_points, params['cp_curve_cp'],
+                              params['cp_curve_vel'], self.cp_curve_spline, self.cp_curve_dspline)
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        Cp, _ = self._cp(params)
+
+        # calculate power (kW), adjusted for rated power and cut in speed
+        wtPower = turbine_power(params['wtVelocity'], Cp, params['rotorDiameter'], params['air_density'],
+                                params['generatorEfficiency'], params['rated_power'], params['cut_in_speed'])
+
+        # pass out results
+        unknowns['wtPower'] = wtPower
+        unknowns['dirPowers'] = np.sum(wtPower, 1)
+
+    def linearize(self, params, unknowns, resids):
+
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        nCases = nTurbines*nDirections
+
+        Cp, dCpdV = self._cp(params)
+
+        # calculate gradients (kW)
+        dwtPower_dwtVelocity, dwtPower_dCp, dwtPower_drotorDiameter = \
+            turbine_power_gradients(params['wtVelocity'], Cp, dCpdV, unknowns['wtPower'], params['rotorDiameter'],
+                                    params['air_density'], params['generatorEfficiency'], params['rated_power'],
+                                    params['cut_in_speed'])
+
+        # with a cp curve, the power does not depend on the Cp input
+        if self.cp_points > 1:
+            dwtPower_dCp = np.zeros_like(dwtPower_dCp)
+
+        # every direction's total power depends only on the turbines in that direction
+        rows = np.repeat(np.arange(0, nDirections), nTurbines)
+        cols = np.arange(0, nCases)
+
+        # initialize Jacobian dict
+        J = {}
+
+        # populate Jacobian dict
+        J['wtPower', 'wtVelocity'] = diagonal_jacobian(dwtPower_dwtVelocity)
+        J['wtPower', 'Cp'] = diagonal_jacobian(dwtPower_dCp)
+        J['wtPower', 'rotorDiameter'] = _repeat_diagonal(dwtPower_drotorDiameter, nDirections, nTurbines)
+
+        J['dirPowers', 'wtVelocity'] = sparse.csr_matrix((np.ravel(dwtPower_dwtVelocity), (rows, cols)),
+                                                         shape=(nDirections, nCases))
+        J['dirPowers', 'Cp'] = sparse.csr_matrix((np.ravel(dwtPower_dCp), (rows, cols)), shape=(nDirections, nCases))
+        J['dirPowers', 'rotorDiameter'] = dwtPower_drotorDiameter
+
+        return J
+
+
+class WindRoseAEP(Component):
+    """
+    Estimates the AEP from a wind rose with nSpeeds speed bins in every direction, using the turbine velocities found
+    for a single reference speed (windSpeeds) in each direction. For a constant thrust coefficient the wake velocity
+    deficits scale with the free stream speed, so the turbine velocities in speed bin j of direction i are taken as
+    wtVelocity[i]*windSpeedBins[j]/windSpeeds[i] and only the power is evaluated for every speed bin.
+
+    The frequency of every (direction, speed) bin is either given as a table windRoseFrequencies
+    (distribution='table'), or found from a Weibull distribution per direction (distribution='weibull') with shape
+    weibull_k, scale weibull_A and direction frequencies windFrequencies.
+
+    With binned_velocities=True the turbine velocities of every bin are given directly as wtVelocityBins, e.g. by
+    BatchedSpeedBinWakeModel for thrust coefficients that change with wind speed.
+    """
+
+    def __init__(self, nTurbines, nDirections, nSpeeds, distribution='table', cp_points=1, cp_curve_spline=None,
+                 rec_func_calls=False, binned_velocities=False):
+
+        super(WindRoseAEP, self).__init__()
+
+        if distribution not in ['table', 'weibull']:
+            raise ValueError('distribution must be one of ["table", "weibull"]')
+
+        # define class attributes
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+        self.nSpeeds = nSpeeds
+        self.distribution = distribution
+        self.binned_velocities = binned_velocities
+        self.cp_points = cp_points
+        self.cp_curve_spline = cp_curve_spline
+        self.rec_func_calls = rec_func_calls
+
+        if cp_curve_spline is not None:
+            self.cp_curve_dspline = cp_curve_spline.derivative()
+        else:
+            self.cp_curve_dspline = None
+
+        # set finite difference options (only used for testing)
+        self.deriv_options['check_form'] = 'central'
+        self.deriv_options['check_step_size'] = 1.0e-6
+        self.deriv_options['check_step_calc'] = 'relative'
+
+        if binned_velocities:
+            self.add_param('wtVelocityBins', np.zeros((nDirections, nSpeeds, nTurbines)), units='m/s',
+                           desc='effective hub velocity for each turbine in each speed bin of each direction')
+        else:
+            self.add_param('wtVelocity', np.zeros((nDirections, nTurbines)), units='m/s',
+                           desc='effective hub velocity for each turbine in each direction at the reference wind '
+                                'speed')
+            self.add_param('windSpeeds', np.zeros(nDirections), units='m/s',
+                           desc='reference wind speed of each direction, at which wtVelocity was found')
+        self.add_param('windSpeedBins', np.zeros(nSpeeds), units='m/s', desc='wind speed of each speed bin',
+                       pass_by_obj=True)
+        if distribution == 'table':
+            self.add_param('windRoseFrequencies', np.zeros((nDirections, nSpeeds)),
+                           desc='frequency of each (direction, speed) bin')
+        else:
+            self.add_param('windFrequencies', np.zeros(nDirections), desc='frequency of each direction')
+            self.add_param('weibull_k', np.ones(nDirections)*2., desc='Weibull shape parameter of each direction',
+                           pass_by_obj=True)
+            self.add_param('weibull_A', np.ones(nDirections)*8., units='m/s',
+                           desc='Weibull scale parameter of each direction', pass_by_obj=True)
+
+        self.add_param('air_density', 1.1716, units='kg/(m*m*m)', desc='air density in free stream')
+        self.add_param('rotorDiameter', np.zeros(nTurbines) + 126.4, units='m', desc='rotor diameters of all turbine')
+        self.add_param('Cp', np.zeros((nDirections, nTurbines))+(0.7737/0.944) * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2),
+                       desc='power coefficient for all turbines in each direction')
+        self.add_param('generatorEfficiency', np.zeros(nTurbines)+0.944, desc='generator efficiency of all turbines')
+        self.add_param('rated_power', np.ones(nTurbines)*5000., units='kW',
+                       desc='rated power for each turbine', pass_by_obj=True)
+        self.add_param('cut_in_speed', np.ones(nTurbines) * 3.0, units='m/s',
+                       desc='cut-in speed for each turbine', pass_by_obj=True)
+        self.add_param('cp_curve_cp', np.zeros(cp_points),
+                       desc='cp as a function of wind speed', pass_by_obj=True)
+        self.add_param('cp_curve_vel', np.ones(cp_points), units='m/s',
+                       desc='vel corresponding to cp curve points', pass_by_obj=True)
+        self.add_param('gen_params:AEP_method', val='none', pass_by_object=True,
+                       desc='select method with which aep is adjusted for optimization')
+
+        # outputs
+        self.add_output('binPowers', np.zeros((nDirections, nSpeeds)), units='kW',
+                        desc='total power output of the wind farm in each (direction, speed) bin')
+        self.add_output('AEP', val=0.0, units='kWh', desc='total annual energy output of wind farm')
+
+    def _bin_frequencies(self, params):
+
+        if self.distribution == 'table':
+            return params['windRoseFrequencies']
+
+        return weibull_bin_frequencies(params['windSpeedBins'], params['weibull_k'], params['weibull_A'],
+                                       params['windFrequencies'])
+
+    def _bin_velocities(self, params):
+        """ speed bin to reference speed ratio (nDirections, nSpeeds) and turbine velocities (nDirections, nSpeeds,
+        nTurbines) """
+
+        if self.binned_velocities:
+            return np.ones((self.nDirections, self.nSpeeds)), params['wtVelocityBins']
+
+        scale = params['windSpeedBins'][np.newaxis, :]/params['windSpeeds'][:, np.newaxis]
+        velocity = params['wtVelocity'][:, np.newaxis, :]*scale[:, :, np.newaxis]
+
+        return scale, velocity
+
+    def _cp(self, params, velocity):
+
+        return power_curve_cp(velocity, params['Cp'][:, np.newaxis, :], self.cp_points, params['cp_curve_cp'],
+                              params['cp_curve_vel'], self.cp_curve_spline, self.cp_curve_dspline)
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        AEP_method = params['gen_params:AEP_method']
+
+        # number of hours in a year
+        hours = 8760.0
+
+        _, velocity = self._bin_velocities(params)
+        Cp, _ = self._cp(params, velocity)
+
+        wtPower = turbine_power(velocity, Cp, params['rotorDiameter'], params['air_density'],
+                                params['generatorEfficiency'], params['rated_power'], params['cut_in_speed'])
+        binPowers = np.sum(wtPower, 2)
+
+        AEP = np.sum(binPowers*self._bin_frequencies(params))*hours
+
+        unknowns['binPowers'] = binPowers
+        if AEP_method == 'none':
+            unknowns['AEP'] = AEP
+        elif AEP_method == 'log':
+            unknowns['AEP'] = np.log(AEP)
+        elif AEP_method == 'inverse':
+            unknowns['AEP'] = (AEP)**(-1)
+        else:
+            raise ValueError('AEP_method must be one of ["none","log","inverse"]')
+
+        # increase objective function call count
+        if self.rec_func_calls:
+            comm = self.comm
+            rank = comm.rank
+            config.obj_func_calls_array[rank] += 1
+
+    def linearize(self, params, unknowns, resids):
+
+        AEP_method = params['gen_params:AEP_method']
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        nSpeeds = self.nSpeeds
+
+        # number of hours in a year
+        hours = 8760.0
+
+        scale, velocity = self._bin_velocities(params)
+        Cp, dCpdV = self._cp(params, velocity)
+
+        wtPower = turbine_power(velocity, Cp, params['rotorDiameter'], params['air_density'],
+                                params['generatorEfficiency'], params['rated_power'], params['cut_in_speed'])
+        dwtPower_dwtVelocity, dwtPower_dCp, dwtPower_drotorDiameter = \
+            turbine_power_gradients(velocity, Cp, dCpdV, wtPower, params['rotorDiameter'], params['air_density'],
+                                    params['generatorEfficiency'], params['rated_power'], params['cut_in_speed'])
+
+        # with a cp curve, the power does not depend on the Cp input
+        if self.cp_points > 1:
+            dwtPower_dCp = np.zeros_like(dwtPower_dCp)
+
+        frequencies = self._bin_frequencies(params)
+        binPowers = np.sum(wtPower, 2)
+        AEP = np.sum(binPowers*frequencies)*hours
+
+        # derivative of the output w.r.t. the AEP
+        if AEP_method == 'none':
+            dout_dAEP = 1.
+        elif AEP_method == 'log':
+            dout_dAEP = 1./AEP
+        elif AEP_method == 'inverse':
+            dout_dAEP = -1./AEP**2
+        else:
+            raise ValueError('AEP_method must be one of ["none","log","inverse"]')
+
+        dout_dbinPowers = dout_dAEP*hours*frequencies
+
+        rows = np.repeat(np.arange(0, nDirections*nSpeeds), nTurbines)
+        cols = np.ravel(np.arange(0, nDirections*nTurbines).reshape(nDirections, 1, nTurbines) +
+                        np.zeros((1, nSpeeds, 1), dtype=int))
+        direction_cols = np.repeat(np.arange(0, nDirections), nSpeeds)
+
+        # initialize Jacobian dict
+        J = {}
+
+        if self.binned_velocities:
+            J['binPowers', 'wtVelocityBins'] = sparse.csr_matrix((np.ravel(dwtPower_dwtVelocity),
+                                                                  (rows, np.arange(0, rows.size))),
+                                                                 shape=(nDirections*nSpeeds, rows.size))
+            J['AEP', 'wtVelocityBins'] = np.reshape(dout_dbinPowers[:, :, np.newaxis]*dwtPower_dwtVelocity,
+                                                    (1, rows.size))
+        else:
+            # the power of each bin only depends on the turbines and reference speed of its own direction
+            dbinPowers_dwtVelocity = dwtPower_dwtVelocity*scale[:, :, np.newaxis]
+            dbinPowers_dwindSpeeds = -np.sum(dwtPower_dwtVelocity*velocity, 2)/params['windSpeeds'][:, np.newaxis]
+
+            J['binPowers', 'wtVelocity'] = sparse.csr_matrix((np.ravel(dbinPowers_dwtVelocity), (rows, cols)),
+                                                             shape=(nDirections*nSpeeds, nDirections*nTurbines))
+            J['binPowers', 'windSpeeds'] = sparse.csr_matrix((np.ravel(dbinPowers_dwindSpeeds),
+                                                              (np.arange(0, nDirections*nSpeeds), direction_cols)),
+                                                             shape=(nDirections*nSpeeds, nDirections))
+            J['AEP', 'wtVelocity'] = np.reshape(np.sum(dout_dbinPowers[:, :, np.newaxis]*dbinPowers_dwtVelocity, 1),
+                                                (1, nDirections*nTurbines))
+            J['AEP', 'windSpeeds'] = np.reshape(np.sum(dout_dbinPowers*dbinPowers_dwindSpeeds, 1), (1, nDirections))
+
+        J['binPowers', 'Cp'] = sparse.csr_matrix((np.ravel(dwtPower_dCp), (rows, cols)),
+                                                 shape=(nDirections*nSpeeds, nDirections*nTurbines))
+        J['binPowers', 'rotorDiameter'] = np.reshape(dwtPower_drotorDiameter, (nDirections*nSpeeds, nTurbines))
+
+        J['AEP', 'Cp'] = np.reshape(np.sum(dout_dbinPowers[:, :, np.newaxis]*dwtPower_dCp, 1),
+                                    (1, nDirections*nTurbines))
+        J['AEP', 'rotorDiameter'] = np.reshape(np.sum(dout_dbinPowers[:, :, np.newaxis]*dwtPower_drotorDiameter,
+                                                      (0, 1)), (1, nTurbines))
+
+        if self.distribution == 'table':
+            J['AEP', 'windRoseFrequencies'] = np.reshape(dout_dAEP*hours*binPowers, (1, nDirections*nSpeeds))
+        else:
+            probabilities = weibull_bin_frequencies(params['windSpeedBins'], params['weibull_k'], params['weibull_A'])
+            J['AEP', 'windFrequencies'] = np.reshape(dout_dAEP*hours*np.sum(binPowers*probabilities, 1),
+                                                     (1, nDirections))
+
+        # increase gradient function call count
+        if self.rec_func_calls:
+            comm = self.comm
+            rank = comm.rank
+            config.sens_func_calls_array[rank] += 1
+
+        return J
+
+#
+# def calculate_boundary(vertices):
+#
+#     # find the points that actually comprise a convex hull
+#     hull = ConvexHull(list(vertices))
+#
+#     # keep only vertices that actually comprise a convex hull and arrange in CCW order
+#     vertices = vertices[hull.vertices]
+#
+#     # get the real number of vertices
+#     nVertices = vertices.shape[0]
+#
+#     # initialize normals array
+#     unit_normals = np.zeros([nVertices, 2])
+#
+#     # determine if point is inside or outside of each face, and distance from each face
+#     for j in range(0, nVertices):
+#
+#         # calculate the unit normal vector of the current face (taking points CCW)
+#         if j < nVertices - 1:  # all but the set of point that close the shape
+#             normal = np.array([vertices[j+1, 1]-vertices[j, 1],
+#                                -(vertices[j+1, 0]-vertices[j, 0])])
+#             unit_normals[j] = normal/np.linalg.norm(normal)
+#         else:   # the set of points that close the shape
 #             normal = np.array([vertices[0, 1]-vertices[j, 1],
 #                                -(vertices[0, 0]-vertices[j, 0])])
 #             unit_normals[j] = normal/np.linalg.norm(normal)
@@ -1419,54 +2942,19 @@ def calculate_distance(points, vertices, unit_normals, return_bool=False):
     :return [inside]: (optional) an array of zeros and ones where 1.0 means the corresponding point is inside the hull
     """
 
-    # print points.shape, vertices.shape, unit_normals.shape
-
-    nPoints = points.shape[0]
-    nVertices = vertices.shape[0]
+    # the distance from point i to face j is ((v_j - p_i) . n_j)(n_j . n_j), which splits into a per-face constant
+    # and a single (nPoints x 2) by (2 x nVertices) product
+    scaled_normals = unit_normals*np.sum(unit_normals**2, 1)[:, np.newaxis]
+    face_offsets = np.sum(vertices*scaled_normals, 1)
 
-    # initialize array to hold distances from each point to each face
-    face_distance = np.zeros([nPoints, nVertices])
+    face_distance = face_offsets[np.newaxis, :] - np.dot(points, scaled_normals.T)
 
     if not return_bool:
-        # loop through points and find distance to each face
-        for i in range(0, nPoints):
-
-            # determine if point is inside or outside of each face, and distance from each face
-            for j in range(0, nVertices):
-
-                # define the vector from the point of interest to the first point of the face
-                pa = np.array([vertices[j, 0]-points[i, 0], vertices[j, 1]-points[i, 1]])
-
-                # find perpendicular distance from point to current surface (vector projection)
-                d_vec = np.vdot(pa, unit_normals[j])*unit_normals[j]
-
-                # calculate the sign of perpendicular distance from point to current face (+ is inside, - is outside)
-                face_distance[i, j] = np.vdot(d_vec, unit_normals[j])
-
         return face_distance
 
     else:
-        # initialize array to hold boolean indicating whether a point is inside the hull or not
-        inside = np.zeros(nPoints)
-
-        # loop through points and find distance to each face
-        for i in range(0, nPoints):
-
-            # determine if point is inside or outside of each face, and distance from each face
-            for j in range(0, nVertices):
-
-                # define the vector from the point of interest to the first point of the face
-                pa = np.array([vertices[j, 0]-points[i, 0], vertices[j, 1]-points[i, 1]])
-
-                # find perpendicular distance from point to current surface (vector projection)
-                d_vec = np.vdot(pa, unit_normals[j])*unit_normals[j]
-
-                # calculate the sign of perpendicular distance from point to current face (+ is inside, - is outside)
-                face_distance[i, j] = np.vdot(d_vec, unit_normals[j])
-
-            # check if the point is inside the convex hull by checking the sign of the distance
-            if np.all(face_distance[i] >= 0):
-                inside[i] = 1.0
+        # check if each point is inside the convex hull by checking the sign of the distance
+        inside = np.all(face_distance >= 0, 1).astype(float)
 
         return face_distance, inside
 
@@ -1482,9 +2970,7 @@ if __name__ == "__main__":
     print(turbineX.size)
 
     nTurbines = len(turbineX)
-    locations = np.zeros([nTurbines, 2])
-    for i in range(0, nTurbines):
-        locations[i] = np.array([turbineX[i], turbineY[i]])
+    locations = np.column_stack([turbineX, turbineY])
 
     # get boundary information
     vertices, unit_normals = calculate_boundary(locations)
@@ -1499,9 +2985,7 @@ if __name__ == "__main__":
     xx = xx.flatten()
     yy = yy.flatten()
     nPoints = len(xx)
-    p = np.zeros([nPoints, 2])
-    for i in range(0, nPoints):
-        p[i] = np.array([xx[i], yy[i]])
+    p = np.column_stack([xx, yy])
 
     # calculate distance from each point to each face
     face_distance, inside = calculate_distance(p, vertices, unit_normals, return_bool=True)
@@ -1,6 +1,6 @@
 import numpy as np
 
-from openmdao.api import Group, IndepVarComp, ParallelGroup, ScipyGMRES, NLGaussSeidel
+from openmdao.api import Group, IndepVarComp, ParallelGroup, ScipyGMRES
 
 from openmdao.core.mpi_wrap import MPI
 if MPI:
@@ -8,19 +8,35 @@ if MPI:
 
 from wakeexchange.floris import floris_wrapper, add_floris_params_IndepVarComps
 from wakeexchange.gauss import add_gauss_params_IndepVarComps
+from wakeexchange.parallel import schedule_imbalance
+from wakeexchange.solvers import AcceleratedNLGaussSeidel
+from wakeexchange.turbines import get_turbine_type
 
 
 
 from GeneralWindFarmComponents import WindFrame, AdjustCtCpYaw, MUX, WindFarmAEP, DeMUX, \
     CPCT_Interpolate_Gradients_Smooth, WindDirectionPower, add_gen_params_IdepVarComps, \
-    CPCT_Interpolate_Gradients
+    CPCT_Interpolate_Gradients, BatchedWindFrame, BatchedAdjustCtCpYaw, BatchedWakeModel, BatchedWindDirectionPower, \
+    WindRoseAEP, BatchedSpeedBinWakeModel, RotorSweepSolve
 
 
 class RotorSolveGroup(Group):
+    """
+    Couples the rotor (Ct/Cp) and wake model components of a single direction. The coupling is solved with an
+    AcceleratedNLGaussSeidel, configured by rotor_solver_options (a dict of its options, e.g. {'aitken': True,
+    'warm_start': True, 'maxiter': 50}).
+
+    With rotor_solver='sweep' the coupling is solved by a single RotorSweepSolve component instead, level by level
+    from upstream to downstream with wake model evaluations of parts of the farm, and rotor_solver_options are its
+    keyword arguments (tolerance, maxiter, wake_spread, margin).
+
+    If turbine_type (see wakeexchange.turbines) is given, the rotor curves are the shared curves of that turbine type
+    instead of the gen_params:windSpeedToCPCT_* params.
+    """
 
     def __init__(self, nTurbines, direction_id=0, datasize=0, differentiable=True,
                  use_rotor_components=False, nSamples=0, wake_model=floris_wrapper,
-                 wake_model_options=None):
+                 wake_model_options=None, rotor_solver='gauss-seidel', rotor_solver_options=None, turbine_type=None):
 
         super(RotorSolveGroup, self).__init__()
 
@@ -28,6 +44,29 @@ class RotorSolveGroup(Group):
             wake_model_options = {'differentiable': differentiable, 'use_rotor_components': use_rotor_components,
                              'nSamples': nSamples}
 
+        wake_model_promotes = (['model_params:*', 'wind_speed', 'axialInduction',
+                                'turbineXw', 'turbineYw', 'rotorDiameter', 'yaw%i' % direction_id, 'hubHeight',
+                                'wtVelocity%i' % direction_id]
+                               if (nSamples == 0) else
+                               ['model_params:*', 'wind_speed', 'axialInduction',
+                                'turbineXw', 'turbineYw', 'rotorDiameter', 'yaw%i' % direction_id, 'hubHeight',
+                                'wtVelocity%i' % direction_id, 'wsPositionX', 'wsPositionY', 'wsPositionZ',
+                                'wsArray%i' % direction_id])
+
+        # wake models that rotate to the wind frame themselves take the original coordinates and wind direction
+        wake_model_promotes += list(getattr(wake_model, 'original_frame_params', []))
+
+        if rotor_solver == 'sweep':
+            # no coupling left between subsystems, the default solvers run it once
+            self.add('sweep', RotorSweepSolve(nTurbines, direction_id=direction_id, datasize=datasize,
+                                              wake_model=wake_model, wake_model_options=wake_model_options,
+                                              turbine_type=turbine_type,
+                                              **(rotor_solver_options or {})),
+                     promotes=wake_model_promotes + ['gen_params:*', 'Cp_out'])
+            return
+        elif rotor_solver != 'gauss-seidel':
+            raise ValueError('rotor_solver must be one of ["gauss-seidel", "sweep"]')
+
         from openmdao.core.mpi_wrap import MPI
 
         # set up iterative solvers
@@ -36,23 +75,19 @@ class RotorSolveGroup(Group):
             self.ln_solver = PetscKSP()
         else:
             self.ln_solver = ScipyGMRES()
-        self.nl_solver = NLGaussSeidel()
+        self.nl_solver = AcceleratedNLGaussSeidel()
         self.ln_solver.options['atol'] = epsilon
+        for name, value in (rotor_solver_options or {}).items():
+            self.nl_solver.options[name] = value
 
-        self.add('CtCp', CPCT_Interpolate_Gradients_Smooth(nTurbines, direction_id=direction_id, datasize=datasize),
+        self.add('CtCp', CPCT_Interpolate_Gradients_Smooth(nTurbines, direction_id=direction_id, datasize=datasize,
+                                                           turbine_type=turbine_type),
                  promotes=['gen_params:*', 'yaw%i' % direction_id,
                            'wtVelocity%i' % direction_id, 'Cp_out'])
 
         # TODO refactor the model component instance
         self.add('floris', wake_model(nTurbines, direction_id=direction_id, wake_model_options=wake_model_options),
-                 promotes=(['model_params:*', 'wind_speed', 'axialInduction',
-                            'turbineXw', 'turbineYw', 'rotorDiameter', 'yaw%i' % direction_id, 'hubHeight',
-                            'wtVelocity%i' % direction_id]
-                           if (nSamples == 0) else
-                           ['model_params:*', 'wind_speed', 'axialInduction',
-                            'turbineXw', 'turbineYw', 'rotorDiameter', 'yaw%i' % direction_id, 'hubHeight',
-                            'wtVelocity%i' % direction_id, 'wsPositionX', 'wsPositionY', 'wsPositionZ',
-                            'wsArray%i' % direction_id]))
+                 promotes=wake_model_promotes)
         self.connect('CtCp.Ct_out', 'floris.Ct')
 
 
@@ -65,7 +100,7 @@ class DirectionGroup(Group):
     def __init__(self, nTurbines, direction_id=0, use_rotor_components=False, datasize=0,
                  differentiable=True, add_IdepVarComps=True, params_IdepVar_func=add_floris_params_IndepVarComps,
                  params_IndepVar_args=None, nSamples=0, wake_model=floris_wrapper, wake_model_options=None, cp_points=1,
-                 cp_curve_spline=None):
+                 cp_curve_spline=None, rotor_solver='gauss-seidel', rotor_solver_options=None, turbine_type=None):
 
         super(DirectionGroup, self).__init__()
 
@@ -81,11 +116,17 @@ class DirectionGroup(Group):
         self.add('directionConversion', WindFrame(nTurbines, differentiable=differentiable, nSamples=nSamples),
                  promotes=['*'])
 
+        # wake models that rotate to the wind frame themselves take the original coordinates and wind direction
+        original_frame_params = list(getattr(wake_model, 'original_frame_params', []))
+
         if use_rotor_components:
             self.add('rotorGroup', RotorSolveGroup(nTurbines, direction_id=direction_id,
                                                  datasize=datasize, differentiable=differentiable,
                                                  nSamples=nSamples, use_rotor_components=use_rotor_components,
-                                                 wake_model=wake_model, wake_model_options=wake_model_options),
+                                                 wake_model=wake_model, wake_model_options=wake_model_options,
+                                                 rotor_solver=rotor_solver,
+                                                 rotor_solver_options=rotor_solver_options,
+                                                 turbine_type=turbine_type),
                      promotes=(['gen_params:*', 'yaw%i' % direction_id, 'wtVelocity%i' % direction_id,
                                 'model_params:*', 'wind_speed', 'axialInduction',
                                 'turbineXw', 'turbineYw', 'rotorDiameter', 'hubHeight']
@@ -93,7 +134,7 @@ class DirectionGroup(Group):
                                ['gen_params:*', 'yaw%i' % direction_id, 'wtVelocity%i' % direction_id,
                                 'model_params:*', 'wind_speed', 'axialInduction',
                                 'turbineXw', 'turbineYw', 'rotorDiameter', 'hubHeight', 'wsPositionX', 'wsPositionY', 'wsPositionZ',
-                                'wsArray%i' % direction_id]))
+                                'wsArray%i' % direction_id]) + original_frame_params)
         else:
             self.add('CtCp', AdjustCtCpYaw(nTurbines, direction_id, differentiable),
                      promotes=['Ct_in', 'Cp_in', 'gen_params:*', 'yaw%i' % direction_id])
@@ -106,7 +147,7 @@ class DirectionGroup(Group):
                                ['model_params:*', 'wind_speed', 'axialInduction',
                                 'turbineXw', 'turbineYw', 'rotorDiameter', 'yaw%i' % direction_id, 'hubHeight',
                                 'wtVelocity%i' % direction_id, 'wsPositionXw', 'wsPositionYw', 'wsPositionZ',
-                                'wsArray%i' % direction_id]))
+                                'wsArray%i' % direction_id]) + original_frame_params)
 
         self.add('powerComp', WindDirectionPower(nTurbines=nTurbines, direction_id=direction_id, differentiable=True,
                                                  use_rotor_components=use_rotor_components, cp_points=cp_points,
@@ -126,15 +167,43 @@ class DirectionGroup(Group):
 class AEPGroup(Group):
     """
     Group containing all necessary components for wind plant AEP calculations using the FLORIS model
+
+    The direction groups are subsystems of a ParallelGroup, which gives each MPI rank a contiguous share of its
+    subsystems. direction_chunks (a list of lists of direction ids, e.g. from wakeexchange.parallel.lpt_schedule with
+    one chunk per rank) groups the directions into one subsystem per chunk instead, so that the ranks get balanced
+    sets of directions. chunk_imbalance gives the resulting imbalance for given direction costs.
+
+    With use_rotor_components, rotor_solver and rotor_solver_options are passed to the RotorSolveGroup of every
+    direction (see wakeexchange.solvers.AcceleratedNLGaussSeidel and RotorSweepSolve for the options, and
+    wakeexchange.solvers.rotor_iteration_counts for the iteration counts of either).
+
+    turbine_type (a name registered in wakeexchange.turbines, e.g. 'NREL5MW') sets the default hub height, rotor
+    diameter, air density, rated power and cut-in speed, and with use_rotor_components every direction uses the shared
+    rotor curves of the turbine type instead of its own copy of the gen_params:windSpeedToCPCT_* curves.
     """
 
     def __init__(self, nTurbines, nDirections=1, use_rotor_components=False, datasize=0,
                  differentiable=True, optimizingLayout=False, nSamples=0, wake_model=floris_wrapper,
                  wake_model_options=None, params_IdepVar_func=add_floris_params_IndepVarComps,
-                 params_IndepVar_args=None, cp_points=1, cp_curve_spline=None, rec_func_calls=False):
+                 params_IndepVar_args=None, cp_points=1, cp_curve_spline=None, rec_func_calls=False,
+                 direction_chunks=None, rotor_solver='gauss-seidel', rotor_solver_options=None, turbine_type=None):
 
         super(AEPGroup, self).__init__()
 
+        # turbine properties default to those of the turbine type, if there is one
+        hubHeight = np.zeros(nTurbines)
+        rotorDiameter = np.zeros(nTurbines)
+        air_density = 1.1716
+        rated_power = np.ones(nTurbines)*5000.
+        cut_in_speed = np.zeros(nTurbines)
+        if turbine_type is not None:
+            turbine_type = get_turbine_type(turbine_type)
+            hubHeight += turbine_type.hub_height
+            rotorDiameter += turbine_type.rotor_diameter
+            air_density = turbine_type.air_density
+            rated_power = np.ones(nTurbines)*turbine_type.rated_power
+            cut_in_speed += turbine_type.cut_in_speed
+
         if wake_model_options is None:
             wake_model_options = {'differentiable': differentiable, 'use_rotor_components': use_rotor_components,
                              'nSamples': nSamples, 'verbose': False}
@@ -150,14 +219,14 @@ class AEPGroup(Group):
         self.add('dv2', IndepVarComp('windFrequencies', np.ones(nDirections)), promotes=['*'])
         self.add('dv3', IndepVarComp('turbineX', np.zeros(nTurbines), units='m'), promotes=['*'])
         self.add('dv4', IndepVarComp('turbineY', np.zeros(nTurbines), units='m'), promotes=['*'])
-        self.add('dv4p5', IndepVarComp('hubHeight', np.zeros(nTurbines), units='m'), promotes=['*'])
+        self.add('dv4p5', IndepVarComp('hubHeight', hubHeight, units='m'), promotes=['*'])
 
         # add vars to be seen by MPI and gradient calculations
-        self.add('dv5', IndepVarComp('rotorDiameter', np.zeros(nTurbines), units='m'), promotes=['*'])
+        self.add('dv5', IndepVarComp('rotorDiameter', rotorDiameter, units='m'), promotes=['*'])
         self.add('dv6', IndepVarComp('axialInduction', np.zeros(nTurbines)), promotes=['*'])
         self.add('dv7', IndepVarComp('generatorEfficiency', np.zeros(nTurbines)), promotes=['*'])
-        self.add('dv8', IndepVarComp('air_density', val=1.1716, units='kg/(m*m*m)'), promotes=['*'])
-        self.add('dv9', IndepVarComp('rated_power', np.ones(nTurbines)*5000., units='kW',
+        self.add('dv8', IndepVarComp('air_density', val=air_density, units='kg/(m*m*m)'), promotes=['*'])
+        self.add('dv9', IndepVarComp('rated_power', rated_power, units='kW',
                        desc='rated power for each turbine', pass_by_obj=True), promotes=['*'])
         if not use_rotor_components:
             self.add('dv10', IndepVarComp('Ct_in', np.zeros(nTurbines)), promotes=['*'])
@@ -167,7 +236,7 @@ class AEPGroup(Group):
                                                desc='cp curve cp data', pass_by_obj=True), promotes=['*'])
         self.add('dv13', IndepVarComp('cp_curve_vel', np.zeros(datasize), units='m/s',
                                                desc='cp curve velocity data', pass_by_obj=True), promotes=['*'])
-        self.add('dv14', IndepVarComp('cut_in_speed', np.zeros(nTurbines), units='m/s',
+        self.add('dv14', IndepVarComp('cut_in_speed', cut_in_speed, units='m/s',
                                                desc='cut-in speed of wind turbines', pass_by_obj=True), promotes=['*'])
 
 
@@ -193,44 +262,64 @@ class AEPGroup(Group):
         #     direction_group = Group()
 
         pg = self.add('all_directions', ParallelGroup(), promotes=['*'])
+
+        self.direction_chunks = direction_chunks
+
+        # the group each direction group is added to, and its path from here
+        parents = dict((direction_id, pg) for direction_id in range(0, nDirections))
+        paths = dict((direction_id, 'direction_group%i' % direction_id) for direction_id in range(0, nDirections))
+        if direction_chunks is not None:
+            if sorted(np.concatenate([np.asarray(chunk, dtype=int) for chunk in direction_chunks])) != \
+                    list(range(0, nDirections)):
+                raise ValueError('direction_chunks must contain every direction id exactly once')
+            for chunk_id, chunk in enumerate(direction_chunks):
+                group = pg.add('direction_chunk%i' % chunk_id, Group(), promotes=['*'])
+                for direction_id in chunk:
+                    parents[direction_id] = group
+                    paths[direction_id] = 'direction_chunk%i.direction_group%i' % (chunk_id, direction_id)
+
         if use_rotor_components:
             for direction_id in np.arange(0, nDirections):
                 # print('assigning direction group %i'.format(direction_id))
-                pg.add('direction_group%i' % direction_id,
-                       DirectionGroup(nTurbines=nTurbines, direction_id=direction_id,
-                                      use_rotor_components=use_rotor_components, datasize=datasize,
-                                      differentiable=differentiable, add_IdepVarComps=False, nSamples=nSamples,
-                                      wake_model=wake_model, wake_model_options=wake_model_options, cp_points=cp_points),
-                       promotes=(['gen_params:*', 'model_params:*', 'air_density',
-                                  'axialInduction', 'generatorEfficiency', 'turbineX', 'turbineY', 'hubHeight',
-                                  'yaw%i' % direction_id, 'rotorDiameter', 'rated_power', 'wtVelocity%i' % direction_id,
-                                  'wtPower%i' % direction_id, 'dir_power%i' % direction_id]
-                                 if (nSamples == 0) else
-                                 ['gen_params:*', 'model_params:*', 'air_density',
-                                  'axialInduction', 'generatorEfficiency', 'turbineX', 'turbineY', 'hubHeight',
-                                  'yaw%i' % direction_id, 'rotorDiameter', 'rated_power', 'wsPositionX', 'wsPositionY',
-                                  'wsPositionZ', 'wtVelocity%i' % direction_id,
-                                  'wtPower%i' % direction_id, 'dir_power%i' % direction_id, 'wsArray%i' % direction_id]))
+                parents[direction_id].add(
+                    'direction_group%i' % direction_id,
+                    DirectionGroup(nTurbines=nTurbines, direction_id=direction_id,
+                                   use_rotor_components=use_rotor_components, datasize=datasize,
+                                   differentiable=differentiable, add_IdepVarComps=False, nSamples=nSamples,
+                                   wake_model=wake_model, wake_model_options=wake_model_options, cp_points=cp_points,
+                                   rotor_solver=rotor_solver, rotor_solver_options=rotor_solver_options,
+                                   turbine_type=turbine_type),
+                    promotes=(['gen_params:*', 'model_params:*', 'air_density',
+                               'axialInduction', 'generatorEfficiency', 'turbineX', 'turbineY', 'hubHeight',
+                               'yaw%i' % direction_id, 'rotorDiameter', 'rated_power', 'wtVelocity%i' % direction_id,
+                               'wtPower%i' % direction_id, 'dir_power%i' % direction_id]
+                              if (nSamples == 0) else
+                              ['gen_params:*', 'model_params:*', 'air_density',
+                               'axialInduction', 'generatorEfficiency', 'turbineX', 'turbineY', 'hubHeight',
+                               'yaw%i' % direction_id, 'rotorDiameter', 'rated_power', 'wsPositionX', 'wsPositionY',
+                               'wsPositionZ', 'wtVelocity%i' % direction_id,
+                               'wtPower%i' % direction_id, 'dir_power%i' % direction_id, 'wsArray%i' % direction_id]))
         else:
             for direction_id in np.arange(0, nDirections):
                 # print('assigning direction group %i'.format(direction_id))
-                pg.add('direction_group%i' % direction_id,
-                       DirectionGroup(nTurbines=nTurbines, direction_id=direction_id,
-                                      use_rotor_components=use_rotor_components, datasize=datasize,
-                                      differentiable=differentiable, add_IdepVarComps=False, nSamples=nSamples,
-                                      wake_model=wake_model, wake_model_options=wake_model_options, cp_points=cp_points,
-                                      cp_curve_spline=cp_curve_spline),
-                       promotes=(['Ct_in', 'Cp_in', 'gen_params:*', 'model_params:*', 'air_density', 'axialInduction',
-                                  'generatorEfficiency', 'turbineX', 'turbineY', 'yaw%i' % direction_id, 'rotorDiameter',
-                                  'hubHeight', 'rated_power', 'wtVelocity%i' % direction_id, 'wtPower%i' % direction_id,
-                                  'dir_power%i' % direction_id, 'cut_in_speed', 'cp_curve_cp', 'cp_curve_vel']
-                                 if (nSamples == 0) else
-                                 ['Ct_in', 'Cp_in', 'gen_params:*', 'model_params:*', 'air_density', 'axialInduction',
-                                  'generatorEfficiency', 'turbineX', 'turbineY', 'yaw%i' % direction_id, 'rotorDiameter',
-                                  'hubHeight',  'rated_power', 'cut_in_speed', 'wsPositionX', 'wsPositionY', 'wsPositionZ',
-                                  'wtVelocity%i' % direction_id, 'wtPower%i' % direction_id,
-                                  'dir_power%i' % direction_id, 'wsArray%i' % direction_id, 'cut_in_speed', 'cp_curve_cp',
-                                  'cp_curve_vel']))
+                parents[direction_id].add(
+                    'direction_group%i' % direction_id,
+                    DirectionGroup(nTurbines=nTurbines, direction_id=direction_id,
+                                   use_rotor_components=use_rotor_components, datasize=datasize,
+                                   differentiable=differentiable, add_IdepVarComps=False, nSamples=nSamples,
+                                   wake_model=wake_model, wake_model_options=wake_model_options, cp_points=cp_points,
+                                   cp_curve_spline=cp_curve_spline),
+                    promotes=(['Ct_in', 'Cp_in', 'gen_params:*', 'model_params:*', 'air_density', 'axialInduction',
+                               'generatorEfficiency', 'turbineX', 'turbineY', 'yaw%i' % direction_id, 'rotorDiameter',
+                               'hubHeight', 'rated_power', 'wtVelocity%i' % direction_id, 'wtPower%i' % direction_id,
+                               'dir_power%i' % direction_id, 'cut_in_speed', 'cp_curve_cp', 'cp_curve_vel']
+                              if (nSamples == 0) else
+                              ['Ct_in', 'Cp_in', 'gen_params:*', 'model_params:*', 'air_density', 'axialInduction',
+                               'generatorEfficiency', 'turbineX', 'turbineY', 'yaw%i' % direction_id, 'rotorDiameter',
+                               'hubHeight',  'rated_power', 'cut_in_speed', 'wsPositionX', 'wsPositionY', 'wsPositionZ',
+                               'wtVelocity%i' % direction_id, 'wtPower%i' % direction_id,
+                               'dir_power%i' % direction_id, 'wsArray%i' % direction_id, 'cut_in_speed', 'cp_curve_cp',
+                               'cp_curve_vel']))
 
         # print("parallel groups initialized")
         self.add('powerMUX', MUX(nDirections, units=power_units))
@@ -241,7 +330,158 @@ class AEPGroup(Group):
         self.connect('windSpeeds', 'windSpeedsDeMUX.Array')
         for direction_id in np.arange(0, nDirections):
             self.add('y%i' % direction_id, IndepVarComp('yaw%i' % direction_id, np.zeros(nTurbines), units='deg'), promotes=['*'])
-            self.connect('windDirectionsDeMUX.output%i' % direction_id, 'direction_group%i.wind_direction' % direction_id)
-            self.connect('windSpeedsDeMUX.output%i' % direction_id, 'direction_group%i.wind_speed' % direction_id)
+            self.connect('windDirectionsDeMUX.output%i' % direction_id, '%s.wind_direction' % paths[direction_id])
+            self.connect('windSpeedsDeMUX.output%i' % direction_id, '%s.wind_speed' % paths[direction_id])
             self.connect('dir_power%i' % direction_id, 'powerMUX.input%i' % direction_id)
-        self.connect('powerMUX.Array', 'dirPowers')
\ No newline at end of file
+        self.connect('powerMUX.Array', 'dirPowers')
+
+    def chunk_imbalance(self, costs):
+        """
+        schedule_imbalance of the direction chunks (one per MPI rank) for the given cost of each direction, e.g. from
+        wakeexchange.parallel.estimate_direction_costs or measured times
+        """
+
+        if self.direction_chunks is None:
+            raise ValueError('chunk_imbalance needs the direction_chunks of the group')
+
+        return schedule_imbalance(costs, self.direction_chunks)
+
+
+
+class BatchedAEPGroup(Group):
+    """
+    Group containing all necessary components for wind plant AEP calculations with every flow case (direction and
+    speed pair) evaluated as one (nDirections, nTurbines) array pipeline instead of one DirectionGroup per direction.
+    Gives the same AEP and dirPowers as AEPGroup. Yaw is provided as a single (nDirections, nTurbines) array 'yaw',
+    and turbine velocities and powers are available as 'wtVelocity' and 'wtPower' of the same shape.
+
+    The wake model wrapper is evaluated one flow case at a time within a single component, unless the wrapper class
+    has batched_directions = True (e.g. larsen_batched_wrapper), in which case it is constructed as
+    wake_model(nTurbines, nDirections=nDirections, wake_model_options=wake_model_options) and takes the
+    (nDirections, nTurbines) arrays turbineXw, turbineYw, Ct and yaw itself.
+
+    interaction_options is passed on to BatchedWakeModel. If given, each flow case is split into groups of turbines
+    that are too far apart to interact through their wakes, and the wake model is evaluated for each group separately.
+    This only pays off for the flow cases where the farm splits up, see wake_interaction_clusters.
+
+    With nSpeeds > 0 the AEP is integrated over nSpeeds speed bins in every direction by WindRoseAEP, from the wake
+    model results at the reference speed windSpeeds of each direction. The bin speeds are set as 'windSpeedBins' and
+    the bin frequencies either as the (nDirections, nSpeeds) table 'windRoseFrequencies' (wind_distribution='table')
+    or as 'weibull_k' and 'weibull_A' for each direction together with 'windFrequencies'
+    (wind_distribution='weibull'). 'dirPowers' are still the powers at the reference speeds.
+
+    By default the thrust coefficients are taken to be the same in every speed bin. If ct_tolerance is given, they
+    follow the thrust curve gen_params:windSpeedToCPCT_CT (datasize points) instead, see BatchedSpeedBinWakeModel. The
+    wake deficits found at the reference speed are then reused for all speed bins where Ct changes by no more than
+    ct_tolerance, and the wake model is only evaluated again for the remaining bins.
+    """
+
+    def __init__(self, nTurbines, nDirections=1, use_rotor_components=False, datasize=0,
+                 differentiable=True, nSamples=0, wake_model=floris_wrapper,
+                 wake_model_options=None, params_IdepVar_func=add_floris_params_IndepVarComps,
+                 params_IndepVar_args=None, cp_points=1, cp_curve_spline=None, rec_func_calls=False,
+                 interaction_options=None, nSpeeds=0, wind_distribution='table', ct_tolerance=None):
+
+        super(BatchedAEPGroup, self).__init__()
+
+        if use_rotor_components:
+            raise ValueError('BatchedAEPGroup does not support use_rotor_components, use AEPGroup instead')
+        if nSamples > 0:
+            raise ValueError('BatchedAEPGroup does not support velocity sampling (nSamples > 0), use AEPGroup instead')
+
+        if wake_model_options is None:
+            wake_model_options = {'differentiable': differentiable, 'use_rotor_components': use_rotor_components,
+                                  'nSamples': nSamples, 'verbose': False}
+
+        # add necessary inputs for group
+        self.add('dv0', IndepVarComp('windDirections', np.zeros(nDirections), units='deg'), promotes=['*'])
+        self.add('dv1', IndepVarComp('windSpeeds', np.zeros(nDirections), units='m/s'), promotes=['*'])
+        self.add('dv2', IndepVarComp('windFrequencies', np.ones(nDirections)), promotes=['*'])
+        self.add('dv3', IndepVarComp('turbineX', np.zeros(nTurbines), units='m'), promotes=['*'])
+        self.add('dv4', IndepVarComp('turbineY', np.zeros(nTurbines), units='m'), promotes=['*'])
+        self.add('dv4p5', IndepVarComp('hubHeight', np.zeros(nTurbines), units='m'), promotes=['*'])
+
+        # add vars to be seen by MPI and gradient calculations
+        self.add('dv5', IndepVarComp('rotorDiameter', np.zeros(nTurbines), units='m'), promotes=['*'])
+        self.add('dv6', IndepVarComp('axialInduction', np.zeros(nTurbines)), promotes=['*'])
+        self.add('dv7', IndepVarComp('generatorEfficiency', np.zeros(nTurbines)), promotes=['*'])
+        self.add('dv8', IndepVarComp('air_density', val=1.1716, units='kg/(m*m*m)'), promotes=['*'])
+        self.add('dv9', IndepVarComp('rated_power', np.ones(nTurbines)*5000., units='kW',
+                       desc='rated power for each turbine', pass_by_obj=True), promotes=['*'])
+        self.add('dv10', IndepVarComp('Ct_in', np.zeros(nTurbines)), promotes=['*'])
+        self.add('dv11', IndepVarComp('Cp_in', np.zeros(nTurbines)), promotes=['*'])
+        self.add('dv12', IndepVarComp('cp_curve_cp', np.zeros(datasize),
+                                      desc='cp curve cp data', pass_by_obj=True), promotes=['*'])
+        self.add('dv13', IndepVarComp('cp_curve_vel', np.zeros(datasize), units='m/s',
+                                      desc='cp curve velocity data', pass_by_obj=True), promotes=['*'])
+        self.add('dv14', IndepVarComp('cut_in_speed', np.zeros(nTurbines), units='m/s',
+                                      desc='cut-in speed of wind turbines', pass_by_obj=True), promotes=['*'])
+        self.add('y0', IndepVarComp('yaw', np.zeros((nDirections, nTurbines)), units='deg'), promotes=['*'])
+
+        # add variable tree IndepVarComps
+        add_gen_params_IdepVarComps(self, datasize=datasize)
+
+        # indep variable components for wake model
+        if params_IdepVar_func is not None:
+            if (params_IndepVar_args is None) and (wake_model is floris_wrapper):
+                params_IndepVar_args = {'use_rotor_components': False}
+            elif params_IndepVar_args is None:
+                params_IndepVar_args = {}
+            params_IdepVar_func(self, **params_IndepVar_args)
+
+        # add components
+        self.add('windFrame', BatchedWindFrame(nTurbines, nDirections, differentiable=differentiable),
+                 promotes=['*'])
+        self.add('CtCp', BatchedAdjustCtCpYaw(nTurbines, nDirections, differentiable=differentiable),
+                 promotes=['Ct_in', 'Cp_in', 'yaw', 'gen_params:*'])
+        binned_velocities = nSpeeds > 0 and ct_tolerance is not None
+        if binned_velocities:
+            if getattr(wake_model, 'batched_directions', False):
+                raise ValueError('ct_tolerance is not supported for wake models with batched_directions')
+            self.add('wakeModel', BatchedSpeedBinWakeModel(nTurbines, nDirections, nSpeeds, wake_model=wake_model,
+                                                           wake_model_options=wake_model_options,
+                                                           differentiable=differentiable,
+                                                           interaction_options=interaction_options,
+                                                           datasize=datasize, ct_tolerance=ct_tolerance),
+                     promotes=['*'])
+        elif getattr(wake_model, 'batched_directions', False):
+            self.add('wakeModel', wake_model(nTurbines, nDirections=nDirections, wake_model_options=wake_model_options),
+                     promotes=['*'])
+        else:
+            self.add('wakeModel', BatchedWakeModel(nTurbines, nDirections, wake_model=wake_model,
+                                                   wake_model_options=wake_model_options,
+                                                   differentiable=differentiable,
+                                                   interaction_options=interaction_options),
+                     promotes=['*'])
+        self.add('powerComp', BatchedWindDirectionPower(nTurbines, nDirections, differentiable=True,
+                                                        cp_points=cp_points, cp_curve_spline=cp_curve_spline),
+                 promotes=['air_density', 'generatorEfficiency', 'rotorDiameter', 'wtVelocity', 'rated_power',
+                           'wtPower', 'dirPowers', 'cut_in_speed', 'cp_curve_cp', 'cp_curve_vel'])
+        if nSpeeds > 0:
+            if wind_distribution == 'table':
+                self.add('dv15', IndepVarComp('windRoseFrequencies', np.zeros((nDirections, nSpeeds))),
+                         promotes=['*'])
+                distribution_params = ['windRoseFrequencies']
+            else:
+                self.add('dv15', IndepVarComp('weibull_k', np.ones(nDirections)*2., pass_by_obj=True),
+                         promotes=['*'])
+                self.add('dv16', IndepVarComp('weibull_A', np.ones(nDirections)*8., units='m/s', pass_by_obj=True),
+                         promotes=['*'])
+                distribution_params = ['windFrequencies', 'weibull_k', 'weibull_A']
+            self.add('dv17', IndepVarComp('windSpeedBins', np.zeros(nSpeeds), units='m/s', pass_by_obj=True),
+                     promotes=['*'])
+            self.add('AEPcomp', WindRoseAEP(nTurbines, nDirections, nSpeeds, distribution=wind_distribution,
+                                            cp_points=cp_points, cp_curve_spline=cp_curve_spline,
+                                            rec_func_calls=rec_func_calls, binned_velocities=binned_velocities),
+                     promotes=(['wtVelocityBins'] if binned_velocities else ['wtVelocity', 'windSpeeds']) +
+                              ['windSpeedBins', 'air_density', 'rotorDiameter', 'generatorEfficiency', 'rated_power',
+                               'cut_in_speed', 'cp_curve_cp', 'cp_curve_vel', 'gen_params:AEP_method', 'binPowers',
+                               'AEP'] + distribution_params)
+        else:
+            self.add('AEPcomp', WindFarmAEP(nDirections, rec_func_calls=rec_func_calls), promotes=['*'])
+
+        # connect components
+        self.connect('CtCp.Ct_out', 'Ct')
+        self.connect('CtCp.Cp_out', 'powerComp.Cp')
+        if nSpeeds > 0:
+            self.connect('CtCp.Cp_out', 'AEPcomp.Cp')
@@ -11,8 +11,8 @@ import numpy as np
 
 from openmdao.api import Group, IndepVarComp, ExecComp
 
-from wakeexchange.GeneralWindFarmGroups import DirectionGroup, AEPGroup
-from wakeexchange.GeneralWindFarmComponents import SpacingComp, BoundaryComp, calcICC, calcFCR, calcLLC, calcLRC, calcOandM
+from wakeexchange.GeneralWindFarmGroups import DirectionGroup, AEPGroup, BatchedAEPGroup
+from wakeexchange.GeneralWindFarmComponents import SpacingComp, NeighborSpacingComp, BoundaryComp, calcICC, calcFCR, calcLLC, calcLRC, calcOandM
 from wakeexchange.floris import floris_wrapper, add_floris_params_IndepVarComps
 
 import warnings
@@ -109,7 +109,7 @@ class OptAEP(Group):
                  datasize=0, differentiable=True, force_fd=False, nVertices=0, wake_model=floris_wrapper,
                  wake_model_options=None, params_IdepVar_func=add_floris_params_IndepVarComps,
                  params_IndepVar_args={'use_rotor_components': False}, cp_points=1, cp_curve_spline=None,
-                 rec_func_calls=False):
+                 rec_func_calls=False, batch_directions=False, spacing_method='pairs', spacing_options=None):
 
         # print("initializing OptAEP Group")
         super(OptAEP, self).__init__()
@@ -128,20 +128,40 @@ class OptAEP(Group):
             self.deriv_options['form'] = 'forward'
 
         # ##### add major components and groups
-        # add group that calculates AEP
-        self.add('AEPgroup', AEPGroup(nTurbines=nTurbines, nDirections=nDirections,
-                                            use_rotor_components=use_rotor_components,
-                                            datasize=datasize, differentiable=differentiable, wake_model=wake_model,
-                                            wake_model_options=wake_model_options,
-                                            params_IdepVar_func=params_IdepVar_func,
-                                            params_IndepVar_args=params_IndepVar_args, nSamples=nSamples,
-                                            cp_points=cp_points, cp_curve_spline=cp_curve_spline,
-                                      rec_func_calls=rec_func_calls),
-                 promotes=['*'])
-
-
-        # add component that calculates spacing between each pair of turbines
-        self.add('spacing_comp', SpacingComp(nTurbines=nTurbines), promotes=['*'])
+        # add group that calculates AEP (all directions as one array pipeline if batch_directions, in which case the
+        # yaw design variable is the (nDirections, nTurbines) array 'yaw' instead of yaw0, yaw1, ...)
+        if batch_directions:
+            aep_group = BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                        use_rotor_components=use_rotor_components,
+                                        datasize=datasize, differentiable=differentiable, wake_model=wake_model,
+                                        wake_model_options=wake_model_options,
+                                        params_IdepVar_func=params_IdepVar_func,
+                                        params_IndepVar_args=params_IndepVar_args, nSamples=nSamples,
+                                        cp_points=cp_points, cp_curve_spline=cp_curve_spline,
+                                        rec_func_calls=rec_func_calls)
+        else:
+            aep_group = AEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                 use_rotor_components=use_rotor_components,
+                                 datasize=datasize, differentiable=differentiable, wake_model=wake_model,
+                                 wake_model_options=wake_model_options,
+                                 params_IdepVar_func=params_IdepVar_func,
+                                 params_IndepVar_args=params_IndepVar_args, nSamples=nSamples,
+                                 cp_points=cp_points, cp_curve_spline=cp_curve_spline,
+                                 rec_func_calls=rec_func_calls)
+        self.add('AEPgroup', aep_group, promotes=['*'])
+
+
+        if spacing_method == 'pairs':
+            # add component that calculates spacing between each pair of turbines
+            self.add('spacing_comp', SpacingComp(nTurbines=nTurbines), promotes=['*'])
+        elif spacing_method == 'neighbors':
+            # add component that aggregates the spacing of nearby turbines into one constraint per turbine (spacingKS)
+            if spacing_options is None:
+                spacing_options = {}
+            self.add('spacing_comp', NeighborSpacingComp(nTurbines=nTurbines, minSpacing=minSpacing, **spacing_options),
+                     promotes=['*'])
+        else:
+            raise ValueError('spacing_method must be one of ["pairs", "neighbors"]')
 
         if nVertices > 0:
             # add component that enforces a convex hull wind farm boundary
@@ -158,11 +178,12 @@ class OptAEP(Group):
         # self.add('s0', IndepVarComp('minSpacing', np.array([minSpacing]), units='m',
         #          pass_by_obj=True, desc='minimum allowable spacing between wind turbines'), promotes=['*'])
 
-        self.add('spacing_con', ExecComp('sc = wtSeparationSquared-(minSpacing*rotorDiameter[0])**2',
-                                         minSpacing=np.array([minSpacing]), rotorDiameter=np.zeros(nTurbines),
-                                         sc=np.zeros(int(((nTurbines-1.)*nTurbines/2.))),
-                                         wtSeparationSquared=np.zeros(int(((nTurbines-1.)*nTurbines/2.)))),
-                 promotes=['*'])
+        if spacing_method == 'pairs':
+            self.add('spacing_con', ExecComp('sc = wtSeparationSquared-(minSpacing*rotorDiameter[0])**2',
+                                             minSpacing=np.array([minSpacing]), rotorDiameter=np.zeros(nTurbines),
+                                             sc=np.zeros(int(((nTurbines-1.)*nTurbines/2.))),
+                                             wtSeparationSquared=np.zeros(int(((nTurbines-1.)*nTurbines/2.)))),
+                     promotes=['*'])
 
 
         # add objective component
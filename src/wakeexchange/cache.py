@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+cache.py
+
+Memoization of wake model evaluations. A WakeEvaluationCache stores the results of a wake model for a content key of
+all of its inputs (layout, flow case and model_params:*), in an in-memory LRU tier that can be backed by a
+memory-mapped on-disk store shared between runs. cached_wake_model turns any single-direction wake model wrapper into
+one that looks up its results (and optionally its Jacobians) in such a cache, e.g. for multi-start optimizations and
+post-processing that evaluate the same layouts many times:
+
+    cache = WakeEvaluationCache(max_entries=4096, directory='./wake_cache')
+    prob = Problem(root=AEPGroup(nTurbines, nDirections, wake_model=cached_wake_model(gauss_wrapper, cache), ...))
+    ...
+    print(cache.stats())
+"""
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from openmdao.api import Component
+
+from wakeexchange.GeneralWindFarmComponents import WakeModelKernel
+
+# part of every key, increment when the stored entries of a wake model change meaning
+CACHE_VERSION = 1
+
+
+def _update_digest(digest, value):
+    """
+    Add value to digest by content. Arrays and numbers are identified by dtype, shape and data, strings and None by
+    their repr, and dicts, lists and tuples by their items. Returns False for other values, which are not added.
+    """
+
+    if isinstance(value, (np.ndarray, float, int, np.number)):
+        value = np.ascontiguousarray(value)
+        digest.update(('%s%s' % (value.dtype.str, value.shape)).encode('utf-8'))
+        digest.update(value.tobytes())
+    elif value is None or isinstance(value, (str, type(u''))):
+        digest.update(repr(value).encode('utf-8'))
+    elif isinstance(value, dict):
+        digest.update(('dict%i' % len(value)).encode('utf-8'))
+        for key in sorted(value.keys()):
+            digest.update(repr(key).encode('utf-8'))
+            if not _update_digest(digest, value[key]):
+                return False
+    elif isinstance(value, (list, tuple)):
+        digest.update(('%s%i' % (type(value).__name__, len(value))).encode('utf-8'))
+        for item in value:
+            if not _update_digest(digest, item):
+                return False
+    else:
+        return False
+
+    return True
+
+
+def content_key(values, prefix=''):
+    """
+    Hex digest identifying the given dict of values by content. Arrays are identified by dtype, shape and data,
+    other values by their repr.
+    """
+
+    digest = hashlib.sha1(prefix.encode('utf-8'))
+    for name in sorted(values.keys()):
+        value = values[name]
+        digest.update(name.encode('utf-8'))
+        if not _update_digest(digest, value):
+            digest.update(repr(value).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def options_key(options):
+    """
+    Hex digest identifying a dict of wake model options by content. Raises a ValueError for options that can not be
+    identified by content (e.g. a wind farm instance), such models need an explicit model key.
+    """
+
+    digest = hashlib.sha1()
+    for name in sorted(options.keys()):
+        digest.update(name.encode('utf-8'))
+        if not _update_digest(digest, options[name]):
+            raise ValueError('wake model option %s can not be identified by content, give the cache a model_key'
+                             % name)
+
+    return digest.hexdigest()
+
+
+class WakeEvaluationCache(object):
+    """
+    Stores dicts of arrays by key. The most recently used max_entries entries are kept in memory. If a directory is
+    given, every entry is also written there (one .npy file per array) and entries that are not in memory are read
+    back memory-mapped, so the cache can be shared between runs and processes.
+    """
+
+    def __init__(self, max_entries=1024, directory=None):
+
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    def get(self, key):
+        """ the stored dict of arrays for key, or None if there is none """
+
+        if key in self._entries:
+            # move to the most recently used end
+            entry = self._entries.pop(key)
+            self._entries[key] = entry
+            self.hits += 1
+            return entry
+
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        """ store a dict of arrays for key (the arrays are copied) """
+
+        entry = dict((name, np.array(value)) for name, value in entry.items())
+        self._remember(key, entry)
+
+        if self.directory is not None:
+            self._store(key, entry)
+
+    def stats(self):
+        """ dict of hit and miss counts, the hit rate and the number of entries in memory """
+
+        lookups = self.hits + self.misses
+
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'hit_rate': float(self.hits)/lookups if lookups > 0 else 0., 'entries': len(self._entries)}
+
+    def clear(self, disk=False):
+        """ forget all entries in memory (and on disk if disk=True) and reset the statistics """
+
+        self._entries.clear()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _remember(self, key, entry):
+
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+
+        if self.directory is None:
+            return None
+
+        path = os.path.join(self.directory, key)
+        if not os.path.isdir(path):
+            return None
+
+        with open(os.path.join(path, 'names.json'), 'r') as f:
+            names = json.load(f)
+
+        return dict((name, np.load(os.path.join(path, '%i.npy' % i), mmap_mode='r'))
+                    for i, name in enumerate(names))
+
+    def _store(self, key, entry):
+
+        path = os.path.join(self.directory, key)
+        if os.path.isdir(path):
+            return
+
+        # write to a temporary directory first, so that other processes never see a partial entry
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp')
+        names = sorted(entry.keys())
+        for i, name in enumerate(names):
+            np.save(os.path.join(tmp, '%i.npy' % i), entry[name])
+        with open(os.path.join(tmp, 'names.json'), 'w') as f:
+            json.dump(names, f)
+
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _jacobian_name(of, wrt):
+
+    return 'd(%s)/d(%s)' % (of, wrt)
+
+
+class CachedWakeModel(Component):
+    """
+    Evaluates a single-direction wake model wrapper through a WakeModelKernel, looking its outputs (and, if
+    cache_jacobians is set, its Jacobians) up in a WakeEvaluationCache first. Has the same inputs and outputs as the
+    wrapper, so it can replace it in DirectionGroup and AEPGroup.
+
+    The keys start with CACHE_VERSION, the wake model and model_key, which identifies the model setup. Without a
+    model_key the wake model options are identified by content (see options_key).
+    """
+
+    def __init__(self, nTurbines, direction_id=0, wake_model_options=None, wake_model=None, cache=None,
+                 cache_jacobians=True, model_key=None):
+
+        super(CachedWakeModel, self).__init__()
+
+        self.kernel = kernel = WakeModelKernel(nTurbines, wake_model, wake_model_options, direction_id=direction_id)
+        self.cache = cache if cache is not None else WakeEvaluationCache()
+        self.cache_jacobians = cache_jacobians
+
+        # results of different wake models or options must not be mixed up
+        if model_key is None:
+            model_key = options_key(wake_model_options or {})
+        self.prefix = 'v%i.%s.%s.%s' % (CACHE_VERSION, wake_model.__module__, wake_model.__name__, model_key)
+
+        # outputs are the wrapper variables that no other wrapper component uses
+        used = set()
+        for comp in kernel.components:
+            used.update(comp.param_meta.keys())
+        self.output_names = [name for name in kernel.unknown_meta if name not in used]
+
+        for name, meta in kernel.param_meta.items():
+            kwargs = dict((key, meta[key]) for key in ('units', 'desc', 'pass_by_obj') if key in meta)
+            self.add_param(name, val=copy.deepcopy(kernel.values[name]), **kwargs)
+        for name in self.output_names:
+            meta = kernel.unknown_meta[name]
+            kwargs = dict((key, meta[key]) for key in ('units', 'desc') if key in meta)
+            self.add_output(name, val=copy.deepcopy(kernel.values[name]), **kwargs)
+
+    def _key(self, params):
+
+        return content_key(dict((name, params[name]) for name in self.kernel.param_meta), self.prefix)
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        key = self._key(params)
+        entry = self.cache.get(key)
+        if entry is None:
+            values = self.kernel.evaluate(dict((name, params[name]) for name in self.kernel.param_meta))
+            entry = dict((name, values[name]) for name in self.output_names)
+            self.cache.put(key, entry)
+
+        for name in self.output_names:
+            unknowns[name] = np.array(entry[name])
+
+    def linearize(self, params, unknowns, resids):
+
+        wrt = self.kernel.differentiable_params()
+        of = [name for name in self.output_names if not self.kernel.unknown_meta[name].get('pass_by_obj', False)]
+
+        key = None
+        entry = None
+        if self.cache_jacobians:
+            key = self._key(params) + '-J'
+            entry = self.cache.get(key)
+
+        if entry is None:
+            self.kernel.evaluate(dict((name, params[name]) for name in self.kernel.param_meta))
+            Jk = self.kernel.linearize(of, wrt)
+            entry = dict((_jacobian_name(out, name), Jk[out, name]) for out in of for name in wrt)
+            if self.cache_jacobians:
+                self.cache.put(key, entry)
+
+        J = {}
+        for out in of:
+            for name in wrt:
+                J[out, name] = np.array(entry[_jacobian_name(out, name)])
+
+        return J
+
+
+def cached_wake_model(wake_model, cache=None, cache_jacobians=True, model_key=None):
+    """
+    Wake model wrapper class that can be used instead of wake_model (e.g. gauss_wrapper) wherever a single-direction
+    wrapper is expected, and that memoizes its results in cache (a new in-memory WakeEvaluationCache if not given).
+    The cache is available as the cache attribute of the returned class. model_key (a string) identifies the model
+    setup in the keys and is required if the wake model options can not be identified by content.
+    """
+
+    if cache is None:
+        cache = WakeEvaluationCache()
+
+    def __init__(self, nTurbines, direction_id=0, wake_model_options=None):
+        CachedWakeModel.__init__(self, nTurbines, direction_id=direction_id, wake_model_options=wake_model_options,
+                                 wake_model=wake_model, cache=cache, cache_jacobians=cache_jacobians,
+                                 model_key=model_key)
+
+    return type('cached_%s' % wake_model.__name__, (CachedWakeModel,), {'__init__': __init__, 'cache': cache})
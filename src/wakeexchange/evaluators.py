@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+evaluators.py
+
+AEP evaluation outside of an OpenMDAO problem for drivers that move a few turbines at a time (gradient-free
+optimizers, layout repair heuristics). The wake model wrappers are evaluated through WakeModelKernel, and the power and
+AEP use the same functions as WindDirectionPower and WindFarmAEP.
+"""
+
+import numpy as np
+
+from wakeexchange.GeneralWindFarmComponents import WakeModelKernel, wind_frame_rotations, turbine_power, \
+    wake_interaction_pairs
+
+
+class IncrementalAEPEvaluator(object):
+    """
+    Keeps the superposed velocity deficits at every turbine in every direction, so that moving a few turbines only
+    requires the wake interactions that involve them to be evaluated again.
+
+    The state is seeded from a single wake model evaluation of the whole farm for each direction. The deficit a single
+    turbine causes at another one is found by running the wake model for just the two turbines, with the thrust
+    coefficient (and axial induction) of the second one set to zero. When turbines move, the deficits between each
+    moved turbine and every other turbine are taken out of the superposition at the old locations and added at the new
+    ones, and kept for later moves. The deficits at each turbine are combined with the given superposition ('sos' for
+    the root of the sum of squares, 'linear' for their sum), which should be the one used by the wake model;
+    superposition_error() compares the result with a full wake model evaluation.
+
+    If interaction_options is given (a dict of keyword arguments for wake_interaction_pairs, may be empty), only the
+    pairs of turbines that may interact are evaluated and all other deficits are taken to be zero.
+
+    Ct, Cp and yaw are per turbine (nTurbines) or per direction and turbine (nDirections, nTurbines) and should already
+    be adjusted for yaw as AdjustCtCpYaw does. After construction and after every move the results are available as
+    wtVelocity, wtPower, dirPowers and AEP.
+    """
+
+    def __init__(self, turbineX, turbineY, windDirections, windSpeeds, windFrequencies, wake_model, Ct, Cp,
+                 rotorDiameter, hubHeight, generatorEfficiency, wake_model_options=None, model_params=None, yaw=None,
+                 air_density=1.1716, rated_power=5000., cut_in_speed=3., superposition='sos', interaction_options=None):
+
+        if superposition not in ['sos', 'linear']:
+            raise ValueError('superposition must be one of ["sos", "linear"]')
+
+        self.nTurbines = nTurbines = np.size(turbineX)
+        self.nDirections = nDirections = np.size(windDirections)
+        self.turbineX = np.array(turbineX, dtype=float)
+        self.turbineY = np.array(turbineY, dtype=float)
+        self.windDirections = np.array(windDirections, dtype=float)
+        self.windSpeeds = np.array(windSpeeds, dtype=float)
+        self.windFrequencies = np.array(windFrequencies, dtype=float)
+        self.superposition = superposition
+        self.interaction_options = interaction_options
+
+        # per direction and turbine values
+        self.Ct = np.zeros((nDirections, nTurbines)) + Ct
+        self.Cp = np.zeros((nDirections, nTurbines)) + Cp
+        self.yaw = np.zeros((nDirections, nTurbines)) + (yaw if yaw is not None else 0.)
+        self.rotorDiameter = np.zeros(nTurbines) + rotorDiameter
+        self.hubHeight = np.zeros(nTurbines) + hubHeight
+
+        self.generatorEfficiency = np.zeros(nTurbines) + generatorEfficiency
+        self.air_density = air_density
+        self.rated_power = np.zeros(nTurbines) + rated_power
+        self.cut_in_speed = np.zeros(nTurbines) + cut_in_speed
+
+        # one kernel for the whole farm and one for pairs of turbines
+        self.kernel = WakeModelKernel(nTurbines, wake_model, wake_model_options)
+        self.pair_kernel = WakeModelKernel(2, wake_model, wake_model_options)
+        self.velocity_name = 'wtVelocity%i' % self.kernel.direction_id
+        self.yaw_name = 'yaw%i' % self.kernel.direction_id
+        self.shared_inputs = dict((name, value) for name, value in (model_params or {}).items()
+                                  if name in self.kernel.param_meta)
+
+        self.rotations = wind_frame_rotations(self.windDirections)
+
+        # deficits[d, i, j] is the velocity deficit turbine i causes at turbine j in direction d (nan until it is
+        # evaluated), combined[d, j] the superposition of all deficits at turbine j before taking the root for 'sos'
+        self.deficits = np.zeros((nDirections, nTurbines, nTurbines)) + np.nan
+        self.combined = self._superposed(self.windSpeeds[:, np.newaxis] - self.full_velocities())
+
+        self._update_power()
+
+    def _wind_frame(self, direction, turbines):
+
+        rotation = self.rotations[direction]
+        turbineX = self.turbineX[turbines]
+        turbineY = self.turbineY[turbines]
+
+        return rotation[0, 0]*turbineX + rotation[0, 1]*turbineY, rotation[1, 0]*turbineX + rotation[1, 1]*turbineY
+
+    def _inputs(self, kernel, direction, turbines, active):
+        """ wake model inputs for the given turbines, only the active turbines have a wake """
+
+        inputs = dict(self.shared_inputs)
+        inputs['turbineXw'], inputs['turbineYw'] = self._wind_frame(direction, turbines)
+
+        Ct = self.Ct[direction, turbines]*active
+        values = {'Ct': Ct, 'axialInduction': 0.5*(1. - np.sqrt(np.maximum(1. - Ct, 0.))),
+                  self.yaw_name: self.yaw[direction, turbines],
+                  'rotorDiameter': self.rotorDiameter[turbines], 'hubHeight': self.hubHeight[turbines],
+                  'wind_speed': self.windSpeeds[direction]}
+        for name, value in values.items():
+            if name in kernel.param_meta:
+                inputs[name] = value
+
+        return inputs
+
+    def _pair_deficits(self, direction, sources, targets):
+        """ velocity deficits caused by each of the source turbines alone at the corresponding target turbine """
+
+        deficits = np.zeros(len(sources))
+        evaluated = np.arange(0, len(sources))
+
+        # pairs that cannot interact have no deficit
+        if self.interaction_options is not None:
+            turbineXw, turbineYw = self._wind_frame(direction, np.arange(0, self.nTurbines))
+            upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, self.rotorDiameter,
+                                                          **self.interaction_options)
+            interacting = np.zeros((self.nTurbines, self.nTurbines), dtype=bool)
+            interacting[upstream, downstream] = True
+            evaluated = np.nonzero(interacting[sources, targets])[0]
+
+        for k in evaluated:
+            turbines = np.array([sources[k], targets[k]])
+            values = self.pair_kernel.evaluate(self._inputs(self.pair_kernel, direction, turbines, np.array([1., 0.])))
+            deficits[k] = self.windSpeeds[direction] - values[self.velocity_name][1]
+
+        return deficits
+
+    def _known_deficits(self, direction, sources, targets):
+        """ deficits[direction, sources, targets], evaluating those that are not known yet """
+
+        deficits = self.deficits[direction, sources, targets]
+        unknown = np.isnan(deficits)
+        if np.any(unknown):
+            deficits[unknown] = self._pair_deficits(direction, sources[unknown], targets[unknown])
+            self.deficits[direction, sources[unknown], targets[unknown]] = deficits[unknown]
+
+        return deficits
+
+    def _superposed(self, deficits):
+
+        if self.superposition == 'sos':
+            return np.power(deficits, 2)
+        return deficits
+
+    def _update_power(self):
+
+        if self.superposition == 'sos':
+            total_deficit = np.sqrt(np.maximum(self.combined, 0.))
+        else:
+            total_deficit = self.combined
+
+        self.wtVelocity = self.windSpeeds[:, np.newaxis] - total_deficit
+        self.wtPower = turbine_power(self.wtVelocity, self.Cp, self.rotorDiameter, self.air_density,
+                                     self.generatorEfficiency, self.rated_power, self.cut_in_speed)
+        self.dirPowers = np.sum(self.wtPower, 1)
+        self.AEP = np.sum(self.dirPowers*self.windFrequencies)*8760.
+
+    def move(self, turbines, turbineX, turbineY):
+        """
+        Moves the given turbines to new locations and updates the wake interactions that involve them, along with
+        wtVelocity, wtPower, dirPowers and AEP.
+
+        :param turbines: indices of the moved turbines
+        :param turbineX, turbineY: their new locations
+        :return AEP
+        """
+
+        turbines = np.atleast_1d(np.asarray(turbines, dtype=int))
+
+        # every pair of turbines with at least one moved turbine
+        moved = np.zeros(self.nTurbines, dtype=bool)
+        moved[turbines] = True
+        pairs = (moved[:, np.newaxis] | moved[np.newaxis, :]) & ~np.eye(self.nTurbines, dtype=bool)
+        sources, targets = np.nonzero(pairs)
+
+        # take the deficits of these pairs at the old locations out of the superposition
+        for direction in range(0, self.nDirections):
+            deficits = self._known_deficits(direction, sources, targets)
+            self.combined[direction] -= np.bincount(targets, self._superposed(deficits), self.nTurbines)
+
+        self.turbineX[turbines] = turbineX
+        self.turbineY[turbines] = turbineY
+
+        # and add them at the new locations
+        for direction in range(0, self.nDirections):
+            deficits = self._pair_deficits(direction, sources, targets)
+            self.deficits[direction, sources, targets] = deficits
+            self.combined[direction] += np.bincount(targets, self._superposed(deficits), self.nTurbines)
+
+        self._update_power()
+
+        return self.AEP
+
+    def full_velocities(self):
+        """ turbine velocities (nDirections, nTurbines) from a full wake model evaluation of the current layout """
+
+        wtVelocity = np.zeros((self.nDirections, self.nTurbines))
+        turbines = np.arange(0, self.nTurbines)
+        for direction in range(0, self.nDirections):
+            values = self.kernel.evaluate(self._inputs(self.kernel, direction, turbines, np.ones(self.nTurbines)))
+            wtVelocity[direction] = values[self.velocity_name]
+
+        return wtVelocity
+
+    def superposition_error(self):
+        """ largest difference (m/s) between the superposed and the fully evaluated turbine velocities """
+
+        return np.max(np.abs(self.full_velocities() - self.wtVelocity))
@@ -6,6 +6,10 @@ Brigham Young University
 
 from openmdao.api import IndepVarComp, Component, Group
 import numpy as np
+import copy
+from scipy import sparse
+
+from wakeexchange.GeneralWindFarmComponents import wake_interaction_pairs
 
 from fusedwake.gcl import GCL #use w/GCL.f
 
@@ -27,22 +31,180 @@ def add_larsen_params_IndepVarComps(openmdao_object, nTurbines, datasize):
     openmdao_object.add('lp5', IndepVarComp('hubHeight', np.zeros(nTurbines)), promotes=['*'])
 
 
+class GCLEvaluator(object):
+    """
+    Persistent GCL model of one wind farm. Holds its own copy of the wind farm geometry (so components running in
+    parallel do not share the wf_instance given in the wake model options) and a preallocated coordinate buffer, and
+    runs the Fortran GCL once per evaluation.
+    """
+
+    def __init__(self, wf_instance, nTurbines, z0=0.0001, NG=8, sup='lin', inflow='log'):
+
+        self.nTurbines = nTurbines
+        self.options = {'z0': z0, 'NG': NG, 'sup': sup, 'inflow': inflow}
+
+        # private copy of the wind farm, with coordinates stored in (and updated through) the buffer
+        self.wf = copy.deepcopy(wf_instance)
+        self.xyz = np.zeros((3, nTurbines))
+        self.wf.xyz = self.xyz
+        self.wf.nWT = nTurbines
+
+        self.gcl = None
+        self.TI = None
+
+    def __call__(self, turbineX, turbineY, hubHeight, wind_speed, wind_direction, Ia):
+        """ hub velocity (m/s) of each turbine, given the turbine locations in the original reference frame """
+
+        self.xyz[0, :] = turbineX
+        self.xyz[1, :] = turbineY
+        self.xyz[2, :] = hubHeight
+
+        # the model only has to be rebuilt when the ambient turbulence intensity changes
+        if self.gcl is None or Ia != self.TI:
+            self.gcl = GCL(WF=self.wf, TI=Ia, **self.options)
+            self.TI = Ia
+
+        return np.array(self.gcl(WS=wind_speed, WD=wind_direction, version='fort_gcl').u_wt)
+
+
+def _color_columns(pattern):
+    """
+    Greedy grouping of the columns of a boolean (nRows, nCols) Jacobian sparsity pattern into colors, where no two
+    columns of the same color share a row. All columns of a color can be perturbed in the same finite difference step.
+    """
+
+    colors = []
+    color_rows = []
+    for column in range(0, pattern.shape[1]):
+        rows = pattern[:, column]
+        for color, used in zip(colors, color_rows):
+            if not np.any(used & rows):
+                color.append(column)
+                used |= rows
+                break
+        else:
+            colors.append([column])
+            color_rows.append(rows.copy())
+
+    return [np.array(color) for color in colors]
+
+
+def wake_influence_pattern(turbineXw, turbineYw, rotorDiameter, wake_spread=0.2):
+    """
+    boolean (nTurbines, nTurbines) array that is True where the velocity of turbine i (row) may depend on the
+    location of turbine j (column), i.e. on the diagonal and where i is in or near the wake cone of j. With
+    wake_spread=None every turbine may depend on every other turbine.
+    """
+
+    nTurbines = turbineXw.size
+    if wake_spread is None:
+        return np.ones((nTurbines, nTurbines), dtype=bool)
+
+    upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, rotorDiameter, wake_spread=wake_spread)
+
+    pattern = np.eye(nTurbines, dtype=bool)
+    pattern[downstream, upstream] = True
+
+    # the wake of a turbine depends on its own inflow, so influence is passed on further downstream
+    while True:
+        closure = pattern | (np.dot(pattern.astype(int), pattern.astype(int)) > 0)
+        if np.array_equal(closure, pattern):
+            break
+        pattern = closure
+
+    return pattern
+
+
+def compressed_fd_jacobian(hub_velocity, inputs, velocity, pattern, step_size=1.0e-6, form='forward'):
+    """
+    finite difference Jacobians of the hub velocities w.r.t. inputs with one value per turbine, perturbing all
+    turbines of a color of the influence pattern (see _color_columns) in the same step
+
+    :param hub_velocity: function of the inputs (as keyword arguments) giving the velocity of each turbine
+    :param inputs: dict of the unperturbed inputs
+    :param velocity: the unperturbed velocities
+    :param pattern: boolean (nTurbines, nTurbines) array, True where a velocity (row) may depend on a turbine (column)
+    :param form: 'forward', or 'central' for second order accurate differences at twice the number of evaluations
+    :return: dict of dense (nTurbines, nTurbines) Jacobians by input name
+    """
+
+    if form not in ['forward', 'central']:
+        raise ValueError('form must be one of ["forward", "central"]')
+
+    nTurbines = velocity.size
+    colors = _color_columns(pattern)
+
+    def perturbed_velocity(name, color, step):
+        perturbed = dict(inputs)
+        perturbed[name] = np.array(inputs[name])
+        perturbed[name][color] += step[color]
+        return hub_velocity(**perturbed)
+
+    J = {}
+    for name in inputs:
+        step = step_size*np.maximum(np.abs(inputs[name]), 1.)
+        dvelocity = np.zeros((nTurbines, nTurbines))
+
+        for color in colors:
+            if form == 'forward':
+                difference = perturbed_velocity(name, color, step) - velocity
+            else:
+                difference = 0.5*(perturbed_velocity(name, color, step) - perturbed_velocity(name, color, -step))
+
+            # each row in the pattern of this color is influenced by exactly one of the perturbed turbines
+            for column in color:
+                rows = pattern[:, column]
+                dvelocity[rows, column] = difference[rows]/step[column]
+
+        J[name] = dvelocity
+
+    return J
+
+
+def depends_on_design_variable(component, name):
+    """ True if the param name of component depends on a design variable of the problem's driver """
+
+    relevance = component._probdata.relevance
+    top_name = component.params._dat[name].meta['top_promoted_name']
+
+    return any(relevance.is_relevant(voi, top_name) for vois in relevance.inputs for voi in vois)
+
+
 class GC_Larsen(Component):
     """
     This component was written by Bryce Ingersoll
+
+    GCL runs as compiled Fortran on real numbers, so neither complex step nor analytic derivatives can be taken
+    through it. The gradients w.r.t. the turbine locations and hub heights are finite differences instead, compressed
+    by perturbing turbines that do not influence the same turbines in the same step (model_options
+    'gradient_wake_spread', see wake_influence_pattern), and second order accurate with model_options
+    'gradient_form' = 'central'. GCL takes the rotor size from the wind farm instance, so rotorDiameter can not be a
+    design variable.
     """
 
     def __init__(self, nTurbines, direction_id=0, model_options=None):
         super(GC_Larsen, self).__init__()
 
         self.add_param('wind_speed', val=8.0, units='m/s')
-        self.add_param('wind_direction', val=0.0)
+        self.add_param('wind_direction', val=270.0, units='deg')
         self.direction_id = direction_id
         self.datasize = model_options['datasize']
 
         self.wf_instance = model_options['wf_instance']
-
-        # coordinates
+        self.evaluator = GCLEvaluator(self.wf_instance, nTurbines)
+
+        # the wake of a turbine is assumed to stay within a cone of this (tangent of the) half angle around the
+        # turbine's rotor when finding which turbines it can influence for the gradients. this is conservative for the
+        # Larsen model, but derivatives of turbines outside of the cone are taken to be zero. set
+        # model_options['gradient_wake_spread'] to None to difference every turbine separately instead.
+        self.gradient_wake_spread = model_options.get('gradient_wake_spread', 0.2)
+        self.gradient_form = model_options.get('gradient_form', 'forward')
+        self.gradient_step_size = 1.0e-6
+
+        # coordinates, GCL rotates the original coordinates to the wind frame itself. the wind frame coordinates are
+        # only used to find which turbines can influence each other
+        self.add_param('turbineX', val=np.zeros(nTurbines), units='m')
+        self.add_param('turbineY', val=np.zeros(nTurbines), units='m')
         self.add_param('turbineXw', val=np.zeros(nTurbines), units='m')
         self.add_param('turbineYw', val=np.zeros(nTurbines), units='m')
         self.add_param('turbineZ', val=np.zeros(nTurbines), units='m')
@@ -68,46 +230,193 @@ class GC_Larsen(Component):
         self.add_param('Ct', np.zeros(nTurbines))
         # TODO: get rid of above params
 
+    def _hub_velocity(self, params, turbineX, turbineY, H):
+
+        return self.evaluator(turbineX, turbineY, H, params['wind_speed'], params['wind_direction'],
+                              params['model_params:Ia'])
+
     def solve_nonlinear(self, params, unknowns, resids):
 
-        #Define WindTurbine
-        WS = params['wind_speed']
-        WD = params['wind_direction']
+        unknowns['wtVelocity%i' % self.direction_id] = self._hub_velocity(params, params['turbineX'],
+                                                                          params['turbineY'], params['hubHeight'])
 
-        xcoord = params['turbineXw']
-        ycoord = params['turbineYw']
+    def influence_pattern(self, params):
+        """ the wake_influence_pattern of this direction """
 
-        nTurbines = xcoord.size
+        return wake_influence_pattern(params['turbineXw'], params['turbineYw'], params['rotorDiameter'],
+                                      wake_spread=self.gradient_wake_spread)
 
-        # Does opposite translation that is done in WindFarm -#
-        angle = np.radians(270.+WD)
-        ROT = np.array([[np.cos(angle), -np.sin(angle)],
-        [np.sin(angle), np.cos(angle)]])
-        [xcoord, ycoord] = np.dot(ROT, [xcoord, ycoord])
-        a = np.array([xcoord, ycoord])
+    def linearize(self, params, unknowns, resids):
 
-        #np.savetxt('test_coord.dat',a.T)
-        #-----------------------------------------------------#
+        # GCL is compiled Fortran, so the gradients are found with finite differences, perturbing groups of turbines
+        # that do not influence the same turbines at once
+        if depends_on_design_variable(self, 'rotorDiameter'):
+            raise ValueError('%s: GCL takes the rotor size from the wind farm instance, rotorDiameter can not be a '
+                             'design variable' % self.pathname)
 
-        H = params['hubHeight']
+        direction_id = self.direction_id
+        velocity = unknowns['wtVelocity%i' % direction_id]
+        nTurbines = velocity.size
+
+        def hub_velocity(turbineX, turbineY, hubHeight):
+            return self._hub_velocity(params, turbineX, turbineY, hubHeight)
+
+        inputs = {'turbineX': params['turbineX'], 'turbineY': params['turbineY'], 'hubHeight': params['hubHeight']}
+        dvelocity = compressed_fd_jacobian(hub_velocity, inputs, velocity, self.influence_pattern(params),
+                                           step_size=self.gradient_step_size, form=self.gradient_form)
+
+        J = {}
+        for name in inputs:
+            J['wtVelocity%i' % direction_id, name] = sparse.csr_matrix(dvelocity[name])
+
+        # GCL takes the rotor size from the wind farm instance (which is not a design variable, see above), and the
+        # wind frame coordinates only set the pattern
+        for name in ['turbineXw', 'turbineYw', 'rotorDiameter']:
+            J['wtVelocity%i' % direction_id, name] = sparse.csr_matrix((nTurbines, nTurbines))
+
+        return J
+
+
+class BatchedGC_Larsen(Component):
+    """
+    GC_Larsen for every flow case (direction and speed pair) of a wind rose at once, giving an (nDirections, nTurbines)
+    velocity array. The gradients are taken as in GC_Larsen.
+
+    This is not a single batched GCL call: the Fortran GCL ('fort_gcl') is still called once per flow case, in a
+    Python loop. What is batched is the OpenMDAO side, i.e. one component, one persistent GCL model and one Jacobian
+    for all flow cases instead of a direction group with its own GCL model per flow case.
+    """
+
+    def __init__(self, nTurbines, nDirections=1, model_options=None):
+        super(BatchedGC_Larsen, self).__init__()
 
+        self.nTurbines = nTurbines
+        self.nDirections = nDirections
+        self.datasize = model_options['datasize']
+
+        self.evaluator = GCLEvaluator(model_options['wf_instance'], nTurbines)
+
+        # there are no analytic gradients for the GCL model, see GC_Larsen for the compressed finite differences
+        self.gradient_wake_spread = model_options.get('gradient_wake_spread', 0.2)
+        self.gradient_form = model_options.get('gradient_form', 'forward')
+        self.gradient_step_size = 1.0e-6
+
+        # flow cases
+        self.add_param('windSpeeds', val=np.zeros(nDirections)+8.0, units='m/s')
+        self.add_param('windDirections', val=np.zeros(nDirections), units='deg')
+
+        # coordinates in the original reference frame, which GCL rotates to the wind frame of each direction itself
+        self.add_param('turbineX', val=np.zeros(nTurbines), units='m')
+        self.add_param('turbineY', val=np.zeros(nTurbines), units='m')
+
+        # coordinates in the wind direction reference frame of each direction
+        self.add_param('turbineXw', val=np.zeros((nDirections, nTurbines)), units='m')
+        self.add_param('turbineYw', val=np.zeros((nDirections, nTurbines)), units='m')
 
+        self.add_param('rotorDiameter', val=np.zeros(nTurbines), units='m')
+        self.add_param('hubHeight', np.zeros(nTurbines), units='m')
+        self.add_param('model_params:Ia', val=0.0)   # Ambient Turbulence Intensity
+        self.add_param('model_params:air_density', val=0.0,  units='kg/m*m*m')
+
+        self.add_param('model_params:windSpeedToCPCT_wind_speed', np.zeros(self.datasize), units='m/s',
+                       desc='range of wind speeds', pass_by_obj=True)
+        self.add_param('model_params:windSpeedToCPCT_CP', np.zeros(self.datasize),
+                       desc='power coefficients', pass_by_obj=True)
+        self.add_param('model_params:windSpeedToCPCT_CT', np.zeros(self.datasize),
+                       desc='thrust coefficients', pass_by_obj=True)
+
+        #outputs
+        self.add_output('wtVelocity', val=np.zeros((nDirections, nTurbines)), units='m/s')
+
+        # GCL uses the turbine curves of the wind farm instance instead of these
+        self.add_param('yaw', np.zeros((nDirections, nTurbines)), units='deg')
+        self.add_param('Ct', np.zeros((nDirections, nTurbines)))
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        windSpeeds = params['windSpeeds']
+        windDirections = params['windDirections']
+        H = params['hubHeight']
         Ia = params['model_params:Ia']
 
+        # one GCL call per flow case, see the class docstring
+        wtVelocity = np.zeros((self.nDirections, self.nTurbines))
+        for k in range(0, self.nDirections):
+            wtVelocity[k] = self.evaluator(params['turbineX'], params['turbineY'], H, windSpeeds[k], windDirections[k],
+                                           Ia)
 
-        # -- to run using GCL.F, create gcl instance in wrapper -- #
-        self.wf_instance.xyz = np.vstack([a, H])
-        self.wf_instance.nWT = nTurbines
+        unknowns['wtVelocity'] = wtVelocity
 
-        #print(self.wf_instance.WT.refCurvesArray)
-        #quit()
+    def linearize(self, params, unknowns, resids):
 
-        gcl = GCL(WF=self.wf_instance, TI=Ia, z0=0.0001, NG=8, sup='lin', inflow='log')
-        gcl(WS=WS, WD=WD, version='fort_gcl')
-        hubVelocity = gcl(WS=WS, WD=WD).u_wt
-        # -------------------------------------------------------- #
+        # each direction only depends on its own flow case and wind frame coordinates, so the Jacobians are block
+        # diagonal by direction and the finite differences are taken one direction at a time, with the compressed
+        # steps of GC_Larsen for the turbine locations
+        if depends_on_design_variable(self, 'rotorDiameter'):
+            raise ValueError('%s: GCL takes the rotor size from the wind farm instance, rotorDiameter can not be a '
+                             'design variable' % self.pathname)
 
-        unknowns['wtVelocity%i' % self.direction_id] = hubVelocity
+        nTurbines = self.nTurbines
+        nDirections = self.nDirections
+        nRows = nDirections*nTurbines
+
+        windSpeeds = params['windSpeeds']
+        windDirections = params['windDirections']
+        Ia = params['model_params:Ia']
+        wtVelocity = unknowns['wtVelocity']
+
+        inputs = {'turbineX': params['turbineX'], 'turbineY': params['turbineY'], 'hubHeight': params['hubHeight']}
+        dlocation = dict((name, np.zeros((nRows, nTurbines))) for name in inputs)
+        dspeed = np.zeros(nRows)
+        ddirection = np.zeros(nRows)
+
+        for k in range(0, nDirections):
+            rows = slice(k*nTurbines, (k+1)*nTurbines)
+
+            def hub_velocity(turbineX, turbineY, hubHeight):
+                return self.evaluator(turbineX, turbineY, hubHeight, windSpeeds[k], windDirections[k], Ia)
+
+            pattern = wake_influence_pattern(params['turbineXw'][k], params['turbineYw'][k], params['rotorDiameter'],
+                                             wake_spread=self.gradient_wake_spread)
+            Jk = compressed_fd_jacobian(hub_velocity, inputs, wtVelocity[k], pattern,
+                                        step_size=self.gradient_step_size, form=self.gradient_form)
+            for name in inputs:
+                dlocation[name][rows] = Jk[name]
+
+            # the flow case of this direction, one step (or pair of steps) each
+            def flow_case_velocity(wind_speed, wind_direction):
+                return self.evaluator(inputs['turbineX'], inputs['turbineY'], inputs['hubHeight'], wind_speed,
+                                      wind_direction, Ia)
+
+            step = self.gradient_step_size*max(abs(windSpeeds[k]), 1.)
+            if self.gradient_form == 'forward':
+                dspeed[rows] = (flow_case_velocity(windSpeeds[k] + step, windDirections[k]) - wtVelocity[k])/step
+            else:
+                dspeed[rows] = (flow_case_velocity(windSpeeds[k] + step, windDirections[k]) -
+                                flow_case_velocity(windSpeeds[k] - step, windDirections[k]))/(2.*step)
+            step = self.gradient_step_size*max(abs(windDirections[k]), 1.)
+            if self.gradient_form == 'forward':
+                ddirection[rows] = (flow_case_velocity(windSpeeds[k], windDirections[k] + step) - wtVelocity[k])/step
+            else:
+                ddirection[rows] = (flow_case_velocity(windSpeeds[k], windDirections[k] + step) -
+                                    flow_case_velocity(windSpeeds[k], windDirections[k] - step))/(2.*step)
+
+        J = {}
+        for name in inputs:
+            J['wtVelocity', name] = sparse.csr_matrix(dlocation[name])
+
+        directions = np.repeat(np.arange(0, nDirections), nTurbines)
+        for name, dvelocity in [('windSpeeds', dspeed), ('windDirections', ddirection)]:
+            J['wtVelocity', name] = sparse.csr_matrix((dvelocity, (np.arange(0, nRows), directions)),
+                                                      shape=(nRows, nDirections))
+
+        # the wind frame coordinates only set the patterns, GCL takes the rotor size (not a design variable, see above)
+        # and turbine curves from the wind farm instance and does not model yaw
+        for name in ['turbineXw', 'turbineYw', 'Ct', 'yaw']:
+            J['wtVelocity', name] = sparse.csr_matrix((nRows, nRows))
+        J['wtVelocity', 'rotorDiameter'] = sparse.csr_matrix((nRows, nTurbines))
+
+        return J
 
 
 class larsen_wrapper(Group):
@@ -115,6 +424,9 @@ class larsen_wrapper(Group):
     This Group was written by Bryce Ingersoll
     """
 
+    # GCL takes the original coordinates and wind direction, which DirectionGroup promotes in addition
+    original_frame_params = ['turbineX', 'turbineY', 'wind_direction']
+
     def __init__(self, nTurbs, direction_id=0, wake_model_options=None):
         super(larsen_wrapper, self).__init__()
 
@@ -122,6 +434,21 @@ class larsen_wrapper(Group):
                  promotes=['*'])
 
 
+class larsen_batched_wrapper(Group):
+    """
+    larsen_wrapper for all directions at once, for use as the wake_model of a BatchedAEPGroup
+    """
+
+    # tells BatchedAEPGroup to add this group directly instead of evaluating it one direction at a time
+    batched_directions = True
+
+    def __init__(self, nTurbs, nDirections=1, wake_model_options=None):
+        super(larsen_batched_wrapper, self).__init__()
+
+        self.add('larsen_model', BatchedGC_Larsen(nTurbs, nDirections=nDirections, model_options=wake_model_options),
+                 promotes=['*'])
+
+
 # # Testing code for development only
 # if __name__ == "__main__":
 #
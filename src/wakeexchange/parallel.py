@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+parallel.py
+
+Parallel AEP evaluation on the cores of a single machine without MPI. Chunks of wind directions are evaluated by a
+multiprocessing pool, where every worker process keeps its own WakeModelKernel. The turbine locations, thrust and
+power coefficients and the cp curve are placed in shared memory once per evaluation, so only the flow cases of each
+chunk are sent to the workers. Each direction is computed by the same function whether it runs in a worker or (with
+nProcesses=1) in the calling process, so serial and parallel results are identical.
+"""
+
+import heapq
+import multiprocessing
+import time
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from wakeexchange.GeneralWindFarmComponents import WakeModelKernel, wind_frame_rotations, power_curve_cp, \
+    turbine_power, turbine_power_gradients, wake_interaction_pairs
+
+# state of the current worker process, set by _init_worker
+_worker = {}
+
+
+def _evaluator_state(nTurbines, wake_model, wake_model_options, model_params, constants, shared):
+    """ the kernel, constants and (views of the) shared arrays that every direction is evaluated with """
+
+    return {'kernel': WakeModelKernel(nTurbines, wake_model, wake_model_options), 'model_params': model_params,
+            'constants': constants,
+            'shared': dict((name, np.frombuffer(array, dtype=float)) for name, array in shared.items())}
+
+
+def _init_worker(*args):
+
+    _worker.update(_evaluator_state(*args))
+
+
+def _evaluate_direction(state, windDirection, windSpeed, gradients):
+    """ farm power in one direction and, if gradients is set, its derivatives w.r.t. turbineX and turbineY """
+
+    kernel = state['kernel']
+    constants = state['constants']
+    shared = state['shared']
+    velocity_name = 'wtVelocity%i' % kernel.direction_id
+
+    rotation = wind_frame_rotations(windDirection)[0]
+    turbineX = shared['turbineX']
+    turbineY = shared['turbineY']
+    Ct = np.copy(shared['Ct'])
+
+    # wrappers that take the axial induction (e.g. floris with axialIndProvided) get the one that gives Ct
+    inputs = dict(state['model_params'])
+    values = {'turbineXw': rotation[0, 0]*turbineX + rotation[0, 1]*turbineY,
+              'turbineYw': rotation[1, 0]*turbineX + rotation[1, 1]*turbineY,
+              'Ct': Ct, 'axialInduction': 0.5*(1. - np.sqrt(np.maximum(1. - Ct, 0.))),
+              'yaw%i' % kernel.direction_id: np.copy(shared['yaw']), 'rotorDiameter': constants['rotorDiameter'],
+              'hubHeight': constants['hubHeight'], 'wind_speed': windSpeed}
+    for name, value in values.items():
+        if name in kernel.param_meta:
+            inputs[name] = value
+
+    wtVelocity = np.copy(kernel.evaluate(inputs)[velocity_name])
+
+    Cp, dCpdV = power_curve_cp(wtVelocity, shared['Cp'], constants['cp_points'], shared['cp_curve_cp'],
+                               shared['cp_curve_vel'])
+    wtPower = turbine_power(wtVelocity, Cp, constants['rotorDiameter'], constants['air_density'],
+                            constants['generatorEfficiency'], constants['rated_power'], constants['cut_in_speed'])
+
+    if not gradients:
+        return np.sum(wtPower), None, None
+
+    J = kernel.linearize([velocity_name], ['turbineXw', 'turbineYw'])
+    dwtPower_dwtVelocity, _, _ = turbine_power_gradients(wtVelocity, Cp, dCpdV, wtPower, constants['rotorDiameter'],
+                                                         constants['air_density'], constants['generatorEfficiency'],
+                                                         constants['rated_power'], constants['cut_in_speed'])
+
+    dpower_dturbineXw = np.dot(dwtPower_dwtVelocity, J[velocity_name, 'turbineXw'])
+    dpower_dturbineYw = np.dot(dwtPower_dwtVelocity, J[velocity_name, 'turbineYw'])
+
+    # rotate back from the wind direction to the original reference frame
+    dpower_dturbineX = dpower_dturbineXw*rotation[0, 0] + dpower_dturbineYw*rotation[1, 0]
+    dpower_dturbineY = dpower_dturbineXw*rotation[0, 1] + dpower_dturbineYw*rotation[1, 1]
+
+    return np.sum(wtPower), dpower_dturbineX, dpower_dturbineY
+
+
+def _evaluate_chunk(task, state=None):
+    """ evaluates the directions of a task with the given state, or the state of the worker process """
+
+    directions, windDirections, windSpeeds, gradients = task
+    if state is None:
+        state = _worker
+
+    results = []
+    for direction, windDirection, windSpeed in zip(directions, windDirections, windSpeeds):
+        tic = time.time()
+        power, dpower_dturbineX, dpower_dturbineY = _evaluate_direction(state, windDirection, windSpeed, gradients)
+        results.append((direction, power, dpower_dturbineX, dpower_dturbineY, time.time() - tic))
+
+    return results
+
+
+def estimate_direction_costs(turbineX, turbineY, windDirections, rotorDiameter, rotor_solve=False, wake_spread=0.2):
+    """
+    Relative cost of evaluating each wind direction, taken as the number of turbines plus the number of turbine pairs
+    that interact through their wakes (see wake_interaction_pairs). With rotor_solve the cost is multiplied by the
+    length of the longest chain of waked turbines plus one, which bounds the number of Gauss-Seidel iterations in
+    RotorSolveGroup.
+    """
+
+    turbineX = np.asarray(turbineX, dtype=float)
+    turbineY = np.asarray(turbineY, dtype=float)
+    nTurbines = turbineX.size
+    rotations = wind_frame_rotations(windDirections)
+
+    costs = np.zeros(rotations.shape[0])
+    for direction, rotation in enumerate(rotations):
+        turbineXw = rotation[0, 0]*turbineX + rotation[0, 1]*turbineY
+        turbineYw = rotation[1, 0]*turbineX + rotation[1, 1]*turbineY
+        upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, rotorDiameter, wake_spread=wake_spread)
+        costs[direction] = nTurbines + upstream.size
+
+        if rotor_solve:
+            # longest chain of wakes, passing through the turbines from upstream to downstream
+            depth = np.zeros(nTurbines)
+            pairs = np.argsort(turbineXw[upstream], kind='mergesort')
+            for i, j in zip(upstream[pairs], downstream[pairs]):
+                if turbineXw[i] < turbineXw[j]:
+                    depth[j] = max(depth[j], depth[i] + 1.)
+            costs[direction] *= 1. + np.max(depth)
+
+    return costs
+
+
+def lpt_schedule(costs, nBins):
+    """
+    Assigns tasks of the given costs to nBins bins (ranks or processes) with the longest processing time first rule:
+    every task, from the most to the least expensive, goes to the bin with the lowest load so far.
+
+    :return: list of nBins sorted arrays of task indices
+    """
+
+    costs = np.asarray(costs, dtype=float)
+    bins = [[] for _ in range(0, nBins)]
+    loads = [(0., b) for b in range(0, nBins)]
+
+    for task in np.argsort(-costs, kind='mergesort'):
+        load, b = heapq.heappop(loads)
+        bins[b].append(task)
+        heapq.heappush(loads, (load + costs[task], b))
+
+    return [np.sort(np.array(tasks, dtype=int)) for tasks in bins]
+
+
+def schedule_loads(costs, bins):
+    """ total cost assigned to each bin """
+
+    costs = np.asarray(costs, dtype=float)
+
+    return np.array([np.sum(costs[tasks]) for tasks in bins])
+
+
+def schedule_imbalance(costs, bins):
+    """ load of the most loaded bin relative to the mean load, minus one (zero for a perfect balance) """
+
+    loads = schedule_loads(costs, bins)
+    mean = np.mean(loads)
+
+    return np.max(loads)/mean - 1. if mean > 0. else 0.
+
+
+class ProcessPoolAEPEvaluator(object):
+    """
+    Evaluates the AEP of a wind farm and its gradients w.r.t. turbineX and turbineY with the directions spread over
+    nProcesses worker processes (all cores if not given). Ct and Cp are per turbine, already adjusted for yaw as
+    AdjustCtCpYaw does; the cp curve is used instead of Cp if cp_curve_cp is given. The yaw angles (deg) are passed on
+    to the wake model, as is the axial induction that gives Ct.
+
+    With schedule='chunks' the directions are sent in order, chunk_size directions at a time. With schedule='lpt' they
+    are assigned to one task per process with lpt_schedule, using the times measured in the previous evaluation (or
+    estimate_direction_costs for the first one). After every evaluation direction_times holds the measured time of
+    each direction and imbalance the resulting schedule_imbalance of the tasks.
+
+    Use as a context manager, or call close() when done, to stop the worker processes.
+    """
+
+    def __init__(self, nTurbines, wake_model, wake_model_options=None, model_params=None, rotorDiameter=126.4,
+                 hubHeight=90., generatorEfficiency=0.944, air_density=1.1716, rated_power=5000., cut_in_speed=3.,
+                 cp_curve_cp=None, cp_curve_vel=None, nProcesses=None, chunk_size=1, schedule='chunks'):
+
+        if schedule not in ['chunks', 'lpt']:
+            raise ValueError('schedule must be one of ["chunks", "lpt"]')
+
+        self.nTurbines = nTurbines
+        self.nProcesses = nProcesses if nProcesses is not None else multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.schedule = schedule
+        self.direction_times = None
+        self.imbalance = None
+
+        cp_points = np.size(cp_curve_cp) if cp_curve_cp is not None else 1
+        self.constants = constants = {'rotorDiameter': np.zeros(nTurbines) + rotorDiameter,
+                                      'hubHeight': np.zeros(nTurbines) + hubHeight,
+                                      'generatorEfficiency': np.zeros(nTurbines) + generatorEfficiency,
+                                      'air_density': air_density, 'rated_power': np.zeros(nTurbines) + rated_power,
+                                      'cut_in_speed': np.zeros(nTurbines) + cut_in_speed, 'cp_points': cp_points}
+
+        # inputs that change between evaluations are written to shared memory, the workers only read them
+        self._shared = dict((name, RawArray('d', size)) for name, size in [('turbineX', nTurbines),
+                                                                             ('turbineY', nTurbines),
+                                                                             ('Ct', nTurbines), ('Cp', nTurbines),
+                                                                             ('yaw', nTurbines),
+                                                                             ('cp_curve_cp', cp_points),
+                                                                             ('cp_curve_vel', cp_points)])
+        self.shared = dict((name, np.frombuffer(array, dtype=float)) for name, array in self._shared.items())
+        if cp_curve_cp is not None:
+            self.shared['cp_curve_cp'][:] = cp_curve_cp
+            self.shared['cp_curve_vel'][:] = cp_curve_vel
+
+        # worker processes keep their state in the module, in the calling process it stays with this evaluator
+        initargs = (nTurbines, wake_model, wake_model_options, dict(model_params or {}), constants, self._shared)
+        if self.nProcesses > 1:
+            self.pool = multiprocessing.Pool(self.nProcesses, initializer=_init_worker, initargs=initargs)
+            self.state = None
+        else:
+            self.pool = None
+            self.state = _evaluator_state(*initargs)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+    def close(self):
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def _bins(self, windDirections):
+        """ the directions of each task """
+
+        nDirections = np.size(windDirections)
+
+        if self.schedule == 'chunks':
+            return [np.arange(start, min(start + self.chunk_size, nDirections))
+                    for start in range(0, nDirections, self.chunk_size)]
+
+        if self.direction_times is not None and self.direction_times.size == nDirections:
+            costs = self.direction_times
+        else:
+            costs = estimate_direction_costs(self.shared['turbineX'], self.shared['turbineY'], windDirections,
+                                             self.constants['rotorDiameter'])
+
+        return [tasks for tasks in lpt_schedule(costs, self.nProcesses) if tasks.size > 0]
+
+    def _run(self, tasks):
+
+        if self.pool is None:
+            return [_evaluate_chunk(task, self.state) for task in tasks]
+        return self.pool.map(_evaluate_chunk, tasks)
+
+    def evaluate(self, turbineX, turbineY, Ct, Cp, windDirections, windSpeeds, windFrequencies, gradients=False,
+                 yaw=0.):
+        """
+        :return: dict with dirPowers (kW) and AEP (kWh), and if gradients is set also the per-direction Jacobian
+                 blocks dirPowers_turbineX and dirPowers_turbineY (nDirections, nTurbines) and AEP_turbineX and
+                 AEP_turbineY (nTurbines)
+        """
+
+        windDirections = np.atleast_1d(np.asarray(windDirections, dtype=float))
+        windSpeeds = np.zeros(windDirections.size) + windSpeeds
+        windFrequencies = np.zeros(windDirections.size) + windFrequencies
+
+        self.shared['turbineX'][:] = turbineX
+        self.shared['turbineY'][:] = turbineY
+        self.shared['Ct'][:] = Ct
+        self.shared['Cp'][:] = Cp
+        self.shared['yaw'][:] = yaw
+
+        bins = self._bins(windDirections)
+        tasks = [(directions, windDirections[directions], windSpeeds[directions], gradients) for directions in bins]
+
+        dirPowers = np.zeros(windDirections.size)
+        dirPowers_turbineX = np.zeros((windDirections.size, self.nTurbines))
+        dirPowers_turbineY = np.zeros((windDirections.size, self.nTurbines))
+        direction_times = np.zeros(windDirections.size)
+        for chunk in self._run(tasks):
+            for direction, power, dpower_dturbineX, dpower_dturbineY, seconds in chunk:
+                dirPowers[direction] = power
+                direction_times[direction] = seconds
+                if gradients:
+                    dirPowers_turbineX[direction] = dpower_dturbineX
+                    dirPowers_turbineY[direction] = dpower_dturbineY
+
+        self.direction_times = direction_times
+        self.imbalance = schedule_imbalance(direction_times, bins)
+
+        # number of hours in a year
+        hours = 8760.0
+
+        results = {'dirPowers': dirPowers, 'AEP': np.sum(dirPowers*windFrequencies)*hours}
+        if gradients:
+            results.update({'dirPowers_turbineX': dirPowers_turbineX, 'dirPowers_turbineY': dirPowers_turbineY,
+                            'AEP_turbineX': np.dot(windFrequencies, dirPowers_turbineX)*hours,
+                            'AEP_turbineY': np.dot(windFrequencies, dirPowers_turbineY)*hours})
+
+        return results
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+solvers.py
+
+Nonlinear solver for the coupling of the rotor (Ct/Cp) and wake model components in RotorSolveGroup. During an
+optimization consecutive designs are close, so each solve can start from the state of the last converged solve, and
+the fixed-point iterations can be accelerated with Aitken's dynamic relaxation. Both are off by default. The number of
+iterations of every solve is kept, so the effect can be checked:
+
+    prob = Problem(root=AEPGroup(nTurbines, nDirections, use_rotor_components=True,
+                                 rotor_solver_options={'aitken': True, 'warm_start': True}, ...))
+    ...
+    print(rotor_iteration_counts(prob.root))
+"""
+
+from math import isnan
+
+import numpy as np
+
+from openmdao.api import Component, IndepVarComp, NLGaussSeidel
+from openmdao.core.system import AnalysisError
+from openmdao.solvers.solver_base import error_wrap_nl
+from openmdao.util.record_util import update_local_meta, create_local_meta
+
+
+class AcceleratedNLGaussSeidel(NLGaussSeidel):
+    """
+    NLGaussSeidel with warm starts and Aitken relaxation.
+
+    Options (in addition to those of NLGaussSeidel)
+    -------
+    options['warm_start'] : bool(False)
+        Start each solve from the coupled outputs of the last converged solve (solves that did not converge are not
+        used). Otherwise, as with NLGaussSeidel, each solve starts from whatever values the unknowns hold.
+    options['aitken'] : bool(False)
+        Relax the coupled outputs in each iteration with Aitken's dynamic relaxation factor.
+    options['aitken_initial'] : float(1.0)
+        Relaxation factor of the first relaxed iteration.
+    options['aitken_min'], options['aitken_max'] : float(0.1), float(1.5)
+        Bounds of the relaxation factor.
+
+    The coupled outputs are the outputs that a subsystem reads before (or while) the subsystem computing them runs,
+    e.g. wtVelocity in RotorSolveGroup. Other unknowns, in particular IndepVarComp outputs, are never changed.
+
+    The iteration count of every solve is appended to iteration_history. Aitken relaxation uses dot products of the
+    local unknowns, so the owning group must not be distributed over several processes (each RotorSolveGroup belongs
+    to a single direction group, which always runs on one process).
+    """
+
+    def __init__(self):
+        super(AcceleratedNLGaussSeidel, self).__init__()
+
+        opt = self.options
+        opt.add_option('warm_start', False,
+                       desc='Start from the coupled outputs of the last converged solve.')
+        opt.add_option('aitken', False,
+                       desc='Use Aitken dynamic relaxation.')
+        opt.add_option('aitken_initial', 1.0, lower=0.0,
+                       desc='Initial Aitken relaxation factor.')
+        opt.add_option('aitken_min', 0.1, lower=0.0,
+                       desc='Lower bound of the Aitken relaxation factor.')
+        opt.add_option('aitken_max', 1.5, lower=0.0,
+                       desc='Upper bound of the Aitken relaxation factor.')
+
+        self.print_name = 'NLN_AGS'
+        self.iteration_history = []
+        self.converged_state = None
+
+    def _coupled_indices(self, system, unknowns):
+        """ indices in unknowns.vec of the outputs that are read by a subsystem running before (or as) their source """
+
+        prefix = system.pathname + '.' if system.pathname else ''
+        order = dict((name, i) for i, name in enumerate(system._subsystems.keys()))
+        slices = dict((acc.meta['pathname'], acc.slice) for acc in unknowns._dat.values() if acc.slice is not None)
+
+        indices = []
+        for target, (source, idxs) in system.connections.items():
+            if not target.startswith(prefix) or source not in slices:
+                continue
+            target_position = order.get(target[len(prefix):].split('.')[0])
+            source_position = order.get(source[len(prefix):].split('.')[0])
+            if target_position is None or source_position is None or target_position > source_position:
+                continue
+            owner = system.find_subsystem(source[len(prefix):].rsplit('.', 1)[0])
+            if isinstance(owner, IndepVarComp):
+                continue
+            start, end = slices[source]
+            indices.append(np.arange(start, end))
+
+        if len(indices) == 0:
+            return np.zeros(0, dtype=int)
+
+        return np.unique(np.concatenate(indices))
+
+    def reset(self):
+        """ forget the warm start state and the iteration history """
+
+        self.iteration_history = []
+        self.converged_state = None
+
+    @error_wrap_nl
+    def solve(self, params, unknowns, resids, system, metadata=None):
+        """ Solves the system using relaxed Gauss Seidel iterations, see NLGaussSeidel.solve. """
+
+        atol = self.options['atol']
+        rtol = self.options['rtol']
+        utol = self.options['utol']
+        maxiter = self.options['maxiter']
+        iprint = self.options['iprint']
+        aitken = self.options['aitken']
+
+        # Initial run
+        self.iter_count = 1
+
+        # Metadata setup
+        local_meta = create_local_meta(metadata, system.pathname)
+        system.ln_solver.local_meta = local_meta
+        update_local_meta(local_meta, (self.iter_count,))
+
+        coupled = self._coupled_indices(system, unknowns)
+
+        # Warm start from the last converged state
+        if self.options['warm_start'] and self.converged_state is not None and \
+                self.converged_state.shape == coupled.shape:
+            unknowns.vec[coupled] = self.converged_state
+
+        previous = np.copy(unknowns.vec)
+
+        # Initial Solve
+        system.children_solve_nonlinear(local_meta)
+        self.recorders.record_iteration(system, local_meta)
+
+        if maxiter == 1:
+            self.iteration_history.append(self.iter_count)
+            return
+
+        resids = system.resids
+
+        # Evaluate Norm
+        system.apply_nonlinear(params, unknowns, resids)
+        normval = resids.norm()
+        basenorm = normval if normval > atol else 1.0
+        u_norm = 1.0e99
+
+        if iprint == 2:
+            self.print_norm(self.print_name, system, 1, normval, basenorm)
+
+        # the unrelaxed update of the last iteration and the relaxation factor applied to it
+        step = unknowns.vec[coupled] - previous[coupled]
+        theta = self.options['aitken_initial']
+        relaxed = False
+
+        while self.iter_count < maxiter and \
+                normval > atol and \
+                normval/basenorm > rtol and \
+                u_norm > utol:
+
+            # Metadata update
+            self.iter_count += 1
+            update_local_meta(local_meta, (self.iter_count,))
+            previous[:] = unknowns.vec
+
+            # Runs an iteration
+            system.children_solve_nonlinear(local_meta)
+
+            if aitken and coupled.size > 0:
+                new_step = unknowns.vec[coupled] - previous[coupled]
+                change = new_step - step
+                denominator = np.dot(change, change)
+                if denominator > 0.:
+                    theta = np.clip(-theta*np.dot(step, change)/denominator, self.options['aitken_min'],
+                                    self.options['aitken_max'])
+                unknowns.vec[coupled] = previous[coupled] + theta*new_step
+                step = new_step
+                relaxed = theta != 1.
+
+            self.recorders.record_iteration(system, local_meta)
+
+            # Evaluate Norm
+            system.apply_nonlinear(params, unknowns, resids)
+            normval = resids.norm()
+            u_norm = np.linalg.norm(unknowns.vec - previous)
+
+            if iprint == 2:
+                self.print_norm(self.print_name, system, self.iter_count, normval,
+                                basenorm, u_norm=u_norm)
+
+        # make the outputs consistent with their inputs after a relaxed last iteration
+        if relaxed and self.iter_count < maxiter:
+            self.iter_count += 1
+            update_local_meta(local_meta, (self.iter_count,))
+            system.children_solve_nonlinear(local_meta)
+            self.recorders.record_iteration(system, local_meta)
+            system.apply_nonlinear(params, unknowns, resids)
+            normval = resids.norm()
+
+        self.iteration_history.append(self.iter_count)
+
+        # Final residual print if you only want the last one
+        if iprint == 1:
+            self.print_norm(self.print_name, system, self.iter_count, normval,
+                            basenorm, u_norm=u_norm)
+
+        if self.iter_count >= maxiter or isnan(normval):
+            msg = 'FAILED to converge after %d iterations' % self.iter_count
+            fail = True
+        else:
+            fail = False
+            self.converged_state = unknowns.vec[coupled]
+
+        if iprint > 0 or (fail and iprint > -1):
+            if not fail:
+                msg = 'Converged in %d iterations' % self.iter_count
+
+            self.print_norm(self.print_name, system, self.iter_count, normval,
+                            basenorm, msg=msg)
+
+        if fail and self.options['err_on_maxiter']:
+            raise AnalysisError("Solve in '%s': AcceleratedNLGaussSeidel %s" %
+                                (system.pathname, msg))
+
+
+def rotor_iteration_counts(group):
+    """
+    Iteration counts of the AcceleratedNLGaussSeidel solvers of group and its (local) subsystems, as a dict of
+    iteration count lists (one entry per solve) keyed by the pathname of the solver's group. Components that solve
+    the rotor coupling themselves (RotorSweepSolve) are included with their number of wake model evaluations.
+    """
+
+    counts = {}
+    for system in group.subsystems(local=True, recurse=True, include_self=True):
+        if isinstance(getattr(system, 'nl_solver', None), AcceleratedNLGaussSeidel):
+            counts[system.pathname] = list(system.nl_solver.iteration_history)
+        elif isinstance(system, Component) and hasattr(system, 'iteration_history'):
+            counts[system.pathname] = list(system.iteration_history)
+
+    return counts
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+turbines.py
+
+Registry of turbine types. Each type is described by a windIO style YAML file (hub height, rotor diameter, rated
+power, power and thrust curves, ...) and by pickled Cp/Ct curves as used for gen_params:windSpeedToCPCT_*. Nothing is
+read until it is first used, and every file is read only once per process. The curves are stored as read-only arrays
+that all components of a problem share instead of holding their own copies:
+
+    nrel5mw = get_turbine_type('NREL5MW')
+    nrel5mw.rotor_diameter                  # 126.4
+    curves = nrel5mw.cpct_table('smooth')   # curves.wind_speed, curves.CP, curves.CT
+    prob = Problem(root=AEPGroup(nTurbines, nDirections, use_rotor_components=True, turbine_type='NREL5MW', ...))
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+# installed with the package, see package_data in setup.py
+turbine_data_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'turbine_data')
+
+# Cp and Ct curves over wind speed, read-only views of a single (3, n) array
+CPCTTable = namedtuple('CPCTTable', ['wind_speed', 'CP', 'CT'])
+
+
+def _read_only(array):
+
+    array = np.ascontiguousarray(array, dtype=float)
+    array.setflags(write=False)
+
+    return array
+
+
+def load_pickle(filename):
+    """ loads a pickle written by Python 2 (such as NREL5MWCPCT_dict.p) under either Python version """
+
+    with open(filename, 'rb') as f:
+        if sys.version_info[0] >= 3:
+            return pickle.load(f, encoding='latin1')
+        return pickle.load(f)
+
+
+class TurbineType(object):
+    """
+    A turbine type with its properties read from yaml_file (the entry of its name in the turbine_types list) and its
+    Cp/Ct curves read from the pickled dicts in curve_files (a dict of curve kind, e.g. 'smooth' or 'tabulated', to
+    file name). Both are read on first use.
+    """
+
+    def __init__(self, name, yaml_file=None, curve_files=None):
+
+        self.name = name
+        self.yaml_file = yaml_file
+        self.curve_files = dict(curve_files or {})
+
+        self._properties = None
+        self._tables = {}
+
+    @property
+    def properties(self):
+        """ dict of the YAML description of this turbine type """
+
+        if self._properties is None:
+            if self.yaml_file is None:
+                raise ValueError('turbine type %s has no YAML description' % self.name)
+
+            # yaml is only needed, and imported, once a turbine type description is used
+            import yaml
+
+            with open(self.yaml_file, 'r') as f:
+                description = yaml.safe_load(f)
+
+            for properties in description.get('turbine_types', []):
+                if properties.get('name') == self.name:
+                    self._properties = properties
+                    break
+            else:
+                raise ValueError('turbine type %s is not described in %s' % (self.name, self.yaml_file))
+
+        return self._properties
+
+    @property
+    def hub_height(self):
+        return float(self.properties['hub_height'])
+
+    @property
+    def rotor_diameter(self):
+        return float(self.properties['rotor_diameter'])
+
+    @property
+    def rated_power(self):
+        return float(self.properties['rated_power'])
+
+    @property
+    def cut_in_speed(self):
+        return float(self.properties['cut_in_wind_speed'])
+
+    @property
+    def cut_out_speed(self):
+        return float(self.properties['cut_out_wind_speed'])
+
+    @property
+    def air_density(self):
+        return float(self.properties['air_density'])
+
+    def curve(self, name):
+        """ read-only (n, 2) array of a curve from the YAML description, e.g. 'power_curve' or 'c_t_curve' """
+
+        key = 'yaml:%s' % name
+        if key not in self._tables:
+            self._tables[key] = _read_only(self.properties[name])
+
+        return self._tables[key]
+
+    def cpct_table(self, kind='smooth'):
+        """ the Cp and Ct curves of the given kind as a CPCTTable """
+
+        if kind not in self._tables:
+            if kind not in self.curve_files:
+                raise ValueError('turbine type %s has no %s Cp/Ct curves, available are %s'
+                                 % (self.name, kind, sorted(self.curve_files.keys())))
+            curves = load_pickle(self.curve_files[kind])
+            block = _read_only(np.vstack([np.ravel(curves['wind_speed']), np.ravel(curves['CP']),
+                                          np.ravel(curves['CT'])]))
+            self._tables[kind] = CPCTTable(block[0], block[1], block[2])
+
+        return self._tables[kind]
+
+
+_turbine_types = {}
+
+
+def register_turbine_type(name, yaml_file=None, curve_files=None):
+    """ adds (or replaces) a turbine type in the registry, nothing is read until it is used """
+
+    _turbine_types[name] = TurbineType(name, yaml_file=yaml_file, curve_files=curve_files)
+
+    return _turbine_types[name]
+
+
+def get_turbine_type(turbine_type):
+    """ the registered TurbineType of the given name (TurbineType instances are returned as they are) """
+
+    if isinstance(turbine_type, TurbineType):
+        return turbine_type
+
+    if turbine_type not in _turbine_types:
+        raise ValueError('unknown turbine type "%s", registered are %s' % (turbine_type, sorted(_turbine_types.keys())))
+
+    return _turbine_types[turbine_type]
+
+
+def turbine_types():
+    """ names of the registered turbine types """
+
+    return sorted(_turbine_types.keys())
+
+
+register_turbine_type('NREL5MW', yaml_file=os.path.join(turbine_data_directory, 'NREL5MW.yml'),
+                      curve_files={'smooth': os.path.join(turbine_data_directory, 'NREL5MWCPCT_smooth_dict.p'),
+                                   'tabulated': os.path.join(turbine_data_directory, 'NREL5MWCPCT_dict.p')})
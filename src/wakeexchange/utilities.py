@@ -130,6 +130,33 @@ def interp_with_deriv(x, xp, yp):
     return y, np.diag(dydx), dydxp, dydyp
 
 
+def interp_with_slope(x, xp, yp):
+    """vectorized linear interpolation (same values as np.interp) and the slope dy/dx of the segment each point
+    falls in. the segments are found with a single searchsorted. yp may hold several curves along its first axis,
+    (nCurves, len(xp)), which then share the search. the slope is zero outside [xp[0], xp[-1]] where the values are
+    held constant"""
+
+    x = np.asarray(x, dtype=float)
+    xp = np.asarray(xp, dtype=float)
+    yp = np.asarray(yp, dtype=float)
+
+    # index of the first point of the segment containing each x
+    j = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, len(xp) - 2)
+
+    x1 = xp[j]
+    dx = xp[j+1] - x1
+    dy = yp[..., j+1] - yp[..., j]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(dx > 0., dy/dx, 0.)
+
+    # hold end values outside of the given points, as np.interp does
+    y = yp[..., j] + slope*(np.clip(x, xp[0], xp[-1]) - x1)
+    slope = np.where((x < xp[0]) | (x > xp[-1]), 0., slope)
+
+    return y, slope
+
+
 def cubic_with_deriv(x, xp, yp):
     """deprecated"""
 
@@ -931,6 +958,32 @@ def line_points(npts):
     return x, y
 
 
+def round_farm(rotor_diameter, center, radius, min_spacing=2.):
+    """turbine locations on concentric circles filling a round wind farm of the given center and radius (m),
+    starting with a turbine at the center. min_spacing is in rotor diameters"""
+
+    # normalize inputs (without modifying the arrays passed in)
+    radius = radius/rotor_diameter
+    center = np.asarray(center, dtype=float)/rotor_diameter
+
+    # calculate how many circles can be fit in the wind farm area
+    nCircles = int(np.floor(radius/min_spacing))
+    radii = np.linspace(radius/nCircles, radius, nCircles)
+    alpha_mins = 2.*np.arcsin(min_spacing/(2.*radii))
+    nTurbines_circles = np.floor(2. * np.pi / alpha_mins).astype(int)
+
+    alphas = 2.*np.pi/nTurbines_circles
+
+    # the center turbine followed by each circle in turn
+    circle_radii = np.repeat(radii, nTurbines_circles)
+    angles = np.concatenate([alphas[circle]*np.arange(0, nTurbines_circles[circle]) for circle in range(nCircles)])
+
+    turbineX = np.concatenate([[center[0]], center[0] + circle_radii*np.cos(angles)])
+    turbineY = np.concatenate([[center[1]], center[1] + circle_radii*np.sin(angles)])
+
+    return turbineX*rotor_diameter, turbineY*rotor_diameter
+
+
 
 
 
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+windrose.py
+
+Reading, re-binning and compression of wind roses, so that AEP can be estimated with fewer flow cases. All functions
+return (windDirections, windSpeeds, windFrequencies) arrays that can be used directly as the corresponding AEPGroup
+inputs.
+
+Whenever flow cases are combined, their frequencies are summed and the combined speed is the frequency weighted cubic
+mean of their speeds, which keeps the available wind power (frequency times speed cubed) of the wind rose unchanged.
+"""
+
+import numpy as np
+
+
+def read_windrose(filename, speed=None):
+    """
+    Reads a wind rose file with the columns direction (deg), speed (m/s) and frequency, such as
+    windrose_amalia_8ms.txt or nantucket_wind_rose_for_LES.txt. Lines starting with # are ignored. Files with only
+    direction and frequency columns can be read by giving the speed to use for every direction.
+
+    :return windDirections, windSpeeds, windFrequencies
+    """
+
+    data = np.atleast_2d(np.loadtxt(filename))
+
+    if data.shape[1] == 3:
+        return data[:, 0], data[:, 1], data[:, 2]
+
+    if data.shape[1] == 2:
+        if speed is None:
+            raise ValueError('%s has no speed column, a speed must be given' % filename)
+        return data[:, 0], np.ones(data.shape[0])*speed, data[:, 1]
+
+    raise ValueError('%s must have 2 or 3 columns, found %i' % (filename, data.shape[1]))
+
+
+def _circular_mean(directions, weights):
+    """ weighted mean of directions (deg) on the circle """
+
+    directions = np.radians(directions)
+    if np.sum(weights) <= 0.:
+        weights = np.ones_like(directions)
+
+    return np.mod(np.degrees(np.arctan2(np.sum(weights*np.sin(directions)), np.sum(weights*np.cos(directions)))),
+                  360.)
+
+
+def _speed_classes(directions, speeds, speed_bins=None):
+    """
+    speed class of each flow case. Flow cases are only combined within the same speed class. If speed_bins (bin edges
+    in m/s) is not given, roses with one speed per direction have a single class and roses with several speeds per
+    direction have one class per distinct speed.
+    """
+
+    if speed_bins is not None:
+        return np.digitize(speeds, speed_bins)
+
+    if np.unique(np.mod(directions, 360.)).size == directions.size:
+        return np.zeros(directions.size, dtype=int)
+
+    return np.unique(speeds, return_inverse=True)[1]
+
+
+def _combine(speeds, frequencies, sectors, classes, sector_directions):
+    """
+    Combines all flow cases with the same sector and speed class into one flow case in the direction of its sector.
+    Combinations without any frequency are dropped.
+    """
+
+    nClasses = np.max(classes) + 1
+    keys, index = np.unique(sectors*nClasses + classes, return_inverse=True)
+
+    total = np.bincount(index, weights=frequencies)
+    cubes = np.bincount(index, weights=frequencies*np.power(speeds, 3))
+
+    keep = total > 0.
+    windDirections = sector_directions[keys[keep] // nClasses]
+    windSpeeds = np.power(cubes[keep]/total[keep], 1./3.)
+    windFrequencies = total[keep]
+
+    order = np.lexsort((windSpeeds, windDirections))
+
+    return windDirections[order], windSpeeds[order], windFrequencies[order]
+
+
+def sector_overlaps(directions, width, nDirections, offset=0.):
+    """
+    Fraction of each input sector (centered on directions and width degrees wide) that lies in each of nDirections
+    equal sectors, the first of which is centered on offset (deg).
+
+    :return fractions: (directions.size, nDirections) array with rows that sum to one
+    """
+
+    directions = np.asarray(directions, dtype=float)
+    new_width = 360./nDirections
+
+    # work in a frame where the new sectors start at 0 deg, input sectors can extend past 360 deg
+    starts = np.mod(directions - 0.5*width - offset + 0.5*new_width, 360.)
+    ends = starts + width
+    edges = np.arange(0, 2*nDirections + 1)*new_width
+
+    lower = np.maximum(starts[:, np.newaxis], edges[np.newaxis, :-1])
+    upper = np.minimum(ends[:, np.newaxis], edges[np.newaxis, 1:])
+    overlap = np.maximum(upper - lower, 0.)
+
+    return (overlap[:, :nDirections] + overlap[:, nDirections:])/width
+
+
+def rebin_windrose(windDirections, windSpeeds, windFrequencies, nDirections, offset=0., width=None,
+                   speed_bins=None):
+    """
+    Re-bins a wind rose into nDirections equal sectors, the first of which is centered on offset (deg). Each input
+    flow case is taken to cover a sector of the given width (deg, by default 360 divided by the number of distinct
+    input directions) and its frequency is shared between the new sectors it overlaps.
+
+    :param speed_bins: optional speed bin edges (m/s), flow cases in different speed bins are not combined
+    :return windDirections, windSpeeds, windFrequencies
+    """
+
+    windDirections = np.asarray(windDirections, dtype=float)
+    windSpeeds = np.asarray(windSpeeds, dtype=float)
+    windFrequencies = np.asarray(windFrequencies, dtype=float)
+
+    if width is None:
+        width = 360./np.unique(np.mod(windDirections, 360.)).size
+
+    classes = _speed_classes(windDirections, windSpeeds, speed_bins)
+    fractions = sector_overlaps(windDirections, width, nDirections, offset)
+
+    # one entry for every part of an input flow case that falls in a new sector
+    cases, sectors = np.nonzero(fractions)
+    sector_directions = np.mod(offset + np.arange(0, nDirections)*360./nDirections, 360.)
+
+    return _combine(windSpeeds[cases], windFrequencies[cases]*fractions[cases, sectors], sectors, classes[cases],
+                    sector_directions)
+
+
+def merge_sectors(windDirections, windSpeeds, windFrequencies, min_frequency, speed_bins=None):
+    """
+    Repeatedly merges the direction sector with the lowest total frequency into its least frequent neighbour, until
+    every sector has a total frequency of at least min_frequency. Merged sectors point in the frequency weighted mean
+    direction of their parts.
+
+    :param speed_bins: optional speed bin edges (m/s), flow cases in different speed bins are not combined
+    :return windDirections, windSpeeds, windFrequencies
+    """
+
+    windDirections = np.asarray(windDirections, dtype=float)
+    windSpeeds = np.asarray(windSpeeds, dtype=float)
+    windFrequencies = np.asarray(windFrequencies, dtype=float)
+
+    classes = _speed_classes(windDirections, windSpeeds, speed_bins)
+    sector_directions, sectors = np.unique(np.mod(windDirections, 360.), return_inverse=True)
+    sector_frequencies = np.bincount(sectors, weights=windFrequencies)
+
+    # groups of neighbouring sectors, kept in circular order
+    groups = [[sector] for sector in range(0, sector_directions.size)]
+    totals = list(sector_frequencies)
+
+    while len(groups) > 1:
+        smallest = int(np.argmin(totals))
+        if totals[smallest] >= min_frequency:
+            break
+
+        nGroups = len(groups)
+        left = (smallest - 1) % nGroups
+        right = (smallest + 1) % nGroups
+        if totals[left] <= totals[right]:
+            groups[left] = groups[left] + groups[smallest]
+            totals[left] += totals[smallest]
+        else:
+            groups[right] = groups[smallest] + groups[right]
+            totals[right] += totals[smallest]
+
+        del groups[smallest]
+        del totals[smallest]
+
+    labels = np.zeros(sector_directions.size, dtype=int)
+    group_directions = np.zeros(len(groups))
+    for group, members in enumerate(groups):
+        labels[members] = group
+        group_directions[group] = _circular_mean(sector_directions[members], sector_frequencies[members])
+
+    return _combine(windSpeeds, windFrequencies, labels[sectors], classes, group_directions)
+
+
+def adaptive_windrose(power, windDirections, windSpeeds, windFrequencies, tolerance=1e-3, nStart=4, nMax=None,
+                      offset=0., speed_bins=None):
+    """
+    Finds the coarsest re-binning of a wind rose into nStart*2**k equal sectors whose expected wind farm power changes
+    by less than tolerance (relative) when the number of sectors is doubled. The change is returned as the error
+    estimate of the selected wind rose. If the tolerance is not met before the number of sectors exceeds nMax (by
+    default the number of distinct input directions), the finest re-binning is returned.
+
+    :param power: function power(windDirections, windSpeeds) that returns the wind farm power of each flow case,
+                  e.g. by setting and running an AEPGroup problem and returning its dirPowers. Each flow case is only
+                  evaluated once, even if it is part of several re-binnings.
+    :return windDirections, windSpeeds, windFrequencies, error
+    """
+
+    if nMax is None:
+        nMax = np.unique(np.mod(windDirections, 360.)).size
+
+    evaluated = {}
+
+    def expected_power(rose):
+        directions, speeds, frequencies = rose
+        keys = list(zip(directions, speeds))
+        new = [key for key in keys if key not in evaluated]
+        if len(new) > 0:
+            powers = power(np.array([key[0] for key in new]), np.array([key[1] for key in new]))
+            evaluated.update(zip(new, powers))
+        return np.sum(frequencies*np.array([evaluated[key] for key in keys]))
+
+    nDirections = nStart
+    rose = rebin_windrose(windDirections, windSpeeds, windFrequencies, nDirections, offset=offset,
+                          speed_bins=speed_bins)
+    expected = expected_power(rose)
+    error = np.inf
+
+    while 2*nDirections <= nMax:
+        nDirections *= 2
+        refined = rebin_windrose(windDirections, windSpeeds, windFrequencies, nDirections, offset=offset,
+                                 speed_bins=speed_bins)
+        refined_expected = expected_power(refined)
+
+        error = np.abs(refined_expected - expected)/max(np.abs(refined_expected), np.finfo(float).tiny)
+        if error < tolerance:
+            break
+
+        rose = refined
+        expected = refined_expected
+
+    windDirections, windSpeeds, windFrequencies = rose
+
+    return windDirections, windSpeeds, windFrequencies, error
+
+
+def weibull_bin_frequencies(windSpeedBins, weibull_k, weibull_A, directionFrequencies=None):
+    """
+    Frequency of each speed bin in each direction for a Weibull distribution of shape weibull_k and scale weibull_A
+    (m/s) per direction. The bin edges are halfway between the (increasing) bin speeds, the first bin starts at 0 m/s
+    and the last bin extends to infinity. The frequencies of each direction sum to its directionFrequencies value (one
+    if not given).
+
+    :return frequencies: (nDirections, nSpeeds) array
+    """
+
+    windSpeedBins = np.asarray(windSpeedBins, dtype=float)
+    weibull_k = np.atleast_1d(np.asarray(weibull_k, dtype=float))
+    weibull_A = np.atleast_1d(np.asarray(weibull_A, dtype=float))
+
+    edges = np.hstack([0., 0.5*(windSpeedBins[1:] + windSpeedBins[:-1]), np.inf])
+    cdf = 1. - np.exp(-np.power(edges[np.newaxis, :]/weibull_A[:, np.newaxis], weibull_k[:, np.newaxis]))
+    frequencies = np.diff(cdf, axis=1)
+
+    if directionFrequencies is not None:
+        frequencies *= np.asarray(directionFrequencies, dtype=float)[:, np.newaxis]
+
+    return frequencies
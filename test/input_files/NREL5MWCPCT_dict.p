@@ -1,53 +0,0 @@
-(dp1
-S'wind_speed'
-p2
-cnumpy.core.multiarray
-_reconstruct
-p3
-(cnumpy
-ndarray
-p4
-(I0
-tS'b'
-tRp5
-(I1
-(I202
-tcnumpy
-dtype
-p6
-(S'f8'
-I0
-I1
-tRp7
-(I3
-S'<'
-NNNI-1
-I-1
-I0
-tbI00
-S'\xecQ\xb8\x1e\x85\xeb\x07@\x00\x00\x00\x00\x00\x00\x08@;\x8e\xebQ\xf9\x0b\t@u\x1c\xd7\xa3\xf2\x17\n@\xb0\xaa\xc2\xf5\xeb#\x0b@\xea8\xaeG\xe5/\x0c@%\xc7\x99\x99\xde;\r@`U\x85\xeb\xd7G\x0e@\x9a\xe3p=\xd1S\x0f@\xea8\xaeG\xe5/\x10@\x08\x00\xa4\xf0\xe1\xb5\x10@%\xc7\x99\x99\xde;\x11@B\x8e\x8fB\xdb\xc1\x11@`U\x85\xeb\xd7G\x12@}\x1c{\x94\xd4\xcd\x12@\x9a\xe3p=\xd1S\x13@\xb8\xaaf\xe6\xcd\xd9\x13@\xd5q\\\x8f\xca_\x14@\xf28R8\xc7\xe5\x14@\x10\x00H\xe1\xc3k\x15@-\xc7=\x8a\xc0\xf1\x15@J\x8e33\xbdw\x16@hU)\xdc\xb9\xfd\x16@\x85\x1c\x1f\x85\xb6\x83\x17@\xa2\xe3\x14.\xb3\t\x18@\xc0\xaa\n\xd7\xaf\x8f\x18@\xddq\x00\x80\xac\x15\x19@\xfa8\xf6(\xa9\x9b\x19@\x18\x00\xec\xd1\xa5!\x1a@5\xc7\xe1z\xa2\xa7\x1a@R\x8e\xd7#\x9f-\x1b@pU\xcd\xcc\x9b\xb3\x1b@\x8d\x1c\xc3u\x989\x1c@\xaa\xe3\xb8\x1e\x95\xbf\x1c@\xc7\xaa\xae\xc7\x91E\x1d@\xe5q\xa4p\x8e\xcb\x1d@\x029\x9a\x19\x8bQ\x1e@\x1f\x00\x90\xc2\x87\xd7\x1e@=\xc7\x85k\x84]\x1f@Z\x8e{\x14\x81\xe3\x1f@\xbc\xaa\xb8\xde\xbe4 @J\x8e33\xbdw @\xd9q\xae\x87\xbb\xba @hU)\xdc\xb9\xfd @\xf68\xa40\xb8@!@\x85\x1c\x1f\x85\xb6\x83!@\x14\x00\x9a\xd9\xb4\xc6!@\xa2\xe3\x14.\xb3\t"@1\xc7\x8f\x82\xb1L"@\xc0\xaa\n\xd7\xaf\x8f"@N\x8e\x85+\xae\xd2"@\xddq\x00\x80\xac\x15#@lU{\xd4\xaaX#@\xfa8\xf6(\xa9\x9b#@\x89\x1cq}\xa7\xde#@\x18\x00\xec\xd1\xa5!$@\xa6\xe3f&\xa4d$@5\xc7\xe1z\xa2\xa7$@\xc4\xaa\\\xcf\xa0\xea$@R\x8e\xd7#\x9f-%@\xe0qRx\x9dp%@pU\xcd\xcc\x9b\xb3%@\xfe8H!\x9a\xf6%@\x8d\x1c\xc3u\x989&@\x1b\x00>\xca\x96|&@\xaa\xe3\xb8\x1e\x95\xbf&@9\xc73s\x93\x02\'@\xc7\xaa\xae\xc7\x91E\'@TB\x1d\xda\x14F\'@z[\xf6\x9d\xb2h\'@\x15\x14`\xde\x83\x8b\'@L\x90\xee\xe7\x88\xae\'@|\xda\xa7\x07\xc2\xd1\'@\xae\x8c\x04\x8b/\xf5\'@\x05{\xf0\xbf\xd1\x18(@\x0c_\xcb\xf4\xa8<(@$\x84ix\xb5`(@\xdft\x14\x9a\xf7\x84(@o\xa9\x8b\xa9o\xa9(@\xfc6\x05\xf7\x1d\xce(@\x16\x80.\xd3\x02\xf3(@2\xe6,\x8f\x1e\x18)@\x10|\x9e|q=)@I\xb9\x9a\xed\xfbb)@\xe5.\xb34\xbe\x88)@\xe3<\xf4\xa4\xb8\xae)@\xf1\xc8\xe5\x91\xeb\xd4)@\x1a\xf6\x8bOW\xfb)@\xa0\xddg2\xfc!*@\xc6Hx\x8f\xdaH*@\xc4k:\xbc\xf2o*@\xe3\xa1\xaa\x0eE\x97*@\x7f*E\xdd\xd1\xbe*@J\xe7\x06\x7f\x99\xe6*@\xaf\x1bnK\x9c\x0e+@)-{\x9a\xda6+@\xd8d\xb1\xc4T_+@A\xb2\x17#\x0b\x88+@\x01o9\x0f\xfe\xb0+@\xd1#\'\xe3-\xda+@\x95Nw\xf9\x9a\x03,@\xac)G\xadE-,@:t;Z.W,@\xca;\x81\\U\x81,@\x11\xa7\xce\x10\xbb\xab,@\xc3\xc1c\xd4_\xd6,@\xbdI\x0b\x05D\x01-@A}\x1b\x01h,-@\x8d\xeav\'\xccW-@k@\x8d\xd7p\x83-@) \\qV\xaf-@\xc7\xf0oU}\xdb-@6\xb3\xe4\xe4\xe5\x07.@\xfa\xd7f\x81\x904.@\x0e\x164\x8d}a.@\xdaB\x1ck\xad\x8e.@\x96+\x82~ \xbc.@\xeeo\\+\xd7\xe9.@\xc6]6\xd6\xd1\x17/@q\xce0\xe4\x10F/@\x0f\x05\x03\xbb\x94t/@^\x8e\xfb\xc0]\xa3/@\x9e!\x01]l\xd2/@{\xc1I{\xe0\x000@\x923\xe6\xfa\xad\x180@),\xb0\xe1\x9e00@@\xceOd\xb3H0@\x87\x8e\xbb\xb7\xeb`0@\xea\xa78\x11Hy0@\xa7\x90[\xa6\xc8\x910@<p\x08\xadm\xaa0@\xdd\x95s[7\xc30@\xb5\xef!\xe8%\xdc0@\xcc\x82\xe9\x899\xf50@\xab\xe3\xf1wr\x0e1@\x9d\xaf\xb4\xe9\xd0\'1@\xbb\x06\xfe\x16UA1@\xab\x06\xed7\xffZ1@\x02F\xf4\x84\xcft1@uP\xda6\xc6\x8e1@\xb0#\xba\x86\xe3\xa81@\xff\xac\x03\xae\'\xc31@\x93G|\xe6\x92\xdd1@\x96;?j%\xf81@\x00>\xbes\xdf\x122@\x17\xf1\xc1=\xc1-2@\xc0ej\x03\xcbH2@\x8f\x9d/\x00\xfdc2@\x86\r\xe2oW\x7f2@\xaa!\xab\x8e\xda\x9a2@`\xc1\r\x99\x86\xb62@q\xd4\xe6\xcb[\xd22@\xf4\xc8mdZ\xee2@\xee\x195\xa0\x82\n3@\xc7\xd6*\xbd\xd4&3@o+\x99\xf9PC3@k\xe9&\x94\xf7_3@\xa7\x11\xd8\xcb\xc8|3@\xfd^\x0e\xe0\xc4\x993@\xaa\xd1\x89\x10\xec\xb63@\x80;i\x9d>\xd43@\xf7\xcc*\xc7\xbc\xf13@\xf1\xa2\xac\xcef\x0f4@\x80U-\xf5<-4@Q\x87L|?K4@\x0cv\x0b\xa6ni4@|\x8b\xcd\xb4\xca\x874@\xa0\xefX\xebS\xa64@t\x1b\xd7\x8c\n\xc54@\xb3l\xd5\xdc\xee\xe34@w\xbaE\x1f\x01\x035@\x92\xea~\x98A"5@\xec\x87=\x8d\xb0A5@\xadY\xa4BNa5@V\xfb<\xfe\x1a\x815@\x9cu\xf8\x05\x17\xa15@Y\xd8/\xa0B\xc15@0\xd5\xa4\x13\x9e\xe15@5[\x82\xa7)\x026@w3]\xa3\xe5"6@h\x9e4O\xd2C6@I\xf2r\xf3\xefd6@T:\xee\xd8>\x866@\x0e\xd7\xe8H\xbf\xa76@O\x1f\x12\x8dq\xc96@]\x02\x87\xefU\xeb6@\xec\xaa\xd2\xbal\r7@\x1f#\xef9\xb6/7@V\xf9E\xb82R7@\x1e\xe6\xb0\x81\xe2t7@\nsz\xe2\xc5\x977@k\xa2^\'\xdd\xba7@%\x98\x8b\x9d(\xde7@iC\xa2\x92\xa8\x018@\x7f\t\xb7T]%8@hqR2GI8@\xb8\xd0qzfm8@5\xf9\x87|\xbb\x918@\xa8\xe7}\x88F\xb68@\x90s\xb3\xee\x07\xdb8@\x02\x00\x00\x00\x00\x009@\xc7K7\x89A\x009@'
-tbsS'CP'
-p8
-g3
-(g4
-(I0
-tS'b'
-tRp9
-(I1
-(I202
-tg7
-I00
-S'\x00\x00\x00\x00\x00\x00\x00\x00\xe0\xe2\x10\nE\xa7\xc8?\xcb\x06\x88\x05\x0e\x80\xcd?2\x05V\t\x1d\xce\xd0?l\x88\x95\x9c\x10\x8c\xd2?\xb6\xb5oh\x16\x06\xd4?\xfe\x8a\xbd\xdb\x00H\xd5?\xa8\xfe47R\\\xd6?\x8a\xd4\xe0\x91\xebK\xd7?5\x8d\x97\xec\xb2\x1d\xd8?N\x81\xaf*z\xce\xd8?"\x16,d\xc2l\xd9?\x10\x9e\xa7v\x7f\xf6\xd9?(\xd9\x11\x9e\xb2o\xda?\x92B\xdc\xa0\x1c\xdb\xda?\x13v\x1d\xfdo:\xdb?\xdc)\xd8\xa6\xf9\x8d\xdb?\xea\xbd\x80\xc0\xe0\xdb\xdb?\x8c\x87D.7\x1c\xdc?=\xb4\xe5\xf0\xabX\xdc?u\x9a\xa1\x08\xbe\x8f\xdc? \xd3 N\xb3\xbb\xdc?\xe8\xa3[5!\xe5\xdc?H\xa5\rD4\x0c\xdd?\xba\xe8\tn\x8f)\xdd?\xd6\xa0e\xe7\x1fB\xdd?\xac\x98G\xd3TY\xdd?\x98\xf8\xfdGDo\xdd?\xfb5*2\xbd\x80\xdd?\xe6\xf2\xd4\x86\x12\x8a\xdd?\xfav-\xa8\xe7\x92\xdd?j\xd6\x07/D\x9b\xdd?\x1e\xea\xef"/\xa3\xdd?\x90\xdcf\x07\xaf\xaa\xdd?\x1e\x16\xd5\x19h\xad\xdd?\x856i{\x18\xab\xdd?$\xe7\x89\xca\xe7\xa8\xdd?i8)\\\xd4\xa6\xdd?\xbe1\x03\xa2\xdc\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?`9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?`9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?`9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?`9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?\xe8\x1e&f\xb3\xa1\xdd?\x90\xe9\xc8\xce\x9e\x9e\xdd?0\x1fj\x94C\x91\xdd?\\?`v\x83\x80\xdd?\xdbG\x1a\'\'p\xdd?\xbb\xcb\xcc4+`\xdd?\xd7\xb2\xc9U\x8cP\xdd?\'\x8e\x16\xd51u\xdd?\x8bQ\xa4-@s\xdd?\xf3.\x06\xc4Z\xf1\xdc?+WhI\xb2q\xdc?]<\xc0\xde<\xf4\xdb?\x91Y\x8d\xd0\xf0x\xdb?\xa0(\x19\x96\xc4\xff\xda?;g\xba\xd0\xae\x88\xda?\xc6\x9c\x1bK\xa6\x13\xda?\xde\xd1\x84\xf8\xa1\xa0\xd9?\x0el(\xf4\x98/\xd9?\x87\x1fs\x80\x82\xc0\xd8?\x9f\xe9^\x06VS\xd8?C\x06\xc9\x14\x0b\xe8\xd7?P\xd3\xca_\x99~\xd7?_\x95\x15\xc0\xf8\x16\xd7?\x99\x10Q2!\xb1\xd6?\x7f\xe9|\xd6\nM\xd6?\x92\xc1T\xef\xad\xea\xd5?@\x03\xb7\xe1\x02\x8a\xd5?\xc7Q\x0e4\x02+\xd5?\xf4\x90\xbd\x8d\xa4\xcd\xd4?\xd4y\x8e\xb6\xe2q\xd4?\x9f\xb0"\x96\xb5\x17\xd4?\xd3Pg3\x16\xbf\xd3?>\xe5\n\xb4\xfdg\xd3?~\xc0\xf5[e\x12\xd3?\xcb\xab\xc4\x8cF\xbe\xd2?)\xe2E\xc5\x9ak\xd2? M\xf8\xa0[\x1a\xd2?i\xf9\x8c\xd7\x82\xca\xd1?\x13\xbaj<\n|\xd1?\xca\xef3\xbe\xeb.\xd1?ykNf!\xe3\xd0?wbmX\xa5\x98\xd0?\xbek\x1d\xd2qO\xd0?q|R*\x81\x07\xd0?\xd4\xb6\xef\xa1\x9b\x81\xcf?3\x06\x04\x9d\xa4\xf6\xce?\xdf\xd1\x04\x87\x12n\xce?bDz\xd0\xda\xe7\xcd?\x8e\xbb\x80\x18\xf3c\xcd?\xa7V\xfb+Q\xe2\xcc?I\x0e\xca\x04\xebb\xcc?\xd1F\x03\xc9\xb6\xe5\xcb?k\xce0\xca\xaaj\xcb?\xdf6\x90\x84\xbd\xf1\xca?\x96|V\x9e\xe5z\xca?\xe2\xec\xf6\xe6\x19\x06\xca?5<mVQ\x93\xc9?\xc0\xbe\x8a\x0c\x83"\xc9?\xff\xb5FP\xa6\xb3\xc8?\xc8\xa4\x11\x8f\xb2F\xc8?:\x9d+\\\x9f\xdb\xc7?\xe4z\xfdodr\xc7?\xe2\xfct\xa7\xf9\n\xc7?\x98\xb2c\x03W\xa5\xc6?\xc9\xae\xe0\xa7tA\xc6?d\xf5\xac\xdbJ\xdf\xc5?\xe9\x96\x9a\x07\xd2~\xc5?\x98n\xf6\xb5\x02 \xc5?\x05w\xf4\x91\xd5\xc2\xc4?r\xaa\x1egCg\xc4?\xb3b\xc6 E\r\xc4?\xb6.x\xc9\xd3\xb4\xc3?\xda\x11r\x8a\xe8]\xc3?\x16#\x1c\xab|\x08\xc3?\x12\x81\x83\x90\x89\xb4\xc2?X\x91\xd7\xbc\x08b\xc2?\xf3\x7f\xe9\xce\xf3\x10\xc2?\xe7\xf5\xad\x81D\xc1\xc1?\xe5\xfc\xc0\xab\xf4r\xc1?\x1c\x06\xec>\xfe%\xc1?G\x0b\xaeG[\xda\xc0?(\xc0\xc5\xec\x05\x90\xc0?\xf6\xcb\xbdn\xf8F\xc0?\x84\x02\xf6NZ\xfe\xbf?F\x17\x99\x13=q\xbf?\xaa\x15\xfcA\x8e\xe6\xbe?\xb7$\xd7 C^\xbe?\xfe\n/&Q\xd8\xbd?W\x8f\x84\xf6\xadT\xbd?Xq\x07dO\xd3\xbc?\n\xea\xccm+T\xbc?\xfa\xa5\t?8\xd7\xbb?\x0e(O.l\\\xbb?\x1a\x87\xcc\xbc\xbd\xe3\xba?\xc5v\x92\x95#m\xba?\xf8\x8d\xda\x8c\x94\xf8\xb9?\x8c\xbbQ\x9f\x07\x86\xb9?\xd9\xdbe\xf1s\x15\xb9?\x8ea\x96\xce\xd0\xa6\xb8?m\x03\xc8\xa8\x15:\xb8?bb\x9b\x17:\xcf\xb7?V\x9a\xc6\xd75f\xb7?\x87\xb1q\xca\x00\xff\xb6?\xb0\xd8\x95\xf4\x92\x99\xb6?\xcfp_~\xe45\xb6?U\xc9\x92\xb2\xed\xd3\xb5?L\x8b\xf3\xfd\xa6s\xb5?A\xc5\xae\xee\x08\x15\xb5?\x0c\x8d\xc73\x0c\xb8\xb4?#+\x86\x9c\xa9\\\xb4?\xc1\xc4\xe9\x17\xda\x02\xb4?Jz\x1c\xb4\x96\xaa\xb3?/\xee\xe9\x9d\xd8S\xb3?\\*8 \x99\xfe\xb2?{\xd9\x82\xa3\xd1\xaa\xb2?#\xcaX\xad{X\xb2?\x0f\xb1\xdb\xdf\x90\x07\xb2?w!B\xf9\n\xb8\xb1?\x03\xb1[\xd3\xe3i\xb1?\x18>\x17c\x15\x1d\xb1?\x1fO\x0b\xb8\x99\xd1\xb0?>\x81\x00\xfcj\x87\xb0?\x05\xfe}r\x83>\xb0?T\xdc\xaf\xf0\xba\xed\xaf?I\xc3\x7f\x06\xe7`\xaf?]G\xaeB\x80\xd6\xae?!\xe5\x85\xf1{N\xae?\x8d%\x85\x8e\xcf\xc8\xad?,k\x8e\xc3pE\xad?\xf9T\x1bhU\xc4\xac?\xee\xa7s\x80sE\xac?\xd7\xaf\xe7<\xc1\xc8\xab?R\x07\x0e\xf94N\xab?\xc3\xb8\x04;\xc5\xd5\xaa?\xdf\xa8\xb5\xb2h_\xaa?\x1e=\x1e9\x16\xeb\xa9?\x89.\x9a\xcf\xc4x\xa9?l|1\x9fk\x08\xa9?\xc6o\xe9\xf7\x01\x9a\xa8?\xec\xa2\x18P\x7f-\xa8?I\xff\xbdC\xdb\xc2\xa7?\xb6\xf3\tj \xc2\xa7?'
-tbsS'CT'
-p10
-g3
-(g4
-(I0
-tS'b'
-tRp11
-(I1
-(I202
-tg7
-I00
-S'\xc2)\x86-\x94\x14\xb1?\x810\x0cw\xc4\x85\xf1?\xbc\xe4\xe6_\n6\xf1?F8zI\xc1\xe9\xf0?\xdf|\x8f\x92M\xa1\xf0?\xc84uw\x07]\xf0?\'\xf4\xaa\xcf\xd0\x1c\xf0?p*\xbf\xd9\xcf\xc0\xef?d|g\xb2"O\xef?\xec\xf5_\xfe;\xe4\xee?hL\xa5\x9ev~\xee?\x1d\x10y\xac\xb5\x1e\xee?\xf8\xbb\xe9\x81\xf3\xc3\xed?F\xa2\xd9\x1c\xc3m\xed?\xfc\xd8$\xb8\x1f\x1c\xed?\xbai\xecxs\xce\xec?\xe5&A\xdcp\x84\xec?\xba\xb1H\xfd\xcc>\xec?\xf8\x00c\xb0\xfc\xfa\xeb?mIU\xbeC\xbb\xeb?\xca\x17IA\x93~\xeb?|\xd0\x82\xa5\xcdB\xeb?[\xfb\x9fKx\n\xeb?\x8f\x80\x96\xa9V\xd5\xea?D-\xda\xca4\xa0\xea?,D\xb5\xad\xdfl\xea?>%\xb4\xd9`<\xea?\xc5\xed\xf4&\x8a\x0e\xea?$\xc37\x95\xcb\xe1\xe9?^j\xae\r}\xb4\xe9?k=\xfe\xd8\x9c\x89\xe9?\xa9\x1e_\x16\x06a\xe9?\x9a5G\xa6\x96:\xe9?z\t%\xea.\x16\xe9?\xb2SN\xfa\xc1\xf1\xe8?\xe9\xa4n\xc8\t\xcd\xe8?\xbc\xbb\x00\x00=\xaa\xe8?\xb4\x9a\x93\x1fA\x89\xe8?V.#o\xfdi\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfa\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfa\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfa\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfa\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xf9\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfc\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\x9e\x8bg\x91\xc37\xe8?\xd54\xc1\xb0\xd1\x06\xe8?gWN\x07S\xd2\xe7?d&\x13/`\x9d\xe7?\x95Sq\xd5\xa8i\xe7?\xe4\xfa\x08\x17"7\xe7?,\xd4G\x8f\xc1\x05\xe7?\x87\x14\x13Wq\xcf\xe6?\xc4J,\xfc\xab\xc9\xe6?S\xa5d\xff\xe5\x81\xe5?\xaf\xf6W\x06\xba\x9b\xe4?\x1c\xe8\xfa(_\xdf\xe3?\xbaC\xa6\x97i:\xe3?\xa2\x19\x1b!P\xa4\xe2?\xf7Y\x8c\xddj\x19\xe2?F\\\xbeAo\x9b\xe1?V\xdf\xdfI\xac"\xe1?\xe9{\x17BH\xb3\xe0?P\xb4uP\xcdG\xe0?\\\xee\x19\xa15\xc7\xdf?\xea\x8d\xdc\xe4\xf0\x03\xdf?4\xd1\x02?!N\xde?\xd4zOa\xa0\x97\xdd?\t\xdap\xb6W\xeb\xdc?\x94\'b+\x1fD\xdc?b\xb6N\\h\xa2\xdb?x\x7f\x89[\xd3\x08\xdb?\x06\xc3z\xca\xeeq\xda?J5g\x97\x1b\xe2\xd9?\x94y\xa1\x03\tW\xd9?\x08\x12\x1daj\xce\xd8?|\x04]\xd2,M\xd8?\x96\xfe\xe0\xd8\xe6\xce\xd7?\xe4\xf8%\x06\xddR\xd7?I3d\xff\xd4\xdd\xd6?)@&n\xf7i\xd6?_\x97\xa7{\x92\xf3\xd5?\xbfG\xe1\xae\xfa\x83\xd5?\x9b\x82\x8a\xcb[\x16\xd5?\xa2\xd7\x08\xae\x8b\xaa\xd4?\xbcI\xf9\xe0\xb0C\xd4?\xe1\xe0`\x1f6\xdf\xd3?\xa3~\xc0\x81c|\xd3?\xc8\xe11\xf4Y\x1d\xd3?\x0e \x15%A\xc1\xd2?\xbarCI\xb8f\xd2?~]N\xf0\xb7\x0e\xd2?\xc1b\xa7\x89X\xba\xd1?\xec+1)pg\xd1?\x91\x7fF(\xfc\x15\xd1?\xf3\xcbj?)\xc7\xd0?\xb8\xc9a\x923u\xd0?b\xa5{\xc9U%\xd0?v\xa6\xba\xab=\xb0\xcf?7\xb0"b\x94\x1a\xcf?<?9C\x0e\x87\xce?\x8et\xf4\x01T\xf6\xcd?\x11\\y\xb0Yl\xcd?\xbe\x92Y\xcb\xb5\xe4\xcc?\xbc\xa1\x0f<f_\xcc?Q\xe8\xb9\xa2\x85\xde\xcb?\xe7\x1b\x94\n\xe2a\xcb?\x8c|\xf7\x18}\xe7\xca?\x89\xde\x19\tUo\xca?\xac\x8a\x0c\xf0\x0e\xfd\xc9?\x1a\x95Y\x85\x02\x8d\xc9?\xff\x076\xa6"\x1f\xc9?\xab\x07]\xf6L\xa8\xc8?"\x9e\x1a\x10Z6\xc8?\xa68%w=\xc6\xc7?\xc5\x12-\xb9\xf5W\xc7?\xc0\xb1d\xf3\xe3\xed\xc6?\xac\nsT9\x86\xc6?02\xac[[ \xc6?\xa4\xae/\xb0\xb7\xbc\xc5?\xf2\xe2z\xe0,]\xc5?\x01\xf5pie\xff\xc4?\xfe\xf9h\xf5c\xa3\xc4?\xad\xeb1\xe0\x87J\xc4?\xc9\x958\xfb\x8f\xf4\xc3?4N\xc8sY\xa0\xc3?T\x82\xf7W\xe4M\xc3?ZYQ\x06e\xff\xc2?\xcdn}i\xba\xb2\xc2?|\x112&\xceg\xc2?\xba\xec\x04\xda\xa9\x12\xc2?\xc73|\x1e\xab\xc0\xc1?g\x18\x93\x0b\xfbo\xc1?k\xe04P\xac \xc1?8\xf0\xfbJ\xe6\xd3\xc0?\x95U\xb5UK\x89\xc0?\xd8\x05\xef\x98\x08@\xc0?a\xc4\xb82!\xf0\xbf?\xebJj\xf1\xc6f\xbf?\xffl\xde^\xb0\xdf\xbe?\xf6\xd2UY\xd6[\xbe?\\\x10\xa6\xb8\x1c\xdc\xbd?\x8a\x84\xa2\xee\xe3`\xbd?\xf7\xae\xadjw\xe8\xbc?,&\xe1E\xd6r\xbc?d\xbf\xf9\xbe\xaf\x02\xbc?\xab\xaf\x91_\xa8\x95\xbb?.\xf3`\xe2j+\xbb?\xce\x0b\x91\xb7\x00\xc5\xba?\xb6\x86\xbcS\x16c\xba?\xd8\xab\xbb\x1e\x86\xee\xb9?C\x1d\x04*Jw\xb9?K\xdc\x97,>\x04\xb9?\x99\xde4\xac\xbb\x93\xb8?8\x9dnfT%\xb8?\x03\xf0 \x18\x8a\xb9\xb7?\x04\xd5O\x98\xa5Q\xb7?\xb2\x94\x17\xc4\xf4\xeb\xb6?\x0c\xb9\x87Yf\x88\xb6?\xf7\\\x03\xd3v(\xb6?{\x96\xf5\x14d\xcb\xb5?\xa4r>\x05\x8ap\xb5?h\xe6\x97\x7f?\x18\xb5?\x81\x1ex\xb6\xc2\xc3\xb4?\x11/\x0e\xb5\x83q\xb4?\xe2]w\x19t!\xb4?\xaf\x1fy|\xf4\xd4\xb3?\xa6\x8d\x8dZC\x8b\xb3?ru\xaf\xeb\xb9C\xb3?w\xc6\xb4\xc9\xdb\xfe\xb2?\x85\xfa\x98B\x8e\xbd\xb2?\x84\x19\xf2\xaad~\xb2?I\x13D\xdbeA\xb2?\xc8\x94\xb9Y\x94\xee\xb1?|\xfc\x9d\x13\xf9\x9b\xb1?\x80\x00\xde\xd3\xe0J\xb1?\xabe\xeb\xc4\xd5\xfb\xb0?\xd2*\x83\xd6a\xaf\xb0?\x1a\xa42\x00yd\xb0?\x80<\xefN\x1b\x1b\xb0?\x91\x8d\xdf\x9b~\xa9\xaf?<\xfa]@O \xaf?\xc2\xa3\xfb\xc3@\x9a\xae?\xce\xe0\xd1\'\x8f\x18\xae?\x9c\x9c\x14P\x8e\x9c\xad?u\xbeI\xa6\x07\xbd\xae?u\xbeI\xa6\x07\xbd\xae?'
-tbs.
\ No newline at end of file
@@ -1,53 +0,0 @@
-(dp1
-S'wind_speed'
-p2
-cnumpy.core.multiarray
-_reconstruct
-p3
-(cnumpy
-ndarray
-p4
-(I0
-tS'b'
-tRp5
-(I1
-(I28
-tcnumpy
-dtype
-p6
-(S'f8'
-I0
-I1
-tRp7
-(I3
-S'<'
-NNNI-1
-I-1
-I0
-tbI00
-S"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x04@\xea8\xaeG\xe5/\x0c@`U\x85\xeb\xd7G\x12@J\x8e33\xbdw\x16@5\xc7\xe1z\xa2\xa7\x1a@\x1f\x00\x90\xc2\x87\xd7\x1e@\x85\x1c\x1f\x85\xb6\x83!@\xfa8\xf6(\xa9\x9b#@pU\xcd\xcc\x9b\xb3%@z[\xf6\x9d\xb2h'@\xdft\x14\x9a\xf7\x84(@\xe3<\xf4\xa4\xb8\xae)@J\xe7\x06\x7f\x99\xe6*@\xac)G\xadE-,@k@\x8d\xd7p\x83-@\xeeo\\+\xd7\xe9.@),\xb0\xe1\x9e00@\xcc\x82\xe9\x899\xf50@\xff\xac\x03\xae'\xc31@\xaa!\xab\x8e\xda\x9a2@\xa7\x11\xd8\xcb\xc8|3@\x0cv\x0b\xa6ni4@\xadY\xa4BNa5@I\xf2r\xf3\xefd6@\x1e\xe6\xb0\x81\xe2t7@5\xf9\x87|\xbb\x918@\x00\x00\x00\x00\x00\x00>@"
-tbsS'CP'
-p8
-g3
-(g4
-(I0
-tS'b'
-tRp9
-(I1
-(I28
-tg7
-I00
-S'\x00\x00\x00\x00\x00\x00\x00\x00\xb6\xb5oh\x16\x06\xc4?\xb6\xb5oh\x16\x06\xd4?(\xd9\x11\x9e\xb2o\xda? \xd3 N\xb3\xbb\xdc?\xe6\xf2\xd4\x86\x12\x8a\xdd?i8)\\\xd4\xa6\xdd?`9^\x12m\xa4\xdd?b9^\x12m\xa4\xdd?\x90\xe9\xc8\xce\x9e\x9e\xdd?\xf3.\x06\xc4Z\xf1\xdc?\x0el(\xf4\x98/\xd9?\x92\xc1T\xef\xad\xea\xd5?~\xc0\xf5[e\x12\xd3?wbmX\xa5\x98\xd0?\xa7V\xfb+Q\xe2\xcc?\xc0\xbe\x8a\x0c\x83"\xc9?d\xf5\xac\xdbJ\xdf\xc5?\x16#\x1c\xab|\x08\xc3?(\xc0\xc5\xec\x05\x90\xc0?Xq\x07dO\xd3\xbc?\xd9\xdbe\xf1s\x15\xb9?U\xc9\x92\xb2\xed\xd3\xb5?\\*8 \x99\xfe\xb2?>\x81\x00\xfcj\x87\xb0?\xf9T\x1bhU\xc4\xac?l|1\x9fk\x08\xa9?\x00\x00\x00\x00\x00\x00\x00\x00'
-tbsS'CT'
-p10
-g3
-(g4
-(I0
-tS'b'
-tRp11
-(I1
-(I28
-tg7
-I00
-S'\x82\x1c\x99\x07\xa0\xb2\xf1?\x810\x0cw\xc4\x85\xf1?\xc84uw\x07]\xf0?F\xa2\xd9\x1c\xc3m\xed?|\xd0\x82\xa5\xcdB\xeb?^j\xae\r}\xb4\xe9?\xb4\x9a\x93\x1fA\x89\xe8?\xfa\x9d\xb9\xd8\x10c\xe8?\xfb\x9d\xb9\xd8\x10c\xe8?\xd54\xc1\xb0\xd1\x06\xe8?S\xa5d\xff\xe5\x81\xe5?\xe9{\x17BH\xb3\xe0?b\xb6N\\h\xa2\xdb?\xe4\xf8%\x06\xddR\xd7?\xe1\xe0`\x1f6\xdf\xd3?\x91\x7fF(\xfc\x15\xd1?\x11\\y\xb0Yl\xcd?\x1a\x95Y\x85\x02\x8d\xc9?02\xac[[ \xc6?T\x82\xf7W\xe4M\xc3?8\xf0\xfbJ\xe6\xd3\xc0?\x8a\x84\xa2\xee\xe3`\xbd?\xd8\xab\xbb\x1e\x86\xee\xb9?\x0c\xb9\x87Yf\x88\xb6?\xaf\x1fy|\xf4\xd4\xb3?|\xfc\x9d\x13\xf9\x9b\xb1?\xc2\xa3\xfb\xc3@\x9a\xae?\x00\x00\x00\x00\x00\x00\x00\x00'
-tbs.
\ No newline at end of file
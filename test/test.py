@@ -4,6 +4,7 @@ import numpy as np
 import os
 
 from wakeexchange.OptimizationGroups import AEPGroup
+from wakeexchange.GeneralWindFarmGroups import BatchedAEPGroup
 
 from fusedwake.WindTurbine import WindTurbine
 from fusedwake.WindFarm import WindFarm
@@ -401,5 +402,1257 @@ class TestGaussWrapper(unittest.TestCase):
         np.testing.assert_allclose(self.prob['wtVelocity0'], np.array([ 8., 8., 5.922961, 5.922961, 5.478532, 5.478241]))
 
 
+def larsen_wind_farm(nTurbines, rotorDiameter=126.4, hubHeight=90., air_density=1.1716):
+    """ fusedwake WindFarm of nTurbines NREL 5MW turbines for GC_Larsen (the layout is set by the component) """
+    import tempfile
+    from wakeexchange.turbines import get_turbine_type
+
+    nrel5mw = get_turbine_type('NREL5MW')
+    curves = nrel5mw.cpct_table('smooth')
+    power = 0.5*air_density*curves.CP*np.pi*(rotorDiameter/2.0)**2*curves.wind_speed**3
+
+    WT = WindTurbine(name='test_turbine', refCurvesFile=np.transpose([curves.wind_speed, power, curves.CT]),
+                     H=hubHeight, R=rotorDiameter/2.0)
+
+    layout = WTLayout(nrel5mw.yaml_file)
+    layout.data['layout'] = [{'position': [100.0*i, 100.0*i], 'turbine_type': 'NREL5MW', 'name': 'WT', 'row': 1}
+                             for i in range(0, nTurbines)]
+    layout.data['turbine_types'][0]['c_t_curve'] = np.transpose([curves.wind_speed, curves.CT]).tolist()
+    layout.data['turbine_types'][0]['power_curve'] = np.transpose([curves.wind_speed, power]).tolist()
+
+    handle, temp_yml = tempfile.mkstemp(suffix='.yml')
+    with os.fdopen(handle, 'w') as f:
+        yaml.dump(layout.data, f, default_flow_style=False)
+    try:
+        return WindFarm(name='Test_Farm', yml=temp_yml, array=np.ones((2, nTurbines)), WT=WT)
+    finally:
+        os.remove(temp_yml)
+
+
+class TestBatchedGCLarsen(unittest.TestCase):
+
+    def setUp(self):
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import wind_frame_rotations
+        from wakeexchange.larsen import BatchedGC_Larsen
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        windDirections = np.array([270., 240., 200.])
+        nTurbines = turbineX.size
+        nDirections = windDirections.size
+
+        rotations = wind_frame_rotations(windDirections)
+        turbineXw = rotations[:, 0, 0, np.newaxis]*turbineX + rotations[:, 0, 1, np.newaxis]*turbineY
+        turbineYw = rotations[:, 1, 0, np.newaxis]*turbineX + rotations[:, 1, 1, np.newaxis]*turbineY
+
+        model_options = {'datasize': 0, 'wf_instance': larsen_wind_farm(nTurbines)}
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('turbineX', turbineX, units='m'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('turbineY', turbineY, units='m'), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('turbineXw', turbineXw, units='m'), promotes=['*'])
+        prob.root.add('p3', IndepVarComp('turbineYw', turbineYw, units='m'), promotes=['*'])
+        prob.root.add('p4', IndepVarComp('windSpeeds', np.array([8., 10., 6.]), units='m/s'), promotes=['*'])
+        prob.root.add('p5', IndepVarComp('windDirections', windDirections, units='deg'), promotes=['*'])
+        prob.root.add('larsen', BatchedGC_Larsen(nTurbines, nDirections=nDirections, model_options=model_options),
+                      promotes=['*'])
+        prob.setup(check=False)
+
+        prob['hubHeight'] = np.ones(nTurbines)*90.
+        prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+        prob['model_params:Ia'] = 0.05
+
+        prob.run()
+
+        self.prob = prob
+        self.comp = prob.root.larsen
+
+    def testGradients(self):
+        J = self.prob.check_partial_derivatives(out_stream=None)['larsen']
+
+        for wrt in ['turbineX', 'turbineY', 'windSpeeds', 'Ct', 'yaw']:
+            np.testing.assert_allclose(J['wtVelocity', wrt]['J_fwd'], J['wtVelocity', wrt]['J_fd'],
+                                       rtol=1e-4, atol=1e-4)
+
+    def testEvaluations(self):
+        from wakeexchange.larsen import wake_influence_pattern, _color_columns
+
+        comp = self.comp
+        params = comp.params
+        evaluator = comp.evaluator
+        calls = []
+
+        def counted_evaluator(*args):
+            calls.append(1)
+            return evaluator(*args)
+
+        comp.evaluator = counted_evaluator
+        comp.linearize(params, comp.unknowns, comp.resids)
+
+        # one step per color and location input, and one per flow case input of each direction
+        expected = 0
+        for k in range(0, comp.nDirections):
+            pattern = wake_influence_pattern(params['turbineXw'][k], params['turbineYw'][k], params['rotorDiameter'])
+            expected += 3*len(_color_columns(pattern)) + 2
+        self.assertEqual(len(calls), expected)
+
+
+class TestLarsenColoring(unittest.TestCase):
+
+    def testColorColumns(self):
+        from wakeexchange.larsen import _color_columns
+
+        np.random.seed(seed=10)
+        pattern = (np.random.rand(20, 20) < 0.15) | np.eye(20, dtype=bool)
+        colors = _color_columns(pattern)
+
+        # every column has exactly one color, and the columns of a color do not share a row
+        np.testing.assert_array_equal(np.sort(np.concatenate(colors)), np.arange(0, 20))
+        for color in colors:
+            self.assertTrue(np.all(np.sum(pattern[:, color], axis=1) <= 1))
+
+        self.assertEqual(len(_color_columns(np.eye(20, dtype=bool))), 1)
+        self.assertEqual(len(_color_columns(np.ones((20, 20), dtype=bool))), 20)
+
+    def testInfluencePattern(self):
+        from wakeexchange.larsen import wake_influence_pattern
+
+        rotorDiameter = np.ones(5)*126.4
+
+        # in a row along the wind every turbine depends on all turbines upstream of it
+        turbineXw = np.arange(0, 5)*5.*126.4
+        pattern = wake_influence_pattern(turbineXw, np.zeros(5), rotorDiameter)
+        np.testing.assert_array_equal(pattern, np.tri(5, dtype=bool))
+
+        # side by side no turbine depends on another one
+        pattern = wake_influence_pattern(np.zeros(5), turbineXw, rotorDiameter)
+        np.testing.assert_array_equal(pattern, np.eye(5, dtype=bool))
+
+        # without a wake spread every turbine may depend on every other turbine
+        pattern = wake_influence_pattern(np.zeros(5), turbineXw, rotorDiameter, wake_spread=None)
+        self.assertTrue(np.all(pattern))
+
+    def testCompressedDifferences(self):
+        from wakeexchange.larsen import compressed_fd_jacobian
+
+        def hub_velocity(turbineX):
+            return np.array([np.sin(turbineX[0]), turbineX[0]**3 + np.exp(turbineX[1]), turbineX[2]**2])
+
+        turbineX = np.array([0.7, 1.3, 2.0])
+        pattern = np.array([[1, 0, 0], [1, 1, 0], [0, 0, 1]], dtype=bool)
+        dvelocity = np.array([[np.cos(0.7), 0., 0.], [3.*0.7**2, np.exp(1.3), 0.], [0., 0., 4.]])
+
+        # central differences are second order accurate
+        for form, tolerance in [('forward', 1e-4), ('central', 1e-8)]:
+            J = compressed_fd_jacobian(hub_velocity, {'turbineX': turbineX}, hub_velocity(turbineX), pattern,
+                                       step_size=1e-5, form=form)
+            np.testing.assert_allclose(J['turbineX'], dvelocity, atol=tolerance)
+
+
+class TestGCLarsenGradients(unittest.TestCase):
+
+    def setUp(self):
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import WindFrame
+        from wakeexchange.larsen import GC_Larsen
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+
+        self.J = []
+        for gradient_wake_spread, gradient_form in [(0.2, 'forward'), (None, 'forward'), (0.2, 'central')]:
+            model_options = {'datasize': 0, 'wf_instance': larsen_wind_farm(nTurbines),
+                             'gradient_wake_spread': gradient_wake_spread, 'gradient_form': gradient_form}
+
+            prob = Problem(root=Group())
+            prob.root.add('p0', IndepVarComp('turbineX', turbineX, units='m'), promotes=['*'])
+            prob.root.add('p1', IndepVarComp('turbineY', turbineY, units='m'), promotes=['*'])
+            prob.root.add('p2', IndepVarComp('wind_direction', 240., units='deg'), promotes=['*'])
+            prob.root.add('windFrame', WindFrame(nTurbines), promotes=['*'])
+            prob.root.add('larsen', GC_Larsen(nTurbines, model_options=model_options), promotes=['*'])
+            prob.setup(check=False)
+
+            prob['hubHeight'] = np.ones(nTurbines)*90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['model_params:Ia'] = 0.05
+
+            prob.run()
+
+            comp = prob.root.larsen
+            self.J.append(comp.linearize(comp.params, comp.unknowns, comp.resids))
+
+    def testCompressed(self):
+        # the compressed finite differences match differencing one turbine at a time
+        J, J_full, _ = self.J
+        for wrt in ['turbineX', 'turbineY', 'hubHeight']:
+            np.testing.assert_allclose(J['wtVelocity0', wrt].toarray(), J_full['wtVelocity0', wrt].toarray(),
+                                       rtol=1e-5, atol=1e-8)
+
+    def testCentral(self):
+        J, _, J_central = self.J
+        for wrt in ['turbineX', 'turbineY', 'hubHeight']:
+            np.testing.assert_allclose(J_central['wtVelocity0', wrt].toarray(), J['wtVelocity0', wrt].toarray(),
+                                       rtol=1e-4, atol=1e-8)
+
+    def testRotorDiameterDesignVariable(self):
+        from openmdao.api import Group, IndepVarComp, ScipyOptimizer
+        from wakeexchange.larsen import GC_Larsen
+
+        nTurbines = 2
+        model_options = {'datasize': 0, 'wf_instance': larsen_wind_farm(nTurbines)}
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('turbineX', np.array([0., 632.]), units='m'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('rotorDiameter', np.ones(nTurbines)*126.4, units='m'), promotes=['*'])
+        prob.root.add('larsen', GC_Larsen(nTurbines, model_options=model_options), promotes=['*'])
+        prob.driver = ScipyOptimizer()
+        prob.driver.add_desvar('turbineX')
+        prob.driver.add_desvar('rotorDiameter')
+        prob.driver.add_objective('wtVelocity0', indices=[1])
+        prob.setup(check=False)
+
+        prob['hubHeight'] = np.ones(nTurbines)*90.
+        prob['model_params:Ia'] = 0.05
+        prob.run_once()
+
+        # GCL ignores rotorDiameter, so its derivatives would silently be zero
+        self.assertRaises(ValueError, prob.calc_gradient, ['turbineX', 'rotorDiameter'], ['wtVelocity0'])
+
+
+class TestWindFrameRotations(unittest.TestCase):
+
+    def testRotations(self):
+        from wakeexchange.GeneralWindFarmComponents import wind_frame_rotations
+
+        windDirections = np.array([270., 0., 90., 200.])
+        rotations = wind_frame_rotations(windDirections)
+
+        # wind from the west blows along x, wind from the north along -y
+        np.testing.assert_allclose(rotations[0], np.eye(2), atol=1e-14)
+        np.testing.assert_allclose(np.dot(rotations[1], [0., -1.]), [1., 0.], atol=1e-14)
+
+        # the transposed rotations rotate back
+        np.testing.assert_allclose(np.einsum('kji,kjl->kil', rotations, rotations), np.tile(np.eye(2), (4, 1, 1)),
+                                   atol=1e-14)
+
+    def testCache(self):
+        from wakeexchange import GeneralWindFarmComponents
+        from wakeexchange.GeneralWindFarmComponents import wind_frame_rotations
+
+        windDirections = np.array([10., 20., 30.])
+        rotations = wind_frame_rotations(windDirections)
+
+        # the same directions give the same (read-only) array
+        self.assertIs(wind_frame_rotations(windDirections.copy()), rotations)
+        self.assertFalse(rotations.flags.writeable)
+
+        # the cache is bounded, dropping the least recently used directions
+        size = GeneralWindFarmComponents._rotation_cache_size
+        for direction in np.linspace(0., 360., size + 10):
+            wind_frame_rotations(direction)
+        self.assertEqual(len(GeneralWindFarmComponents._rotation_cache), size)
+        self.assertIsNot(wind_frame_rotations(windDirections), rotations)
+
+
+class TestBatchedAEPGroup(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        # define turbine locations in global reference frame
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+
+        # initialize input variable arrays
+        nTurbines = turbineX.size
+        rotorDiameter = np.ones(nTurbines)*126.4
+        axialInduction = np.ones(nTurbines)/3.
+        Ct = 4.0*axialInduction*(1.0-axialInduction)
+        Cp = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+        generatorEfficiency = np.ones(nTurbines)*0.944
+
+        # Define flow properties
+        windDirections = np.array([270.-0.523599*180./np.pi, 90., 200.])
+        windSpeeds = np.array([8., 10., 6.])
+        windFrequencies = np.array([0.5, 0.3, 0.2])
+        nDirections = windDirections.size
+
+        wake_model_options = {'nSamples': 0}
+        probs = []
+        for group in [AEPGroup, BatchedAEPGroup]:
+            prob = Problem(root=group(nTurbines=nTurbines, nDirections=nDirections, wake_model=gauss_wrapper,
+                                      wake_model_options=wake_model_options, datasize=0, use_rotor_components=False,
+                                      params_IdepVar_func=add_gauss_params_IndepVarComps, differentiable=True,
+                                      params_IndepVar_args={}))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros_like(turbineX)+90.
+            prob['rotorDiameter'] = rotorDiameter
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = generatorEfficiency
+            prob['windSpeeds'] = windSpeeds
+            prob['windDirections'] = windDirections
+            prob['windFrequencies'] = windFrequencies
+            prob['Ct_in'] = Ct
+            prob['Cp_in'] = Cp
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_batched = probs
+        self.nDirections = nDirections
+
+    def testDirPowers(self):
+        np.testing.assert_allclose(self.prob_batched['dirPowers'], self.prob['dirPowers'])
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.prob_batched['AEP'], self.prob['AEP'])
+
+    def testVelocities(self):
+        for direction_id in range(0, self.nDirections):
+            np.testing.assert_allclose(self.prob_batched['wtVelocity'][direction_id],
+                                       self.prob['wtVelocity%i' % direction_id])
+
+    def testGradients(self):
+        # the single Jacobian of the batched group gives the same total derivatives as the direction groups, up to
+        # the finite difference error of wake models without analytic derivatives
+        wrt = ['turbineX', 'turbineY', 'hubHeight', 'rotorDiameter', 'windSpeeds']
+        J = self.prob.calc_gradient(wrt, ['AEP'], return_format='dict')
+        J_batched = self.prob_batched.calc_gradient(wrt, ['AEP'], return_format='dict')
+        for name in wrt:
+            np.testing.assert_allclose(J_batched['AEP'][name], J['AEP'][name], rtol=1e-4, atol=1e-6)
+
+
+class TestBatchedWakeModel(unittest.TestCase):
+
+    def _problems(self, turbineX, turbineY):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        probs = []
+        for group in [AEPGroup, BatchedAEPGroup]:
+            prob = Problem(root=group(nTurbines=nTurbines, nDirections=3, wake_model=gauss_wrapper,
+                                      wake_model_options={'nSamples': 0}, use_rotor_components=False,
+                                      params_IdepVar_func=add_gauss_params_IndepVarComps, params_IndepVar_args={}))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros(nTurbines)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.array([8., 10., 6.])
+            prob['windDirections'] = np.array([0., 90., 200.])
+            prob['windFrequencies'] = np.array([0.5, 0.3, 0.2])
+            prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+            prob.run()
+            probs.append(prob)
+
+        return probs
+
+    def testSingleTurbine(self):
+        # the scalar wind speed must not be mistaken for a per turbine input
+        prob, prob_batched = self._problems(np.array([1164.7]), np.array([1024.7]))
+
+        self.assertEqual(prob_batched.root.wakeModel.params['windSpeeds'].shape, (3,))
+        np.testing.assert_allclose(prob_batched['wtVelocity'][:, 0], [8., 10., 6.])
+        np.testing.assert_allclose(prob_batched['AEP'], prob['AEP'])
+
+    def testLinearizeReuse(self):
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        _, prob_batched = self._problems(turbineX, turbineY)
+
+        comp = prob_batched.root.wakeModel
+        kernel = comp.kernel
+        evaluate = kernel.evaluate
+        linearize = kernel.linearize
+        calls = []
+
+        def counted_evaluate(inputs):
+            calls.append('evaluate')
+            return evaluate(inputs)
+
+        def counted_linearize(of, wrt):
+            calls.append('linearize')
+            return linearize(of, wrt)
+
+        kernel.evaluate = counted_evaluate
+        kernel.linearize = counted_linearize
+
+        # solving does not assemble the Jacobian
+        prob_batched.run()
+        self.assertEqual(calls.count('evaluate'), 3)
+        self.assertEqual(calls.count('linearize'), 0)
+
+        # linearize assembles it once per point
+        del calls[:]
+        J = comp.linearize(comp.params, comp.unknowns, comp.resids)
+        self.assertEqual(calls.count('linearize'), 3)
+        J_again = comp.linearize(comp.params, comp.unknowns, comp.resids)
+        self.assertEqual(calls.count('linearize'), 3)
+        self.assertEqual(sorted(J.keys()), sorted(J_again.keys()))
+        for key in J:
+            np.testing.assert_allclose(J[key].toarray(), J_again[key].toarray())
+
+        prob_batched['turbineX'] = turbineX + 10.
+        prob_batched.run()
+        comp.linearize(comp.params, comp.unknowns, comp.resids)
+        self.assertEqual(calls.count('linearize'), 6)
+
+
+class TestWakeInteractionClusters(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        # two copies of a small wind farm, far enough apart (in every direction) not to interact
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        turbineX = np.hstack([turbineX, turbineX + 30000.])
+        turbineY = np.hstack([turbineY, turbineY + 30000.])
+
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        windDirections = np.array([0., 45., 200.])
+        nDirections = windDirections.size
+
+        probs = []
+        for interaction_options in [None, {}]:
+            prob = Problem(root=BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                                wake_model=gauss_wrapper, wake_model_options={'nSamples': 0},
+                                                params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                                params_IndepVar_args={}, interaction_options=interaction_options))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros_like(turbineX)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.array([8., 10., 6.])
+            prob['windDirections'] = windDirections
+            prob['windFrequencies'] = np.array([0.5, 0.3, 0.2])
+            prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_clustered = probs
+        self.turbineX = turbineX
+        self.turbineY = turbineY
+
+    def testClusters(self):
+        from wakeexchange.GeneralWindFarmComponents import wake_interaction_pairs, wake_interaction_clusters
+
+        nTurbines = self.turbineX.size
+        upstream, downstream = wake_interaction_pairs(self.turbineX, self.turbineY, 126.4)
+        nClusters, labels = wake_interaction_clusters(nTurbines, upstream, downstream)
+
+        self.assertTrue(np.all(labels[:nTurbines//2, np.newaxis] != labels[np.newaxis, nTurbines//2:]))
+
+    def testVelocities(self):
+        np.testing.assert_allclose(self.prob_clustered['wtVelocity'], self.prob['wtVelocity'])
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.prob_clustered['AEP'], self.prob['AEP'])
+
+
+class TestWakeInteractionGrid(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        # a regular 5x5 grid, 5 rotor diameters apart along x and 10 along y
+        rotorDiameter = 126.4
+        turbineX, turbineY = np.meshgrid(np.arange(0, 5)*5.*rotorDiameter, np.arange(0, 5)*10.*rotorDiameter)
+        turbineX = turbineX.flatten()
+        turbineY = turbineY.flatten()
+
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        windDirections = np.array([270., 0., 225.])
+        nDirections = windDirections.size
+
+        probs = []
+        for interaction_options in [None, {}]:
+            prob = Problem(root=BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                                wake_model=gauss_wrapper, wake_model_options={'nSamples': 0},
+                                                params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                                params_IndepVar_args={}, interaction_options=interaction_options))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros(nTurbines)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*rotorDiameter
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.array([8., 10., 6.])
+            prob['windDirections'] = windDirections
+            prob['windFrequencies'] = np.array([0.5, 0.3, 0.2])
+            prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_clustered = probs
+        self.turbineX = turbineX
+        self.turbineY = turbineY
+        self.rotorDiameter = rotorDiameter
+
+    def testClusters(self):
+        from wakeexchange.GeneralWindFarmComponents import wake_interaction_pairs, wake_interaction_clusters, \
+            wind_frame_rotations
+
+        nTurbines = self.turbineX.size
+
+        # along the rows every row is a group of its own, across the rows the whole grid is a single group
+        for windDirection, expected in [(270., 5), (0., 1)]:
+            turbineXw, turbineYw = np.dot(wind_frame_rotations(windDirection)[0], [self.turbineX, self.turbineY])
+            upstream, downstream = wake_interaction_pairs(turbineXw, turbineYw, self.rotorDiameter)
+            nClusters, labels = wake_interaction_clusters(nTurbines, upstream, downstream)
+            self.assertEqual(nClusters, expected)
+
+    def testVelocities(self):
+        np.testing.assert_allclose(self.prob_clustered['wtVelocity'], self.prob['wtVelocity'])
+
+    def testKernelCache(self):
+        comp = self.prob_clustered.root.wakeModel
+        self.assertLessEqual(len(comp.kernels), comp.kernel_cache_size)
+
+        # the least recently used group sizes are dropped
+        comp.kernels.clear()
+        comp.kernel_cache_size = 2
+        for nTurbines in [2, 3, 4, 3]:
+            comp._kernel(nTurbines)
+        self.assertEqual(list(comp.kernels.keys()), [4, 3])
+
+
+class TestWindRose(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.windrose import read_windrose
+
+        self.windDirections, self.windSpeeds, self.windFrequencies = \
+            read_windrose('./input_files/windrose_amalia_directionally_averaged_speeds.txt')
+
+    def testRebin(self):
+        from wakeexchange.windrose import rebin_windrose
+
+        windDirections, windSpeeds, windFrequencies = rebin_windrose(self.windDirections, self.windSpeeds,
+                                                                     self.windFrequencies, 12)
+
+        np.testing.assert_allclose(windDirections, np.arange(0., 360., 30.))
+        np.testing.assert_allclose(np.sum(windFrequencies), np.sum(self.windFrequencies))
+        np.testing.assert_allclose(np.sum(windFrequencies*windSpeeds**3),
+                                   np.sum(self.windFrequencies*self.windSpeeds**3))
+
+    def testMergeSectors(self):
+        from wakeexchange.windrose import merge_sectors
+
+        windDirections, windSpeeds, windFrequencies = merge_sectors(self.windDirections, self.windSpeeds,
+                                                                    self.windFrequencies, 0.02)
+
+        self.assertTrue(np.all(windFrequencies >= 0.02))
+        np.testing.assert_allclose(np.sum(windFrequencies), np.sum(self.windFrequencies))
+
+    def testAdaptive(self):
+        from wakeexchange.windrose import adaptive_windrose
+
+        # the expected value of a power that only depends on speed is exact for any number of sectors
+        windDirections, windSpeeds, windFrequencies, error = adaptive_windrose(
+            lambda directions, speeds: speeds**3, self.windDirections, self.windSpeeds, self.windFrequencies)
+
+        self.assertEqual(windDirections.size, 4)
+        self.assertLess(error, 1e-10)
+
+
+class TestWindRoseAEP(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        windDirections = np.array([30., 120., 200., 290.])
+        windFrequencies = np.array([0.3, 0.2, 0.1, 0.4])
+        windSpeedBins = np.array([6., 8., 10.])
+        windRoseFrequencies = np.array([0.2, 0.5, 0.3])[np.newaxis, :]*windFrequencies[:, np.newaxis]
+        nDirections = windDirections.size
+
+        # the speed bins flattened into separate flow cases, evaluated with the standard AEP group
+        prob = Problem(root=BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections*windSpeedBins.size,
+                                            wake_model=gauss_wrapper, wake_model_options={'nSamples': 0},
+                                            params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                            params_IndepVar_args={}))
+        prob_rose = Problem(root=BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                                 wake_model=gauss_wrapper, wake_model_options={'nSamples': 0},
+                                                 params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                                 params_IndepVar_args={}, nSpeeds=windSpeedBins.size))
+        prob_ct = Problem(root=BatchedAEPGroup(nTurbines=nTurbines, nDirections=nDirections,
+                                               wake_model=gauss_wrapper, wake_model_options={'nSamples': 0},
+                                               params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                               params_IndepVar_args={}, nSpeeds=windSpeedBins.size, datasize=4,
+                                               ct_tolerance=1e-3))
+
+        for p in [prob, prob_rose, prob_ct]:
+            p.setup(check=False)
+
+            p['turbineX'] = turbineX
+            p['turbineY'] = turbineY
+            p['hubHeight'] = np.zeros_like(turbineX)+90.
+            p['rotorDiameter'] = np.ones(nTurbines)*126.4
+            p['axialInduction'] = axialInduction
+            p['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            p['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            p['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+        prob['windDirections'] = np.repeat(windDirections, windSpeedBins.size)
+        prob['windSpeeds'] = np.tile(windSpeedBins, nDirections)
+        prob['windFrequencies'] = np.ravel(windRoseFrequencies)
+
+        prob_rose['windDirections'] = windDirections
+        prob_rose['windSpeeds'] = np.ones(nDirections)*8.
+        prob_rose['windSpeedBins'] = windSpeedBins
+        prob_rose['windRoseFrequencies'] = windRoseFrequencies
+
+        # thrust curve that is only constant around the reference speed
+        prob_ct['windDirections'] = windDirections
+        prob_ct['windSpeeds'] = np.ones(nDirections)*8.
+        prob_ct['windSpeedBins'] = windSpeedBins
+        prob_ct['windRoseFrequencies'] = windRoseFrequencies
+        prob_ct['gen_params:windSpeedToCPCT_wind_speed'] = np.array([4., 7., 9., 12.])
+        prob_ct['gen_params:windSpeedToCPCT_CT'] = np.array([0.9, 0.8, 0.8, 0.5])
+
+        prob.run()
+        prob_rose.run()
+        prob_ct.run()
+
+        self.prob = prob
+        self.prob_rose = prob_rose
+        self.prob_ct = prob_ct
+
+    def testBinPowers(self):
+        np.testing.assert_allclose(np.ravel(self.prob_rose['binPowers']), self.prob['dirPowers'], rtol=1e-6)
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.prob_rose['AEP'], self.prob['AEP'], rtol=1e-6)
+
+    def testThrustCurveBins(self):
+        # the reference speed bin reuses the wake deficits, the others are evaluated with their own Ct
+        np.testing.assert_allclose(self.prob_ct['binPowers'][:, 1], self.prob_rose['binPowers'][:, 1])
+        self.assertLess(np.sum(self.prob_ct['binPowers'][:, 0]), np.sum(self.prob_rose['binPowers'][:, 0]))
+        self.assertGreater(np.sum(self.prob_ct['binPowers'][:, 2]), np.sum(self.prob_rose['binPowers'][:, 2]))
+
+
+class TestCachedWakeModel(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+        from wakeexchange.cache import cached_wake_model
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+        nDirections = 3
+
+        self.wake_model = cached_wake_model(gauss_wrapper)
+
+        probs = []
+        for wake_model in [gauss_wrapper, self.wake_model]:
+            prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=nDirections, wake_model=wake_model,
+                                         wake_model_options={'nSamples': 0},
+                                         params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                         params_IndepVar_args={}))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros_like(turbineX)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.array([8., 10., 6.])
+            prob['windDirections'] = np.array([30., 90., 200.])
+            prob['windFrequencies'] = np.array([0.5, 0.3, 0.2])
+            prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_cached = probs
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.prob_cached['AEP'], self.prob['AEP'])
+
+    def testHits(self):
+        self.assertEqual(self.wake_model.cache.stats()['hits'], 0)
+
+        # the same layout again is found in the cache for every direction
+        self.prob_cached.run()
+        self.assertEqual(self.wake_model.cache.stats()['hits'], 3)
+        np.testing.assert_allclose(self.prob_cached['AEP'], self.prob['AEP'])
+
+    def testModelKeys(self):
+        from wakeexchange.gauss import gauss_wrapper
+        from wakeexchange.cache import CACHE_VERSION, cached_wake_model, options_key
+
+        # options are identified by content, also for long arrays
+        curve = np.linspace(0., 1., 2000)
+        changed = curve.copy()
+        changed[1000] += 1e-9
+        self.assertEqual(options_key({'curve': curve, 'nSamples': 0}),
+                         options_key({'nSamples': 0, 'curve': curve.copy()}))
+        self.assertNotEqual(options_key({'curve': curve}), options_key({'curve': changed}))
+
+        # options without content need an explicit model key
+        self.assertRaises(ValueError, options_key, {'wf_instance': object()})
+        wake_model = cached_wake_model(gauss_wrapper, model_key='farm-a')
+        comp = wake_model(6, wake_model_options={'nSamples': 0, 'wf_instance': object()})
+        self.assertTrue(comp.prefix.startswith('v%i.' % CACHE_VERSION))
+        self.assertTrue(comp.prefix.endswith('.farm-a'))
+
+
+class TestIncrementalAEPEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+        from wakeexchange.evaluators import IncrementalAEPEvaluator
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+
+        axialInduction = np.ones(nTurbines)/3.
+        Ct = 4.0*axialInduction*(1.0-axialInduction)
+        Cp = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+        windDirections = np.array([30., 90., 200.])
+        windSpeeds = np.array([8., 10., 6.])
+        windFrequencies = np.array([0.5, 0.3, 0.2])
+
+        movedX = np.copy(turbineX)
+        movedY = np.copy(turbineY)
+        movedX[[2, 4]] = [1500., 2100.]
+        movedY[[2, 4]] = [1300., 2000.]
+
+        # the AEP of the moved layout from AEPGroup
+        prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=windDirections.size, wake_model=gauss_wrapper,
+                                     wake_model_options={'nSamples': 0}, use_rotor_components=False,
+                                     params_IdepVar_func=add_gauss_params_IndepVarComps, params_IndepVar_args={}))
+        prob.setup(check=False)
+
+        prob['turbineX'] = movedX
+        prob['turbineY'] = movedY
+        prob['hubHeight'] = np.zeros(nTurbines)+90.
+        prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+        prob['axialInduction'] = axialInduction
+        prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+        prob['windSpeeds'] = windSpeeds
+        prob['windDirections'] = windDirections
+        prob['windFrequencies'] = windFrequencies
+        prob['Ct_in'] = Ct
+        prob['Cp_in'] = Cp
+
+        prob.run()
+        self.prob = prob
+
+        model_params = dict((name, prob[name]) for name in prob.root.unknowns.keys()
+                            if name.startswith('model_params:'))
+        kwargs = dict(windDirections=windDirections, windSpeeds=windSpeeds, windFrequencies=windFrequencies,
+                      wake_model=gauss_wrapper, wake_model_options={'nSamples': 0}, model_params=model_params, Ct=Ct,
+                      Cp=Cp, rotorDiameter=126.4, hubHeight=90., generatorEfficiency=0.944)
+
+        self.evaluator = IncrementalAEPEvaluator(turbineX, turbineY, **kwargs)
+
+        # count the wake model evaluations of the move
+        self.calls = {'farm': 0, 'pair': 0}
+        for name, kernel in [('farm', self.evaluator.kernel), ('pair', self.evaluator.pair_kernel)]:
+            kernel.evaluate = self._counted(kernel.evaluate, name)
+
+        self.evaluator.move([2, 4], [1500., 2100.], [1300., 2000.])
+
+        self.reference = IncrementalAEPEvaluator(movedX, movedY, **kwargs)
+
+    def _counted(self, evaluate, name):
+
+        def counted_evaluate(inputs):
+            self.calls[name] += 1
+            return evaluate(inputs)
+
+        return counted_evaluate
+
+    def testSeed(self):
+        # the state is seeded from a full evaluation, which matches AEPGroup
+        np.testing.assert_allclose(self.reference.dirPowers, self.prob['dirPowers'])
+        np.testing.assert_allclose(self.reference.AEP, self.prob['AEP'])
+        self.assertLess(self.reference.superposition_error(), 1e-10)
+
+    def testMove(self):
+        # after the move the deficits of the moved turbines are superposed from pairs
+        self.assertLess(self.evaluator.superposition_error(), 0.05)
+        np.testing.assert_allclose(self.evaluator.AEP, self.prob['AEP'], rtol=1e-2)
+
+    def testEvaluations(self):
+        # only pairs are evaluated for the move, every pair with a moved turbine before and after the move
+        nTurbines = self.evaluator.nTurbines
+        nPairs = 2*2*(nTurbines - 1) - 2
+        self.assertEqual(self.calls['farm'], 0)
+        self.assertEqual(self.calls['pair'], 2*nPairs*self.evaluator.nDirections)
+
+
+class TestProcessPoolAEPEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+        from wakeexchange.parallel import ProcessPoolAEPEvaluator
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+
+        axialInduction = np.ones(nTurbines)/3.
+        Ct = 4.0*axialInduction*(1.0-axialInduction)
+        Cp = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+        windDirections = np.array([30., 90., 200., 290.])
+        windSpeeds = np.array([8., 10., 6., 9.])
+        windFrequencies = np.array([0.4, 0.3, 0.2, 0.1])
+
+        self.results = []
+        for nProcesses in [1, 2]:
+            with ProcessPoolAEPEvaluator(nTurbines, gauss_wrapper, wake_model_options={'nSamples': 0},
+                                         nProcesses=nProcesses) as evaluator:
+                self.results.append(evaluator.evaluate(turbineX, turbineY, Ct, Cp, windDirections, windSpeeds,
+                                                       windFrequencies, gradients=True))
+
+        prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=windDirections.size, wake_model=gauss_wrapper,
+                                     wake_model_options={'nSamples': 0},
+                                     params_IdepVar_func=add_gauss_params_IndepVarComps, params_IndepVar_args={}))
+        prob.setup(check=False)
+
+        prob['turbineX'] = turbineX
+        prob['turbineY'] = turbineY
+        prob['hubHeight'] = np.zeros_like(turbineX)+90.
+        prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+        prob['axialInduction'] = axialInduction
+        prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+        prob['windSpeeds'] = windSpeeds
+        prob['windDirections'] = windDirections
+        prob['windFrequencies'] = windFrequencies
+        prob['Ct_in'] = Ct
+        prob['Cp_in'] = Cp
+
+        prob.run()
+        self.prob = prob
+
+    def testSerialParallel(self):
+        serial, parallel = self.results
+        for name in ['dirPowers', 'AEP', 'AEP_turbineX', 'AEP_turbineY']:
+            np.testing.assert_array_equal(parallel[name], serial[name])
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.results[1]['dirPowers'], self.prob['dirPowers'])
+        np.testing.assert_allclose(self.results[1]['AEP'], self.prob['AEP'])
+
+    def testSerialEvaluators(self):
+        from wakeexchange.gauss import gauss_wrapper
+        from wakeexchange.parallel import ProcessPoolAEPEvaluator
+
+        prob = self.prob
+        nTurbines = prob['turbineX'].size
+        args = (prob['turbineX'], prob['turbineY'], prob['Ct_in'], prob['Cp_in'], prob['windDirections'],
+                prob['windSpeeds'], prob['windFrequencies'])
+
+        # a second evaluator in the same process must not change the state of the first
+        with ProcessPoolAEPEvaluator(nTurbines, gauss_wrapper, wake_model_options={'nSamples': 0},
+                                     nProcesses=1) as first:
+            with ProcessPoolAEPEvaluator(nTurbines, gauss_wrapper, wake_model_options={'nSamples': 0},
+                                         rotorDiameter=63.2, nProcesses=1) as second:
+                second.evaluate(*args)
+                np.testing.assert_allclose(first.evaluate(*args)['AEP'], prob['AEP'])
+
+
+class TestProcessPoolAEPEvaluatorFloris(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.floris import floris_wrapper, add_floris_params_IndepVarComps
+        from wakeexchange.parallel import ProcessPoolAEPEvaluator
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+        yaw = np.array([20., -10., 0., 15., 5., 0.])
+
+        # Ct and Cp adjusted for yaw as AdjustCtCpYaw does, and the axial induction that gives that Ct
+        Ct = 4.0*(1./3.)*(1.0-1./3.)*np.cos(yaw*np.pi/180.)**2
+        Cp = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+        axialInduction = 0.5*(1. - np.sqrt(1. - Ct))
+
+        windDirections = np.array([30., 90., 200., 290.])
+        windSpeeds = np.array([8., 10., 6., 9.])
+        windFrequencies = np.array([0.4, 0.3, 0.2, 0.1])
+        nDirections = windDirections.size
+
+        model_options = {'differentiable': True, 'use_rotor_components': False, 'nSamples': 0, 'verbose': False}
+        prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=nDirections, wake_model=floris_wrapper,
+                                     wake_model_options=model_options,
+                                     params_IdepVar_func=add_floris_params_IndepVarComps,
+                                     params_IndepVar_args={'use_rotor_components': False}))
+        prob.setup(check=False)
+
+        prob['turbineX'] = turbineX
+        prob['turbineY'] = turbineY
+        for direction_id in range(0, nDirections):
+            prob['yaw%i' % direction_id] = yaw
+        prob['hubHeight'] = np.zeros_like(turbineX)+90.
+        prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+        prob['axialInduction'] = axialInduction
+        prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+        prob['windSpeeds'] = windSpeeds
+        prob['windDirections'] = windDirections
+        prob['windFrequencies'] = windFrequencies
+        prob['Ct_in'] = 4.0*(1./3.)*(1.0-1./3.)*np.ones(nTurbines)
+        prob['Cp_in'] = Cp
+
+        prob.run()
+        self.prob = prob
+
+        model_params = dict((name, prob[name]) for name in prob.root.unknowns.keys()
+                            if name.startswith('model_params:'))
+        with ProcessPoolAEPEvaluator(nTurbines, floris_wrapper, wake_model_options=model_options,
+                                     model_params=model_params, nProcesses=1) as evaluator:
+            self.result = evaluator.evaluate(turbineX, turbineY, Ct, Cp*np.cos(yaw*np.pi/180.)**1.88, windDirections,
+                                             windSpeeds, windFrequencies, yaw=yaw)
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.result['dirPowers'], self.prob['dirPowers'])
+        np.testing.assert_allclose(self.result['AEP'], self.prob['AEP'])
+
+
+class TestDirectionScheduling(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+        from wakeexchange.parallel import estimate_direction_costs, lpt_schedule
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        windDirections = np.linspace(0., 360., 7, endpoint=False)
+        nDirections = windDirections.size
+
+        self.costs = estimate_direction_costs(turbineX, turbineY, windDirections, 126.4, rotor_solve=True)
+        self.chunks = lpt_schedule(self.costs, 3)
+
+        probs = []
+        for direction_chunks in [None, self.chunks]:
+            prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=nDirections, wake_model=gauss_wrapper,
+                                         wake_model_options={'nSamples': 0},
+                                         params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                         params_IndepVar_args={}, direction_chunks=direction_chunks))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros_like(turbineX)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.ones(nDirections)*8.
+            prob['windDirections'] = windDirections
+            prob['windFrequencies'] = np.ones(nDirections)/nDirections
+            prob['Ct_in'] = 4.0*axialInduction*(1.0-axialInduction)
+            prob['Cp_in'] = np.ones(nTurbines)*0.7737/0.944 * 4.0 * 1.0/3.0 * np.power((1 - 1.0/3.0), 2)
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_chunked = probs
+
+    def testSchedule(self):
+        from wakeexchange.parallel import schedule_loads
+
+        self.assertEqual(sorted(np.concatenate(self.chunks)), list(range(0, self.costs.size)))
+
+        # no chunk is loaded more than the mean load plus the largest single cost
+        loads = schedule_loads(self.costs, self.chunks)
+        self.assertLessEqual(np.max(loads), np.mean(loads) + np.max(self.costs))
+
+    def testChunkImbalance(self):
+        from wakeexchange.parallel import schedule_imbalance
+
+        self.assertEqual(self.prob_chunked.root.chunk_imbalance(self.costs),
+                         schedule_imbalance(self.costs, self.chunks))
+        self.assertRaises(ValueError, self.prob.root.chunk_imbalance, self.costs)
+
+    def testAEP(self):
+        np.testing.assert_allclose(self.prob_chunked['dirPowers'], self.prob['dirPowers'])
+        np.testing.assert_allclose(self.prob_chunked['AEP'], self.prob['AEP'])
+
+
+class TestAcceleratedNLGaussSeidel(unittest.TestCase):
+
+    def _problem(self, solver, a, **options):
+        from openmdao.api import Group, ExecComp, IndepVarComp, ScipyGMRES
+
+        # a coupled pair of components with a slowly converging fixed-point iteration, like Ct and wtVelocity
+        root = Group()
+        root.add('p', IndepVarComp('a', a), promotes=['*'])
+        root.add('c1', ExecComp('y1 = a - 0.9*y2 + 0.1*cos(y2)'), promotes=['*'])
+        root.add('c2', ExecComp('y2 = 0.95*y1'), promotes=['*'])
+        root.ln_solver = ScipyGMRES()
+        root.nl_solver = solver()
+        root.nl_solver.options['atol'] = 1e-12
+        root.nl_solver.options['rtol'] = 1e-12
+        root.nl_solver.options['maxiter'] = 1000
+        for name, value in options.items():
+            root.nl_solver.options[name] = value
+        prob = Problem(root=root)
+        prob.setup(check=False)
+        prob.run()
+
+        return prob
+
+    def setUp(self):
+        from openmdao.api import NLGaussSeidel
+        from wakeexchange.solvers import AcceleratedNLGaussSeidel
+
+        self.prob = self._problem(NLGaussSeidel, 2.)
+        self.prob_accelerated = self._problem(AcceleratedNLGaussSeidel, 2., warm_start=True, aitken=True)
+
+    def testSolution(self):
+        np.testing.assert_allclose(self.prob_accelerated['y1'], self.prob['y1'], rtol=1e-8)
+        np.testing.assert_allclose(self.prob_accelerated['y2'], self.prob['y2'], rtol=1e-8)
+
+    def testDefaults(self):
+        from wakeexchange.solvers import AcceleratedNLGaussSeidel
+
+        solver = AcceleratedNLGaussSeidel()
+        self.assertFalse(solver.options['warm_start'])
+        self.assertFalse(solver.options['aitken'])
+
+    def testIterations(self):
+        from openmdao.api import NLGaussSeidel
+        from wakeexchange.solvers import rotor_iteration_counts
+
+        solver = self.prob_accelerated.root.nl_solver
+        self.assertLess(solver.iteration_history[0], self.prob.root.nl_solver.iter_count)
+
+        # a small design change converges faster from the last converged state, to the new solution
+        self.prob_accelerated['a'] = 2.01
+        self.prob_accelerated.run()
+        self.assertEqual(self.prob_accelerated['a'], 2.01)
+        self.assertLess(solver.iteration_history[1], solver.iteration_history[0])
+        self.assertEqual(rotor_iteration_counts(self.prob_accelerated.root)[''], solver.iteration_history)
+
+        prob_cold = self._problem(NLGaussSeidel, 2.01)
+        np.testing.assert_allclose(self.prob_accelerated['y1'], prob_cold['y1'], rtol=1e-8)
+        np.testing.assert_allclose(self.prob_accelerated['y2'], prob_cold['y2'], rtol=1e-8)
+
+
+class TestRotorSweepSolve(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
+
+        turbineX = np.array([1164.7, 947.2,  1682.4, 1464.9, 1982.6, 2200.1])
+        turbineY = np.array([1024.7, 1335.3, 1387.2, 1697.8, 2060.3, 1749.7])
+        nTurbines = turbineX.size
+        axialInduction = np.ones(nTurbines)/3.
+
+        windDirections = np.array([0., 90., 200., 270.])
+        nDirections = windDirections.size
+
+        # smooth power and thrust curves
+        wind_speed = np.linspace(2., 25., 24)
+        CP = 0.45*np.sin(np.pi*wind_speed/25.)
+        CT = 0.8*np.exp(-wind_speed/15.)
+
+        probs = []
+        for rotor_solver in ['gauss-seidel', 'sweep']:
+            prob = Problem(root=AEPGroup(nTurbines=nTurbines, nDirections=nDirections, use_rotor_components=True,
+                                         datasize=wind_speed.size, wake_model=gauss_wrapper,
+                                         wake_model_options={'nSamples': 0},
+                                         params_IdepVar_func=add_gauss_params_IndepVarComps,
+                                         params_IndepVar_args={}, rotor_solver=rotor_solver,
+                                         rotor_solver_options=({'atol': 1e-12, 'rtol': 1e-12, 'maxiter': 200}
+                                                               if rotor_solver == 'gauss-seidel' else None)))
+            prob.setup(check=False)
+
+            prob['turbineX'] = turbineX
+            prob['turbineY'] = turbineY
+            prob['hubHeight'] = np.zeros_like(turbineX)+90.
+            prob['rotorDiameter'] = np.ones(nTurbines)*126.4
+            prob['axialInduction'] = axialInduction
+            prob['generatorEfficiency'] = np.ones(nTurbines)*0.944
+            prob['windSpeeds'] = np.ones(nDirections)*8.
+            prob['windDirections'] = windDirections
+            prob['windFrequencies'] = np.ones(nDirections)/nDirections
+            prob['gen_params:windSpeedToCPCT_wind_speed'] = wind_speed
+            prob['gen_params:windSpeedToCPCT_CP'] = CP
+            prob['gen_params:windSpeedToCPCT_CT'] = CT
+
+            prob.run()
+            probs.append(prob)
+
+        self.prob, self.prob_sweep = probs
+        self.nDirections = nDirections
+
+    def testVelocities(self):
+        for direction_id in range(0, self.nDirections):
+            np.testing.assert_allclose(self.prob_sweep['wtVelocity%i' % direction_id],
+                                       self.prob['wtVelocity%i' % direction_id], rtol=1e-6)
+        np.testing.assert_allclose(self.prob_sweep['AEP'], self.prob['AEP'], rtol=1e-6)
+
+    def testGradients(self):
+        J = self.prob.calc_gradient(['turbineX', 'turbineY'], ['AEP'], return_format='array')
+        J_sweep = self.prob_sweep.calc_gradient(['turbineX', 'turbineY'], ['AEP'], return_format='array')
+        np.testing.assert_allclose(J_sweep, J, rtol=1e-4, atol=1e-2)
+
+    def testIterations(self):
+        from wakeexchange.solvers import rotor_iteration_counts
+
+        counts = rotor_iteration_counts(self.prob.root)
+        counts_sweep = rotor_iteration_counts(self.prob_sweep.root)
+        self.assertEqual(len(counts_sweep), self.nDirections)
+
+        # one wake model evaluation per level of turbines and one to check the coupling
+        self.assertLessEqual(max(max(count) for count in counts_sweep.values()), 6 + 1)
+
+        # the sweep evaluates fewer turbines than the gauss-seidel passes over the whole farm
+        turbines_sweep = 0
+        for direction_id in range(0, self.nDirections):
+            sweep = getattr(self.prob_sweep.root.all_directions, 'direction_group%i' % direction_id).rotorGroup.sweep
+            turbines_sweep += sum(sweep.turbine_history)
+        self.assertLess(turbines_sweep, sum(sum(count) for count in counts.values())*6)
+
+        # the evaluations of the levels only cover parts of the farm
+        for direction_id in range(0, self.nDirections):
+            sweep = getattr(self.prob_sweep.root.all_directions, 'direction_group%i' % direction_id).rotorGroup.sweep
+            for count, turbines in zip(sweep.iteration_history, sweep.turbine_history):
+                self.assertLessEqual(turbines, count*6)
+            self.assertLess(sum(sweep.turbine_history), sum(sweep.iteration_history)*6)
+
+
+class TestTurbineTypes(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange.turbines import get_turbine_type
+
+        self.turbine_type = get_turbine_type('NREL5MW')
+
+    def testProperties(self):
+        self.assertEqual(self.turbine_type.rotor_diameter, 126.4)
+        self.assertEqual(self.turbine_type.hub_height, 90.)
+        self.assertEqual(self.turbine_type.rated_power, 5000.)
+        self.assertEqual(self.turbine_type.curve('c_t_curve').shape, (28, 2))
+
+    def testSharedCurves(self):
+        from wakeexchange.turbines import get_turbine_type
+
+        curves = self.turbine_type.cpct_table('smooth')
+        self.assertIs(get_turbine_type('NREL5MW').cpct_table('smooth'), curves)
+        self.assertEqual(curves.CP.size, curves.wind_speed.size)
+        self.assertEqual(self.turbine_type.cpct_table('tabulated').CT.size, 202)
+
+        # every user gets the same read-only arrays
+        self.assertRaises(ValueError, curves.CT.__setitem__, 0, 1.)
+
+    def testAEPGroup(self):
+        prob = Problem(root=AEPGroup(nTurbines=3, nDirections=2, use_rotor_components=True,
+                                     turbine_type='NREL5MW'))
+        prob.setup(check=False)
+
+        np.testing.assert_allclose(prob['rotorDiameter'], np.ones(3)*126.4)
+        np.testing.assert_allclose(prob['hubHeight'], np.ones(3)*90.)
+
+        curves = self.turbine_type.cpct_table('smooth')
+        for direction_id in range(0, 2):
+            CtCp = prob.root.find_subsystem('all_directions.direction_group%i.rotorGroup.CtCp' % direction_id)
+            self.assertIs(CtCp.turbine_type.cpct_table('smooth'), curves)
+
+
+class TestCachedAkimaSpline(unittest.TestCase):
+
+    def setUp(self):
+        from wakeexchange import GeneralWindFarmComponents
+
+        self.module = GeneralWindFarmComponents
+        self.module._akima_spline_cache.clear()
+
+        self.wind_speed = np.linspace(3., 25., 23)
+        self.CP = 0.45*np.sin(np.pi*self.wind_speed/25.)
+
+    def tearDown(self):
+        self.module._akima_spline_cache.clear()
+
+    def curve(self, i):
+        # distinct curves for filling the cache
+        return self.wind_speed, self.CP*(1. + 1e-3*(i + 1))
+
+    def testIdenticalCurves(self):
+        from wakeexchange.GeneralWindFarmComponents import cached_akima_spline
+
+        # equal values in other arrays (and lists) reuse the spline
+        spline = cached_akima_spline(self.wind_speed, self.CP)
+        self.assertIs(cached_akima_spline(self.wind_speed.copy(), self.CP.copy()), spline)
+        self.assertIs(cached_akima_spline(list(self.wind_speed), list(self.CP)), spline)
+        self.assertEqual(len(self.module._akima_spline_cache), 1)
+
+    def testChangedValues(self):
+        from wakeexchange.GeneralWindFarmComponents import cached_akima_spline
+
+        spline = cached_akima_spline(self.wind_speed, self.CP)
+        CP = self.CP.copy()
+        CP[10] += 1e-12
+        self.assertIsNot(cached_akima_spline(self.wind_speed, CP), spline)
+        wind_speed = self.wind_speed.copy()
+        wind_speed[-1] = 26.
+        self.assertIsNot(cached_akima_spline(wind_speed, self.CP), spline)
+        self.assertEqual(len(self.module._akima_spline_cache), 3)
+
+    def testEviction(self):
+        from wakeexchange.GeneralWindFarmComponents import cached_akima_spline
+
+        size = self.module._akima_spline_cache_size
+        self.assertEqual(size, 64)
+
+        splines = [cached_akima_spline(*self.curve(i)) for i in range(0, size)]
+        self.assertEqual(len(self.module._akima_spline_cache), size)
+
+        # using the first curve makes the second the least recently used, which is evicted by a new curve
+        self.assertIs(cached_akima_spline(*self.curve(0)), splines[0])
+        cached_akima_spline(*self.curve(size))
+        self.assertEqual(len(self.module._akima_spline_cache), size)
+        self.assertIs(cached_akima_spline(*self.curve(0)), splines[0])
+        self.assertIs(cached_akima_spline(*self.curve(2)), splines[2])
+        self.assertIsNot(cached_akima_spline(*self.curve(1)), splines[1])
+        self.assertEqual(len(self.module._akima_spline_cache), size)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
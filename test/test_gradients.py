@@ -6,10 +6,10 @@ from wakeexchange.OptimizationGroups import *
 from wakeexchange.GeneralWindFarmComponents import calculate_boundary
 from wakeexchange.gauss import gauss_wrapper, add_gauss_params_IndepVarComps
 from wakeexchange.floris import floris_wrapper, add_floris_params_IndepVarComps
+from wakeexchange.turbines import get_turbine_type
 # from wakeexchange.larsen import larsen_wrapper, add_larsen_params_IndepVarComps
 # from wakeexchange.jensen import jensen_wrapper, add_jensen_params_IndepVarComps
 
-import cPickle as pickle
 
 from scipy.interpolate import UnivariateSpline
 
@@ -180,7 +180,7 @@ class TotalDerivTestsFlorisAEPOptRotor(unittest.TestCase):
 
 
         # assign values to constant inputs (not design variables)
-        NREL5MWCPCT = pickle.load(open('./input_files/NREL5MWCPCT_smooth_dict.p'))
+        NREL5MWCPCT = get_turbine_type('NREL5MW').cpct_table('smooth')
         prob['turbineX'] = turbineX
         prob['turbineY'] = turbineY
         prob['yaw0'] = yaw
@@ -192,9 +192,9 @@ class TotalDerivTestsFlorisAEPOptRotor(unittest.TestCase):
         prob['windDirections'] = windDirections
         prob['windFrequencies'] = windFrequencies
         prob['model_params:FLORISoriginal'] = False
-        prob['gen_params:windSpeedToCPCT_CP'] = NREL5MWCPCT['CP']
-        prob['gen_params:windSpeedToCPCT_CT'] = NREL5MWCPCT['CT']
-        prob['gen_params:windSpeedToCPCT_wind_speed'] = NREL5MWCPCT['wind_speed']
+        prob['gen_params:windSpeedToCPCT_CP'] = NREL5MWCPCT.CP
+        prob['gen_params:windSpeedToCPCT_CT'] = NREL5MWCPCT.CT
+        prob['gen_params:windSpeedToCPCT_wind_speed'] = NREL5MWCPCT.wind_speed
         prob['model_params:ke'] = 0.05
         prob['model_params:kd'] = 0.17
         prob['model_params:aU'] = 12.0
@@ -822,8 +822,8 @@ class GradientTestsCtCpRotor(unittest.TestCase):
 
 
 
-        NREL5MWCPCT = pickle.load(open('./input_files/NREL5MWCPCT_dict.p'))
-        datasize = NREL5MWCPCT['CP'].size
+        NREL5MWCPCT = get_turbine_type('NREL5MW').cpct_table('tabulated')
+        datasize = NREL5MWCPCT.CP.size
 
         # set up problem
         prob = Problem(root=AEPGroup(nTurbines=nTurbines, use_rotor_components=use_rotor_components, datasize=datasize))
@@ -845,9 +845,9 @@ class GradientTestsCtCpRotor(unittest.TestCase):
         prob['model_params:FLORISoriginal'] = True
 
         # values for rotor coupling
-        prob['gen_params:windSpeedToCPCT_CP'] = NREL5MWCPCT['CP']
-        prob['gen_params:windSpeedToCPCT_CT'] = NREL5MWCPCT['CT']
-        prob['gen_params:windSpeedToCPCT_wind_speed'] = NREL5MWCPCT['wind_speed']
+        prob['gen_params:windSpeedToCPCT_CP'] = NREL5MWCPCT.CP
+        prob['gen_params:windSpeedToCPCT_CT'] = NREL5MWCPCT.CT
+        prob['gen_params:windSpeedToCPCT_wind_speed'] = NREL5MWCPCT.wind_speed
         prob['model_params:ke'] = 0.05
         prob['model_params:kd'] = 0.17
         prob['model_params:aU'] = 12.0
@@ -957,6 +957,82 @@ class GradientTestsPower(unittest.TestCase):
         np.testing.assert_allclose(self.J['all_directions.direction_group0.powerComp'][('dir_power0', 'rotorDiameter')]['J_fwd'], self.J['all_directions.direction_group0.powerComp'][('dir_power0', 'rotorDiameter')]['J_fd'], self.rtol, self.atol)
 
 
+class GradientTestsPowerMasks(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import WindDirectionPower, BatchedWindDirectionPower
+
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        # below cut-in, between cut-in and rated power, and above rated power (away from the switching speeds and the
+        # points of the cp curve)
+        wtVelocity = np.array([2., 3.5, 6., 10.4, 15.6, 20.2])
+        nTurbines = wtVelocity.size
+
+        cp_curve_vel = np.linspace(3., 25., 12)
+        cp_curve_cp = 0.45 - 0.01*(cp_curve_vel - 3.)
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('wtVelocity0', wtVelocity, units='m/s'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('Cp', np.ones(nTurbines)*0.45), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('rotorDiameter', np.ones(nTurbines)*80.), promotes=['*'])
+
+        # a constant Cp (no cp curve) and a Cp interpolated from the cp curve
+        prob.root.add('power', WindDirectionPower(nTurbines, cp_points=1), promotes=['*'])
+        prob.root.add('power_curve', WindDirectionPower(nTurbines, cp_points=cp_curve_vel.size))
+        for name in ['wtVelocity0', 'Cp', 'rotorDiameter']:
+            prob.root.connect(name, 'power_curve.%s' % name)
+
+        # the same for all directions at once, the second direction has the turbines in reverse order
+        prob.root.add('p3', IndepVarComp('wtVelocity', np.array([wtVelocity, wtVelocity[::-1]]), units='m/s'),
+                      promotes=['*'])
+        prob.root.add('p4', IndepVarComp('Cp_batched', np.ones((2, nTurbines))*0.45), promotes=['*'])
+        prob.root.add('batched_power', BatchedWindDirectionPower(nTurbines, 2), promotes=['wtVelocity', 'rotorDiameter'])
+        prob.root.add('batched_power_curve', BatchedWindDirectionPower(nTurbines, 2, cp_points=cp_curve_vel.size),
+                      promotes=['wtVelocity', 'rotorDiameter'])
+        prob.root.connect('Cp_batched', 'batched_power.Cp')
+        prob.root.connect('Cp_batched', 'batched_power_curve.Cp')
+
+        prob.setup(check=False)
+
+        for path in ['', 'power_curve.', 'batched_power.', 'batched_power_curve.']:
+            prob[path + 'cut_in_speed'] = np.ones(nTurbines)*4.
+            prob[path + 'rated_power'] = np.ones(nTurbines)*2000.
+        for path in ['power_curve.', 'batched_power_curve.']:
+            prob[path + 'cp_curve_cp'] = cp_curve_cp
+            prob[path + 'cp_curve_vel'] = cp_curve_vel
+
+        prob.run()
+
+        self.wtPower = prob['wtPower0']
+        self.wtPower_curve = prob['power_curve.wtPower0']
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testRegions(self):
+        # every region is covered with and without the cp curve
+        for wtPower in [self.wtPower, self.wtPower_curve]:
+            np.testing.assert_array_equal(wtPower[:2], 0.)
+            self.assertTrue(np.all((wtPower[2:4] > 0.) & (wtPower[2:4] < 2000.)))
+            np.testing.assert_array_equal(wtPower[4:], 2000.)
+
+    def testPower(self):
+        for comp in ['power', 'power_curve']:
+            for of in ['wtPower0', 'dir_power0']:
+                for wrt in ['wtVelocity0', 'Cp', 'rotorDiameter']:
+                    np.testing.assert_allclose(self.J[comp][(of, wrt)]['J_fwd'], self.J[comp][(of, wrt)]['J_fd'],
+                                               self.rtol, self.atol)
+
+    def testBatchedPower(self):
+        for comp in ['batched_power', 'batched_power_curve']:
+            for of in ['wtPower', 'dirPowers']:
+                for wrt in ['wtVelocity', 'Cp', 'rotorDiameter']:
+                    np.testing.assert_allclose(self.J[comp][(of, wrt)]['J_fwd'], self.J[comp][(of, wrt)]['J_fd'],
+                                               self.rtol, self.atol)
+
+
 class GradientTestsConstraintComponents(unittest.TestCase):
 
     def setUp(self):
@@ -1105,6 +1181,309 @@ class GradientTestsConstraintComponents(unittest.TestCase):
         np.testing.assert_allclose(self.J_circle[('boundaryDistances', 'turbineY')]['J_rev'], self.J_circle[('boundaryDistances', 'turbineY')]['J_fd'], self.rtol, self.atol)
 
 
+class GradientTestsNeighborSpacing(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import NeighborSpacingComp
+
+        nTurbines = 10
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        np.random.seed(seed=10)
+
+        # random layout dense enough that most turbines have neighbors within the search radius
+        turbineX = np.random.rand(nTurbines)*1500.
+        turbineY = np.random.rand(nTurbines)*1500.
+        rotorDiameter = np.ones(nTurbines)*126.4
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('turbineX', turbineX), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('turbineY', turbineY), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('rotorDiameter', rotorDiameter), promotes=['*'])
+        prob.root.add('spacing', NeighborSpacingComp(nTurbines, minSpacing=2., rho=10.), promotes=['*'])
+
+        prob.setup(check=False)
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testNeighborSpacing(self):
+        np.testing.assert_allclose(self.J['spacing'][('spacingKS', 'turbineX')]['J_fwd'], self.J['spacing'][('spacingKS', 'turbineX')]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['spacing'][('spacingKS', 'turbineY')]['J_fwd'], self.J['spacing'][('spacingKS', 'turbineY')]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['spacing'][('spacingKS', 'rotorDiameter')]['J_fwd'], self.J['spacing'][('spacingKS', 'rotorDiameter')]['J_fd'], self.rtol, self.atol)
+
+
+class GradientTestsCPCTInterpolate(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import CPCT_Interpolate_Gradients
+
+        nTurbines = 6
+        datasize = 40
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        np.random.seed(seed=10)
+
+        # piecewise-linear curves with uneven spacing so the segment search is exercised
+        wind_speed = np.sort(np.random.rand(datasize))*25.
+        CP = 0.45*np.sin(np.pi*wind_speed/25.)
+        CT = 0.8*np.exp(-wind_speed/15.)
+
+        wtVelocity = np.random.rand(nTurbines)*14. + 4.
+        yaw = np.random.rand(nTurbines)*60. - 30.
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('wtVelocity0', wtVelocity, units='m/s'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('yaw0', yaw, units='deg'), promotes=['*'])
+        prob.root.add('CtCp', CPCT_Interpolate_Gradients(nTurbines, direction_id=0, datasize=datasize),
+                      promotes=['*'])
+
+        prob.setup(check=False)
+
+        prob['gen_params:windSpeedToCPCT_wind_speed'] = wind_speed
+        prob['gen_params:windSpeedToCPCT_CP'] = CP
+        prob['gen_params:windSpeedToCPCT_CT'] = CT
+
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testCPCT_Cp_out(self):
+        np.testing.assert_allclose(self.J['CtCp'][('Cp_out', 'yaw0')]['J_fwd'], self.J['CtCp'][('Cp_out', 'yaw0')]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['CtCp'][('Cp_out', 'wtVelocity0')]['J_fwd'], self.J['CtCp'][('Cp_out', 'wtVelocity0')]['J_fd'], self.rtol, self.atol)
+
+    def testCPCT_Ct_out(self):
+        np.testing.assert_allclose(self.J['CtCp'][('Ct_out', 'yaw0')]['J_fwd'], self.J['CtCp'][('Ct_out', 'yaw0')]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['CtCp'][('Ct_out', 'wtVelocity0')]['J_fwd'], self.J['CtCp'][('Ct_out', 'wtVelocity0')]['J_fd'], self.rtol, self.atol)
+
+
+class GradientTestsMUX(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import MUX, DeMUX
+
+        nElements = 4
+        element_size = 3
+        self.nElements = nElements
+        self.rtol = 1E-6
+        self.atol = 1E-6
+
+        np.random.seed(seed=10)
+
+        rows = np.random.rand(nElements, element_size)*10.
+
+        prob = Problem(root=Group())
+        for i in range(0, nElements):
+            prob.root.add('p%i' % i, IndepVarComp('row%i' % i, rows[i]), promotes=['*'])
+        prob.root.add('pArray', IndepVarComp('rows', rows), promotes=['*'])
+
+        # one input (output) per row, and the whole array passed through
+        prob.root.add('mux', MUX(nElements, element_size=element_size))
+        prob.root.add('mux_pass', MUX(nElements, element_size=element_size, pass_through=True))
+        prob.root.add('demux', DeMUX(nElements, element_size=element_size))
+        prob.root.add('demux_pass', DeMUX(nElements, element_size=element_size, pass_through=True))
+        for i in range(0, nElements):
+            prob.root.connect('row%i' % i, 'mux.input%i' % i)
+        prob.root.connect('rows', 'mux_pass.Input')
+        prob.root.connect('rows', 'demux.Array')
+        prob.root.connect('rows', 'demux_pass.Array')
+
+        prob.setup(check=False)
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testMUX(self):
+        for i in range(0, self.nElements):
+            np.testing.assert_allclose(self.J['mux'][('Array', 'input%i' % i)]['J_fwd'], self.J['mux'][('Array', 'input%i' % i)]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['mux_pass'][('Array', 'Input')]['J_fwd'], self.J['mux_pass'][('Array', 'Input')]['J_fd'], self.rtol, self.atol)
+
+    def testDeMUX(self):
+        for i in range(0, self.nElements):
+            np.testing.assert_allclose(self.J['demux'][('output%i' % i, 'Array')]['J_fwd'], self.J['demux'][('output%i' % i, 'Array')]['J_fd'], self.rtol, self.atol)
+        np.testing.assert_allclose(self.J['demux_pass'][('Output', 'Array')]['J_fwd'], self.J['demux_pass'][('Output', 'Array')]['J_fd'], self.rtol, self.atol)
+
+    def testReverse(self):
+        np.testing.assert_allclose(self.J['mux_pass'][('Array', 'Input')]['J_rev'], self.J['mux_pass'][('Array', 'Input')]['J_fd'], self.rtol, self.atol)
+        for i in range(0, self.nElements):
+            np.testing.assert_allclose(self.J['mux'][('Array', 'input%i' % i)]['J_rev'], self.J['mux'][('Array', 'input%i' % i)]['J_fd'], self.rtol, self.atol)
+            np.testing.assert_allclose(self.J['demux'][('output%i' % i, 'Array')]['J_rev'], self.J['demux'][('output%i' % i, 'Array')]['J_fd'], self.rtol, self.atol)
+
+
+class GradientTestsWindRoseAEP(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import WindRoseAEP
+
+        nTurbines = 4
+        nDirections = 3
+        nSpeeds = 5
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        np.random.seed(seed=10)
+
+        # keep the velocities below rated power and away from the cut-in speed
+        windSpeeds = np.array([8., 9., 7.])
+        wtVelocity = windSpeeds[:, np.newaxis]*(0.6 + 0.4*np.random.rand(nDirections, nTurbines))
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('wtVelocity', wtVelocity, units='m/s'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('windSpeeds', windSpeeds, units='m/s'), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('windRoseFrequencies', np.random.rand(nDirections, nSpeeds)/15.),
+                      promotes=['*'])
+        prob.root.add('p3', IndepVarComp('rotorDiameter', np.ones(nTurbines)*126.4, units='m'), promotes=['*'])
+        prob.root.add('p4', IndepVarComp('Cp', 0.4 + 0.1*np.random.rand(nDirections, nTurbines)), promotes=['*'])
+        prob.root.add('AEPcomp', WindRoseAEP(nTurbines, nDirections, nSpeeds), promotes=['*'])
+
+        prob.setup(check=False)
+
+        prob['windSpeedBins'] = np.array([5., 6., 7., 8., 9.])
+        prob['cut_in_speed'] = np.ones(nTurbines)*2.
+
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testWindRoseAEP_AEP(self):
+        for wrt in ['wtVelocity', 'windSpeeds', 'windRoseFrequencies', 'rotorDiameter', 'Cp']:
+            np.testing.assert_allclose(self.J['AEPcomp'][('AEP', wrt)]['J_fwd'],
+                                       self.J['AEPcomp'][('AEP', wrt)]['J_fd'], self.rtol, self.atol)
+
+    def testWindRoseAEP_binPowers(self):
+        for wrt in ['wtVelocity', 'windSpeeds', 'rotorDiameter', 'Cp']:
+            np.testing.assert_allclose(self.J['AEPcomp'][('binPowers', wrt)]['J_fwd'],
+                                       self.J['AEPcomp'][('binPowers', wrt)]['J_fd'], self.rtol, self.atol)
+
+
+class GradientTestsRotorSweepSolve(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import RotorSweepSolve
+
+        nTurbines = 4
+        datasize = 24
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        np.random.seed(seed=10)
+
+        wind_speed = np.linspace(2., 25., datasize)
+        CP = 0.45*np.sin(np.pi*wind_speed/25.)
+        CT = 0.8*np.exp(-wind_speed/15.)
+
+        # a row of turbines along the wind with some lateral offsets, so every turbine is waked
+        turbineXw = np.arange(0, nTurbines)*5.*126.4 + np.random.rand(nTurbines)*100.
+        turbineYw = np.random.rand(nTurbines)*60.
+        yaw = np.random.rand(nTurbines)*30. - 15.
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('turbineXw', turbineXw, units='m'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('turbineYw', turbineYw, units='m'), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('yaw0', yaw, units='deg'), promotes=['*'])
+        prob.root.add('p3', IndepVarComp('rotorDiameter', np.ones(nTurbines)*126.4, units='m'), promotes=['*'])
+        prob.root.add('p4', IndepVarComp('hubHeight', np.ones(nTurbines)*90., units='m'), promotes=['*'])
+        prob.root.add('p5', IndepVarComp('wind_speed', 8., units='m/s'), promotes=['*'])
+        add_gauss_params_IndepVarComps(prob.root)
+        prob.root.add('sweep', RotorSweepSolve(nTurbines, direction_id=0, datasize=datasize, wake_model=gauss_wrapper,
+                                               wake_model_options={'nSamples': 0}),
+                      promotes=['*'])
+
+        prob.setup(check=False)
+
+        prob['gen_params:windSpeedToCPCT_wind_speed'] = wind_speed
+        prob['gen_params:windSpeedToCPCT_CP'] = CP
+        prob['gen_params:windSpeedToCPCT_CT'] = CT
+
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testRotorSweepSolve(self):
+        for of in ['wtVelocity0', 'Ct_out', 'Cp_out']:
+            for wrt in ['turbineXw', 'turbineYw', 'yaw0', 'wind_speed']:
+                np.testing.assert_allclose(self.J['sweep'][(of, wrt)]['J_fwd'], self.J['sweep'][(of, wrt)]['J_fd'],
+                                           self.rtol, self.atol)
+
+
+class GradientTestsBatchedSpeedBinWakeModel(unittest.TestCase):
+
+    def setUp(self):
+
+        from openmdao.api import Group, IndepVarComp
+        from wakeexchange.GeneralWindFarmComponents import BatchedSpeedBinWakeModel
+
+        nTurbines = 4
+        nDirections = 3
+        datasize = 24
+        self.rtol = 1E-5
+        self.atol = 1E-5
+
+        np.random.seed(seed=10)
+
+        # every direction has one bin at its reference speed, the other bins change Ct well beyond the tolerance. The
+        # speeds are between the points of the thrust curve, where its slope is defined
+        wind_speed = np.linspace(2.5, 25.5, datasize)
+        CT = 0.8*np.exp(-wind_speed/15.)
+        windSpeeds = np.array([8., 10., 6.])
+        windSpeedBins = np.array([6., 8., 10.])
+
+        turbineXw = np.arange(0, nTurbines)*5.*126.4 + np.random.rand(nDirections, nTurbines)*100.
+        turbineYw = np.random.rand(nDirections, nTurbines)*60.
+        Ct = 0.6 + np.random.rand(nDirections, nTurbines)*0.2
+        yaw = np.random.rand(nDirections, nTurbines)*30. - 15.
+
+        prob = Problem(root=Group())
+        prob.root.add('p0', IndepVarComp('turbineXw', turbineXw, units='m'), promotes=['*'])
+        prob.root.add('p1', IndepVarComp('turbineYw', turbineYw, units='m'), promotes=['*'])
+        prob.root.add('p2', IndepVarComp('Ct', Ct), promotes=['*'])
+        prob.root.add('p3', IndepVarComp('yaw', yaw, units='deg'), promotes=['*'])
+        prob.root.add('p4', IndepVarComp('windSpeeds', windSpeeds, units='m/s'), promotes=['*'])
+        prob.root.add('p5', IndepVarComp('rotorDiameter', np.ones(nTurbines)*126.4, units='m'), promotes=['*'])
+        prob.root.add('p6', IndepVarComp('hubHeight', np.ones(nTurbines)*90., units='m'), promotes=['*'])
+        add_gauss_params_IndepVarComps(prob.root)
+        prob.root.add('wakeModel', BatchedSpeedBinWakeModel(nTurbines, nDirections, windSpeedBins.size,
+                                                            wake_model=gauss_wrapper,
+                                                            wake_model_options={'nSamples': 0},
+                                                            datasize=datasize, ct_tolerance=1e-3),
+                      promotes=['*'])
+
+        prob.setup(check=False)
+
+        prob['windSpeedBins'] = windSpeedBins
+        prob['gen_params:windSpeedToCPCT_wind_speed'] = wind_speed
+        prob['gen_params:windSpeedToCPCT_CT'] = CT
+
+        prob.run()
+
+        self.J = prob.check_partial_derivatives(out_stream=None)
+
+    def testBatchedSpeedBinWakeModel(self):
+        for of in ['wtVelocity', 'wtVelocityBins']:
+            for wrt in ['turbineXw', 'turbineYw', 'Ct', 'yaw', 'windSpeeds']:
+                np.testing.assert_allclose(self.J['wakeModel'][(of, wrt)]['J_fwd'],
+                                           self.J['wakeModel'][(of, wrt)]['J_fd'], self.rtol, self.atol)
+
+    def testDatasize(self):
+        from wakeexchange.GeneralWindFarmComponents import BatchedSpeedBinWakeModel
+
+        # the speed bins need the thrust curve
+        self.assertRaises(ValueError, BatchedSpeedBinWakeModel, 4, 3, 3, wake_model=gauss_wrapper,
+                          wake_model_options={'nSamples': 0})
+
+
 # TODO create gradient tests for all components
 
 if __name__ == "__main__":